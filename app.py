@@ -1,19 +1,86 @@
+import hmac
+import io
+import mimetypes
 import os
-import tensorflow as tf
-from flask import Flask, render_template, request, redirect, url_for, flash
-from werkzeug.utils import secure_filename
+import json
+import random
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+import time
+from functools import partial, wraps
+
+from flask import (
+    Flask, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context,
+    send_from_directory, abort, has_request_context, make_response
+)
 
-import cv2
 import numpy as np
 
-from src.inference import load_model_and_labels, predict_image
-from src.explain import make_gradcam_heatmap, save_and_display_gradcam, find_target_layer
+from src.inference import load_model_and_labels, predict_image, predict_batch
+from src.batching import MicroBatcher, wait_result
+from src.admission import MSG_DEADLINE, AdmissionController, DeadlineExceeded, Overloaded
+from src.preprocess import ImageContext
+from src.explain import encode_overlay, GradCamExplainer
+from src.cache import PredictionCache, make_key, model_fingerprint
+from src.jobs import JobQueue
+from src.lazy import tf
+from src.startup import StartupState
+from src.quality import MSG_NO_LEAF, quality_gate
+from src.storage import UploadStore, is_store_name
+from src.metrics import Metrics
+from src.multires import ResolutionController, load_variants, parse_resolutions
+from src.profiling import PROFILE_FILE, SUMMARY_FILE, TIMING_FILE, ProfileStore, RequestProfile
+from src.registry import ModelHandle, ModelRegistry
+from src.tta import clamp_views, submit_tta
+from src.tiling import predict_tiled
 from src.config import (
     DEFAULT_IMG_SIZE,
     ALLOWED_EXTENSIONS,
     MODEL_PATH,
     LABEL_MAP_PATH,
     UPLOAD_FOLDER,
+    BATCH_MAX_SIZE,
+    BATCH_MAX_WAIT_MS,
+    API_MAX_IN_FLIGHT,
+    ADMISSION_MAX_CONCURRENT,
+    ADMISSION_QUEUE_SIZE,
+    ADMISSION_MAX_WAIT_S,
+    REQUEST_DEADLINE_S,
+    PROFILE_DIR,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_MAX_KEEP,
+    PROFILE_TF_TRACE,
+    ADAPTIVE_RESOLUTIONS,
+    ADAPTIVE_QUEUE_HIGH,
+    ADAPTIVE_QUEUE_LOW,
+    ADAPTIVE_LATENCY_HIGH_MS,
+    ADAPTIVE_LATENCY_LOW_MS,
+    ADAPTIVE_COOLDOWN_S,
+    TTA_VIEWS,
+    TILE_SIZE,
+    TILE_OVERLAP,
+    TILE_MIN_FOLIAGE,
+    CACHE_MAX_ENTRIES,
+    CACHE_DIR,
+    CACHE_DISK_MAX_MB,
+    GRADCAM_MODE,
+    HEATMAP_WORKERS,
+    HEATMAP_QUEUE_SIZE,
+    HEATMAP_MAX_WAIT_S,
+    HEATMAP_FORMAT,
+    HEATMAP_QUALITY,
+    HEATMAP_MAX_SIDE,
+    SERVING_WARMUP_BATCH_SIZES,
+    PRELOAD_MODEL,
+    MODEL_REGISTRY_DIR,
+    MODEL_REGISTRY_POLL_S,
+    ADMIN_TOKEN,
+    QUALITY_MAX_SIDE,
+    UPLOAD_STORE,
+    UPLOAD_MAX_MB,
+    UPLOAD_TTL_S,
+    UPLOAD_SWEEP_INTERVAL_S,
 )
 from src.disease_data import DISEASE_INFO
 
@@ -23,13 +90,54 @@ app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 
 os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 
-_MODEL = None
-_CLASS_NAMES = None
-
+# Versi model aktif (ModelHandle); diganti atomik saat hot reload
+_HANDLE = None
+_REGISTRY = ModelRegistry(MODEL_REGISTRY_DIR) if MODEL_REGISTRY_DIR else None
+_RELOAD = None  # StartupState dari reload terakhir (fase + status)
+_RELOAD_TARGET = None
+# Handle yang di-pin per request (disimpan di environ WSGI request tersebut)
+_HANDLE_KEY = "tomatocare.model_handle"
+_HANDLE_DEFERRED_KEY = "tomatocare.model_handle_deferred"
+_WATCHER_PID = None
+_HEATMAP_JOBS = None
+_MODEL_LOCK = threading.Lock()
+_CACHE = PredictionCache(CACHE_MAX_ENTRIES, disk_dir=CACHE_DIR, disk_max_bytes=CACHE_DISK_MAX_MB * 1024 * 1024)
+_STARTUP = StartupState()
+_UPLOADS = None
+_METRICS = Metrics()
+_REQUESTS = _METRICS.counter(
+    "requests_total",
+    "Jumlah gambar per endpoint & outcome (predicted, rejected, bad_request, overloaded, error).",
+)
+# Admission control: slot paralel + antrian terbatas untuk endpoint prediksi (None = tanpa batas)
+_ADMISSION = AdmissionController(
+    max_concurrent=ADMISSION_MAX_CONCURRENT,
+    max_queue=ADMISSION_QUEUE_SIZE,
+    max_wait_s=ADMISSION_MAX_WAIT_S,
+) if ADMISSION_MAX_CONCURRENT > 0 else None
+_SHED = _METRICS.counter("admission_rejected_total", "Request yang ditolak karena server jenuh, per alasan.")
+# Slot admission (waktu mulai dipegang) & deadline absolut (time.monotonic) per request
+_ADMISSION_KEY = "tomatocare.admission_slot"
+_ADMISSION_DEFERRED_KEY = "tomatocare.admission_deferred"
+_DEADLINE_KEY = "tomatocare.deadline"
+# Profil per request (lihat _profiled); folder dibuat saat profil pertama ditulis
+_PROFILES = ProfileStore(PROFILE_DIR, max_keep=PROFILE_MAX_KEEP)
+# Resolusi input adaptif: index 0 = DEFAULT_IMG_SIZE, turun saat server jenuh (None = nonaktif)
+_LOWER_RESOLUTIONS = [s for s in parse_resolutions(ADAPTIVE_RESOLUTIONS) if s < tuple(DEFAULT_IMG_SIZE)] \
+    if ADAPTIVE_RESOLUTIONS else []
+_RESOLUTION = ResolutionController(
+    [tuple(DEFAULT_IMG_SIZE)] + _LOWER_RESOLUTIONS,
+    queue_high=ADAPTIVE_QUEUE_HIGH,
+    queue_low=ADAPTIVE_QUEUE_LOW,
+    latency_high_ms=ADAPTIVE_LATENCY_HIGH_MS,
+    latency_low_ms=ADAPTIVE_LATENCY_LOW_MS,
+    cooldown_s=ADAPTIVE_COOLDOWN_S,
+) if _LOWER_RESOLUTIONS else None
+_RESOLUTIONS_SERVED = _METRICS.counter("inference_resolution_total", "Inference per resolusi input model.")
 
 
 # --- VALIDATION HELPER ---
-def validate_image(filepath):
+def validate_image(image, min_plant_ratio=None):
     """
     Validasi Advanced (Level Max):
     1. Cek File Corrupt
@@ -38,85 +146,325 @@ def validate_image(filepath):
     4. Cek Blur (Laplacian)
     5. Cek Objek Asing (Warna Buatan/Scribbles)
     6. Cek Dominasi Daun (Wajib Hijau/Kuning/Coklat Alami)
+
+    `image` boleh path file atau ImageContext. Cek dijalankan pada downsample
+    dan berhenti di cek pertama yang gagal (lihat src/quality.py).
     """
-    try:
-        img = cv2.imread(filepath)
-        if img is None:
-            return False, "File gambar rusak atau tidak terbaca."
-        
-        h, w, _ = img.shape
-        img_hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-        img_gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-
-        # 1. CEK RESOLUSI
-        if h < 200 or w < 200:
-            return False, f"Resolusi citra terlalu rendah ({w}x{h}). Minimal 200x200 px agar AI bekerja optimal."
-
-        # 2. CEK PENCAHAYAAN (Brightness)
-        avg_brightness = np.mean(img_gray)
-        if avg_brightness < 30:
-            return False, "Citra terlalu GELAP. Harap ambil foto di tempat yang lebih terang."
-        if avg_brightness > 220:
-            return False, "Citra terlalu TERANG (Overexposed). Detail daun hilang karena cahaya berlebih."
-
-        # 3. CEK KETAJAMAN (Blur Detection)
-        # Laplacian Variance: Angka kecil = Flat/Blur, Angka besar = Tajam/Texture
-        blur_score = cv2.Laplacian(img_gray, cv2.CV_64F).var()
-        if blur_score < 50: 
-            return False, "Citra terlalu BURAM/HANCUR. Pastikan kamera fokus ke daun saat memotret."
-
-        # 4. CEK OBJEK ASING (Synthetic Colors: Blue, Neon Pink, Cyan)
-        # Warna-warna ini JARANG ada di alam (kecuali bunga tertentu, tapi tomat tidak).
-        # Biasa muncul di baju, mobil, tembok cat, atau coretan spidol digital.
-        # Range Biru/Cyan
-        lower_blue = np.array([85, 50, 50])
-        upper_blue = np.array([135, 255, 255])
-        mask_blue = cv2.inRange(img_hsv, lower_blue, upper_blue)
-        
-        # Range Pink/Magenta (Sering dipakai spidol)
-        lower_pink = np.array([140, 50, 50])
-        upper_pink = np.array([170, 255, 255])
-        mask_pink = cv2.inRange(img_hsv, lower_pink, upper_pink)
-
-        foreign_pixels = cv2.countNonZero(mask_blue) + cv2.countNonZero(mask_pink)
-        total_pixels = h * w
-        
-        if (foreign_pixels / total_pixels) > 0.05: # Jika > 5% gambar isinya biru/pink
-            return False, "Terdeteksi OBJEK ASING atau CORETAN (Warna tidak alami). Harap upload foto daun tomat asli."
-
-        # 5. CEK DOMINASI DAUN (Leaf Segmentation Logic)
-        # Kita cari pixel Hijau (Daun Sehat) + Kuning/Coklat (Daun Sakit)
-        
-        # Hijau (Range Luas)
-        lower_green = np.array([25, 40, 40])
-        upper_green = np.array([95, 255, 255]) 
-        mask_green = cv2.inRange(img_hsv, lower_green, upper_green)
-        
-        # Kuning/Coklat/Oranye (Penyakit)
-        lower_disease = np.array([10, 40, 40]) 
-        upper_disease = np.array([25, 255, 255])
-        mask_disease = cv2.inRange(img_hsv, lower_disease, upper_disease)
-
-        plant_pixels = cv2.countNonZero(mask_green) + cv2.countNonZero(mask_disease)
-        plant_ratio = plant_pixels / total_pixels
-
-        # Ambang batas kita naikkan ke 20% agar lebih ketat terhadap background kosong
-        if plant_ratio < 0.20:
-            return False, "Objek DAUN TOMAT tidak ditemukan atau terlalu kecil. Pastikan foto zoom ke arah daun, bukan background."
-
-        return True, "Valid"
+    kwargs = {} if min_plant_ratio is None else {"min_plant_ratio": min_plant_ratio}
+    return quality_gate(image, max_side=QUALITY_MAX_SIDE, **kwargs)
+
 
+def _resolve_model(version=None):
+    """(versi, path model, path label map): dari registry bila ada, selain itu MODEL_PATH/LABEL_MAP_PATH."""
+    if _REGISTRY is not None:
+        version = version or _REGISTRY.active()
+        if version is not None:
+            return (version,) + _REGISTRY.resolve(version)
+    return "default", MODEL_PATH, LABEL_MAP_PATH
+
+
+def _load_serving_model(model_path=MODEL_PATH, label_map_path=LABEL_MAP_PATH, state=None):
+    """Import TF, muat model + label map, warmup, dan siapkan Grad-CAM; setiap fase dicatat."""
+    state = state or _STARTUP
+    with state.phase("import_tensorflow"):
+        tf.load()
+    with state.phase("load_model"):
+        model, class_names = load_model_and_labels(model_path, label_map_path, serving=True, warmup=False)
+    with state.phase("warmup_predict"):
+        model.warmup(SERVING_WARMUP_BATCH_SIZES)
+
+    # Graph Grad-CAM + target layer di-resolve sekali per model yang dimuat
+    explainer = None
+    try:
+        with state.phase("build_gradcam"):
+            explainer = GradCamExplainer(getattr(model, "keras_model", model))
+        with state.phase("warmup_gradcam"):
+            explainer.warmup()
     except Exception as e:
-        print(f"[ValidationError] {e}")
-        return False, "Gagal memvalidasi gambar. Format mungkin tidak didukung."
+        print(f"[WARNING] Grad-CAM tidak tersedia untuk model ini: {e}")
+        explainer = None
+    return model, class_names, explainer
+
+
+def _load_handle(version=None, state=None):
+    """Muat + warmup satu versi model menjadi ModelHandle (belum dipakai request)."""
+    state = state or _STARTUP
+    version, model_path, label_map_path = _resolve_model(version)
+    model, class_names, explainer = _load_serving_model(model_path, label_map_path, state)
+    variants = {}
+    if _RESOLUTION is not None:
+        with state.phase("load_variants"):
+            variants = load_variants(model, model_path, _RESOLUTION.resolutions[1:], SERVING_WARMUP_BATCH_SIZES)
+    handle = ModelHandle(version, model, class_names, explainer, model_path, label_map_path,
+                         model_fingerprint(model_path), state.snapshot()["phases_ms"])
+    handle.variants = variants
+
+    def close_batchers():
+        batchers = [handle.batcher, handle.explain_batcher]
+        for variant in handle.variants.values():
+            batchers += [variant.batcher, variant.explain_batcher]
+        for batcher in batchers:
+            if batcher is not None:
+                batcher.close(timeout=30)
+    handle.on_close(close_batchers)
+    return handle
+
+
+def _active_handle():
+    """Handle versi aktif; dimuat sekali (lazy) saat pertama dibutuhkan."""
+    global _HANDLE
+    if _HANDLE is None:
+        with _MODEL_LOCK:
+            if _HANDLE is None:
+                _STARTUP.mark_loading()
+                try:
+                    _HANDLE = _load_handle()
+                except Exception as e:
+                    _STARTUP.mark_failed(e)
+                    raise
+                _STARTUP.mark_ready()
+    return _HANDLE
+
+
+def _get_handle():
+    """
+    Handle model untuk request ini. Di dalam request, handle di-pin (acquire)
+    pada request pertama yang butuh model dan dilepas di teardown, sehingga
+    request yang sedang jalan selesai dengan versi lama meskipun terjadi swap.
+    """
+    if not has_request_context():
+        return _active_handle()
+    handle = request.environ.get(_HANDLE_KEY)
+    if handle is None:
+        _ensure_watcher()
+        handle = _active_handle()
+        while not handle.acquire():  # sudah ditutup karena swap; ambil versi terbaru
+            handle = _active_handle()
+        request.environ[_HANDLE_KEY] = handle
+    return handle
+
+
+@app.after_request
+def _release_handle_on_close(response):
+    """Lepas handle saat response selesai dikirim (response streaming memakai model sampai akhir)."""
+    handle = request.environ.get(_HANDLE_KEY)
+    if handle is not None and not request.environ.get(_HANDLE_DEFERRED_KEY):
+        request.environ[_HANDLE_DEFERRED_KEY] = True
+        response.call_on_close(handle.release)
+    return response
+
+
+@app.teardown_request
+def _release_handle(exc=None):
+    # Jalur error: after_request tidak dipanggil, handle dilepas di sini
+    if not request.environ.get(_HANDLE_DEFERRED_KEY):
+        handle = request.environ.pop(_HANDLE_KEY, None)
+        if handle is not None:
+            handle.release()
+
+
+def _remaining_s():
+    """Sisa waktu (detik) sebelum deadline request ini; None bila tanpa deadline."""
+    deadline = request.environ.get(_DEADLINE_KEY) if has_request_context() else None
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def _deadline_exceeded():
+    """Catat request yang melewati deadline; return exception untuk dilempar/dilaporkan."""
+    _SHED.inc(reason="deadline")
+    if _ADMISSION is not None:
+        _ADMISSION.record_deadline()
+        return DeadlineExceeded(_ADMISSION.retry_after())
+    return DeadlineExceeded()
+
+
+def _overloaded_response(endpoint, exc):
+    """429/503 + Retry-After. Halaman HTML kembali ke index dengan pesan; API menerima JSON."""
+    _REQUESTS.inc(endpoint=endpoint, outcome="overloaded")
+    headers = {"Retry-After": str(exc.retry_after)}
+    if endpoint == "api":
+        body = jsonify({"error": str(exc), "reason": exc.reason, "retry_after": exc.retry_after})
+        return body, exc.status, headers
+    flash(str(exc))
+    return index(), exc.status, headers
+
+
+def _admitted(endpoint):
+    """Ambil slot admission sebelum view jalan; server jenuh -> gagal cepat dengan 429/503."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if REQUEST_DEADLINE_S > 0:
+                request.environ[_DEADLINE_KEY] = time.monotonic() + REQUEST_DEADLINE_S
+            if _ADMISSION is not None:
+                try:
+                    with _METRICS.span("admission_wait"):
+                        _ADMISSION.acquire(_remaining_s())
+                except Overloaded as exc:
+                    _SHED.inc(reason=exc.reason)
+                    return _overloaded_response(endpoint, exc)
+                request.environ[_ADMISSION_KEY] = time.monotonic()
+            try:
+                return view(*args, **kwargs)
+            except Overloaded as exc:
+                return _overloaded_response(endpoint, exc)
+        return wrapper
+    return decorator
+
+
+def _release_admission_slot(environ):
+    start = environ.pop(_ADMISSION_KEY, None)
+    if start is not None:
+        _ADMISSION.release(time.monotonic() - start)
+
+
+@app.after_request
+def _release_admission_on_close(response):
+    """Slot dilepas setelah body selesai: langsung untuk response biasa, saat close untuk streaming."""
+    environ = request.environ
+    if _ADMISSION_KEY in environ:
+        if response.is_streamed:
+            environ[_ADMISSION_DEFERRED_KEY] = True
+            response.call_on_close(partial(_release_admission_slot, environ))
+        else:
+            _release_admission_slot(environ)
+    return response
+
+
+@app.teardown_request
+def _release_admission(exc=None):
+    # Jalur error: after_request tidak dipanggil, slot dilepas di sini
+    if not request.environ.get(_ADMISSION_DEFERRED_KEY):
+        _release_admission_slot(request.environ)
 
 
 def _get_model_and_labels():
-    """Lazy-load model + label map sekali lalu cache di memori."""
-    global _MODEL, _CLASS_NAMES
-    if _MODEL is None or _CLASS_NAMES is None:
-        _MODEL, _CLASS_NAMES = load_model_and_labels(MODEL_PATH, LABEL_MAP_PATH)
-    return _MODEL, _CLASS_NAMES
+    """Model + label map dari versi aktif (lazy-load sekali lalu cache di memori)."""
+    handle = _get_handle()
+    return handle.model, handle.class_names
+
+
+def _swap_handle(new_handle):
+    """Ganti versi aktif secara atomik; handle lama ditutup setelah request terakhirnya selesai."""
+    global _HANDLE
+    with _MODEL_LOCK:
+        old, _HANDLE = _HANDLE, new_handle
+    if old is not None and old is not new_handle:
+        old.retire()
+    print(f"[MODEL] Versi aktif: {new_handle.version} (sebelumnya: {old.version if old else '-'})")
+    return old
+
+
+def _reload_model(version=None, rollback=False, state=None):
+    """Muat + warmup versi baru lalu swap; tandai aktif di registry agar worker lain ikut."""
+    handle = _load_handle(version, state)
+    _swap_handle(handle)
+    if _REGISTRY is not None and version is not None:
+        _REGISTRY.activate(handle.version, rollback=rollback)
+    if state is not None:
+        state.mark_ready()
+    return handle
+
+
+def _start_reload(version=None, rollback=False):
+    """Reload di thread background; False jika masih ada reload yang berjalan."""
+    global _RELOAD, _RELOAD_TARGET
+    with _MODEL_LOCK:
+        if _RELOAD is not None and _RELOAD.snapshot()["status"] == "loading":
+            return False
+        _RELOAD, _RELOAD_TARGET = StartupState(), version
+        state = _RELOAD
+    return state.run_in_background(lambda: _reload_model(version, rollback, state))
+
+
+def _ensure_watcher():
+    """Thread (per proses) yang mengikuti versi aktif registry, mis. setelah worker lain di-activate."""
+    global _WATCHER_PID
+    if _REGISTRY is None or MODEL_REGISTRY_POLL_S <= 0 or _WATCHER_PID == os.getpid():
+        return
+    _WATCHER_PID = os.getpid()
+
+    def watch():
+        while True:
+            time.sleep(MODEL_REGISTRY_POLL_S)
+            try:
+                target = _REGISTRY.active()
+                if _HANDLE is None or target is None or target == _HANDLE.version:
+                    continue
+                # Versi yang gagal dimuat tidak dicoba ulang setiap poll
+                if _RELOAD_TARGET == target and _RELOAD.snapshot()["status"] == "failed":
+                    continue
+                print(f"[MODEL] Registry: versi aktif berubah ke {target}, reload")
+                _start_reload(target)
+            except Exception as e:  # noqa: BLE001 - watcher tidak boleh mati
+                print(f"[WARNING] Model registry watcher error: {e}")
+
+    threading.Thread(target=watch, name="model-watcher", daemon=True).start()
+
+
+def _start_preload():
+    """Muat + warmup model di thread background (request non-ML tidak ikut menunggu)."""
+    return _STARTUP.run_in_background(_get_model_and_labels)
+
+
+def _serving_target(size=None, handle=None):
+    """Objek pemilik model + batcher untuk resolusi `size`: handle (resolusi penuh) atau ResolutionVariant."""
+    handle = handle or _get_handle()
+    if size is None or tuple(size) == tuple(DEFAULT_IMG_SIZE):
+        return handle, ""
+    return handle.variants[tuple(size)], f"@{size[0]}"
+
+
+def _get_batcher(size=None):
+    """MicroBatcher untuk versi model (dan resolusi) ini, dibuat sekali per handle."""
+    target, suffix = _serving_target(size)
+    if target.batcher is None:
+        with _MODEL_LOCK:
+            if target.batcher is None:
+                target.batcher = MicroBatcher(
+                    partial(predict_batch, target.model),
+                    max_batch_size=BATCH_MAX_SIZE,
+                    max_wait_ms=BATCH_MAX_WAIT_MS,
+                    name="predict" + suffix,
+                )
+    return target.batcher
+
+
+def _get_explain_batcher(size=None, handle=None):
+    """
+    MicroBatcher untuk prediksi + heatmap Grad-CAM dalam satu forward pass.
+    `handle`: versi yang di-pin pemanggil di luar request (job heatmap async).
+    """
+    target, suffix = _serving_target(size, handle)
+    if target.explain_batcher is None and target.explainer is not None:
+        with _MODEL_LOCK:
+            if target.explain_batcher is None:
+                target.explain_batcher = MicroBatcher(
+                    target.explainer.explain_batch,
+                    max_batch_size=BATCH_MAX_SIZE,
+                    max_wait_ms=BATCH_MAX_WAIT_MS,
+                    name="explain" + suffix,
+                )
+    return target.explain_batcher
+
+
+def _select_resolution():
+    """Resolusi input untuk request ini: turun saat antrian/latensi tinggi (lihat ResolutionController)."""
+    if _RESOLUTION is None:
+        return tuple(DEFAULT_IMG_SIZE)
+    size = _RESOLUTION.select(_ADMISSION.queue_depth() if _ADMISSION is not None else 0)
+    if size not in _get_handle().variants:  # mis. model TFLite tanpa varian
+        return tuple(DEFAULT_IMG_SIZE)
+    return size
+
+
+def _observe_inference(size, start, _future=None):
+    """Latensi inference (untuk controller resolusi) + hitungan per resolusi."""
+    if _RESOLUTION is not None:
+        _RESOLUTION.observe(time.perf_counter() - start)
+    _RESOLUTIONS_SERVED.inc(resolution=f"{size[0]}x{size[1]}")
 
 
 def allowed_file(filename):
@@ -140,6 +488,276 @@ def get_disease_info(class_name_en: str) -> dict:
     })
 
 
+def _encode_heatmap(ctx, heatmap):
+    """Overlay Grad-CAM -> bytes JPEG/WebP resolusi tampilan (siap di-cache), atau None jika gagal."""
+    try:
+        with _METRICS.span("gradcam_render"):
+            return encode_overlay(ctx, heatmap, max_side=HEATMAP_MAX_SIDE, fmt=HEATMAP_FORMAT,
+                                  quality=HEATMAP_QUALITY)
+    except Exception as e:
+        print(f"[ERROR] Error generating Grad-CAM: {e}")
+        return None
+
+
+def _get_upload_store():
+    """UploadStore bersama (disk di UPLOAD_FOLDER atau memori, sesuai UPLOAD_STORE)."""
+    global _UPLOADS
+    if _UPLOADS is None:
+        with _MODEL_LOCK:
+            if _UPLOADS is None:
+                _UPLOADS = UploadStore(
+                    root=app.config["UPLOAD_FOLDER"],
+                    memory=UPLOAD_STORE == "memory",
+                    max_bytes=UPLOAD_MAX_MB * 1024 * 1024,
+                    ttl_s=UPLOAD_TTL_S,
+                    sweep_interval_s=UPLOAD_SWEEP_INTERVAL_S,
+                )
+    return _UPLOADS
+
+
+def _upload_url(name):
+    return url_for("uploaded_file", name=name)
+
+
+def _write_heatmap(heatmap_bytes, filename):
+    """Simpan bytes heatmap di upload store; kembalikan nama file-nya."""
+    # Ekstensi dari isi bytes: entry cache lama tetap valid walau HEATMAP_FORMAT diganti
+    ext = "webp" if heatmap_bytes[:4] == b"RIFF" else "jpg"
+    heatmap_filename = f"heatmap_{os.path.splitext(filename)[0]}.{ext}"
+    with _METRICS.span("heatmap_save"):
+        _get_upload_store().put(heatmap_filename, heatmap_bytes)
+    return heatmap_filename
+
+
+def _publish_heatmap(heatmap_bytes, filename):
+    """Simpan bytes heatmap dan kembalikan URL-nya (None jika tidak ada)."""
+    if heatmap_bytes is None:
+        return None
+    return _upload_url(_write_heatmap(heatmap_bytes, filename))
+
+
+def _model_fingerprint():
+    """Fingerprint versi model yang dipakai request ini (tanpa memicu load model)."""
+    handle = request.environ.get(_HANDLE_KEY) if has_request_context() else None
+    handle = handle or _HANDLE
+    if handle is not None:
+        return handle.fingerprint
+    return model_fingerprint(_resolve_model()[1])
+
+
+def _cache_key(ctx, with_heatmap=True, tta=1, tiled=False, size=None):
+    if tiled:
+        return make_key(ctx.data, _model_fingerprint(), "tiled")
+    parts = ["heatmap" if with_heatmap else "probs"] + ([f"tta{tta}"] if tta > 1 else [])
+    if size is not None and tuple(size) != tuple(DEFAULT_IMG_SIZE):
+        parts.append(f"res{size[0]}x{size[1]}")
+    return make_key(ctx.data, _model_fingerprint(), *parts)
+
+
+def _analysis_entry(valid, message, probs=None, heatmap=None):
+    return {
+        "valid": valid,
+        "message": message,
+        "probs": [float(p) for p in probs] if probs is not None else None,
+        "heatmap": heatmap,
+    }
+
+
+def _validated(ctx, min_plant_ratio=None):
+    """Entry 'rejected' bila upload tidak lolos validasi, selain itu None."""
+    with _METRICS.span("validate"):
+        is_valid, error_msg = validate_image(ctx, min_plant_ratio=min_plant_ratio)
+    return None if is_valid else _analysis_entry(False, error_msg)
+
+
+def _inference_done(size, tta, start, future):
+    """Callback future inference: latensi untuk controller resolusi + waktu per view TTA."""
+    if future.cancelled():
+        return
+    _observe_inference(size, start)
+    if tta > 1:
+        _METRICS.observe("tta_per_view", (time.perf_counter() - start) / tta)
+
+
+def _submit_inference(ctx, with_heatmap, tta, size):
+    """
+    Antrikan inference (opsional TTA) untuk satu upload ke MicroBatcher resolusi `size`.
+    Return (future, explained): future berisi probabilitas, atau (probabilitas, heatmap)
+    bila explained (Grad-CAM dalam forward pass yang sama).
+    """
+    explain_batcher = _get_explain_batcher(size) if with_heatmap else None
+    if with_heatmap and explain_batcher is None:
+        print("[WARNING] Grad-CAM tidak tersedia untuk model ini.")
+    future = submit_tta(_get_batcher(size), ctx.model_input(size), tta, explain_batcher)
+    future.add_done_callback(partial(_inference_done, size, tta, time.perf_counter()))
+    return future, explain_batcher is not None
+
+
+def _finish_inference(ctx, output, explained, size):
+    """Entry analisis dari hasil future _submit_inference (overlay heatmap di-render di thread pemanggil)."""
+    heatmap = None
+    if explained:
+        output, heatmap_arr = output
+        heatmap = _encode_heatmap(ctx, heatmap_arr)
+    entry = _analysis_entry(True, "Valid", output, heatmap)
+    entry["resolution"] = list(size)
+    return entry
+
+
+def _compute_analysis(ctx, with_heatmap=True, tta=TTA_VIEWS, size=None):
+    """Validasi, inference (opsional TTA), dan (opsional) Grad-CAM untuk satu upload pada resolusi `size`."""
+    rejected = _validated(ctx)
+    if rejected is not None:
+        return rejected
+
+    size = tuple(size or DEFAULT_IMG_SIZE)
+    tta = clamp_views(tta, size)
+    start = time.perf_counter()
+    future, explained = _submit_inference(ctx, with_heatmap, tta, size)
+    try:
+        output = wait_result(future, _remaining_s())
+    except TimeoutError:
+        raise _deadline_exceeded() from None
+    _METRICS.observe("inference_gradcam" if explained else "inference", time.perf_counter() - start)
+    return _finish_inference(ctx, output, explained, size)
+
+
+def _tiled_entry(ctx):
+    """Analisis mode tile: probabilitas global + ringkasan & peta kelas per tile."""
+    model, class_names = _get_model_and_labels()
+    result = predict_tiled(model, ctx.bgr, DEFAULT_IMG_SIZE, class_names, TILE_SIZE, TILE_OVERLAP, TILE_MIN_FOLIAGE)
+    if result["probs"] is None:
+        return _analysis_entry(False, MSG_NO_LEAF)
+    entry = _analysis_entry(True, "Valid", result["probs"])
+    entry["tiles"] = {
+        "total": result["tiles_total"],
+        "classified": result["tiles_classified"],
+        "skipped": result["tiles_skipped"],
+        "tile_size": result["tile_size"],
+        "class_map": result["class_map"].tolist(),
+        "confidence_map": np.round(result["confidence_map"], 4).tolist(),
+        "total_ms": result["total_ms"],
+        "saved_ms_est": result["saved_ms_est"],
+    }
+    return entry
+
+
+def _heatmap_job(handle, ctx, filename, key, size):
+    """
+    Job latar belakang (mode GRADCAM_MODE=async): hitung heatmap pada resolusi `size` lalu simpan ke cache.
+    `handle` di-pin saat submit (lihat _submit_heatmap_job) agar swap model tidak menutup batcher-nya.
+    """
+    start = time.perf_counter()
+    with _METRICS.span("inference_gradcam"):
+        probs, heatmap_arr = _get_explain_batcher(size, handle).predict(ctx.model_input(size))
+    _observe_inference(size, start)
+    heatmap = _encode_heatmap(ctx, heatmap_arr)
+    if heatmap is None:
+        raise RuntimeError("Gagal membuat heatmap Grad-CAM.")
+    _CACHE.put(key, _analysis_entry(True, "Valid", probs, heatmap))
+    return _write_heatmap(heatmap, filename)
+
+
+def _submit_heatmap_job(ctx, filename, size=None):
+    """
+    Antrikan job heatmap pada resolusi request ini (`size`, default resolusi penuh), dengan
+    handle request ini di-pin sampai job selesai (atau di-drop).
+    """
+    handle = _get_handle()
+    size = tuple(size or DEFAULT_IMG_SIZE)
+    if _serving_target(size, handle)[0].explainer is None:  # varian tanpa Grad-CAM
+        size = tuple(DEFAULT_IMG_SIZE)
+    if not handle.acquire():
+        raise RuntimeError("Model sudah diganti, heatmap dilewati.")
+    key = _cache_key(ctx, with_heatmap=True, size=size)
+    return _get_heatmap_jobs().submit(partial(_heatmap_job, handle, ctx, filename, key, size),
+                                      cleanup=handle.release)
+
+
+def _get_heatmap_jobs():
+    global _HEATMAP_JOBS
+    if _HEATMAP_JOBS is None:
+        with _MODEL_LOCK:
+            if _HEATMAP_JOBS is None:
+                _HEATMAP_JOBS = JobQueue(
+                    workers=HEATMAP_WORKERS,
+                    max_queue=HEATMAP_QUEUE_SIZE,
+                    max_wait_s=HEATMAP_MAX_WAIT_S,
+                    name="heatmap",
+                )
+    return _HEATMAP_JOBS
+
+
+def _analyze_upload(ctx, with_heatmap=True, tta=TTA_VIEWS):
+    """Seperti _compute_analysis, tetapi lewat PredictionCache (hit / coalescing)."""
+    size = _select_resolution()
+    tta = clamp_views(tta, size)
+    try:
+        # Request duplikat yang menunggu hasil request lain tetap tunduk pada deadline-nya sendiri
+        return _CACHE.get_or_compute(_cache_key(ctx, with_heatmap, tta, size=size),
+                                     lambda: _compute_analysis(ctx, with_heatmap, tta, size),
+                                     timeout=_remaining_s())
+    except TimeoutError:
+        raise _deadline_exceeded() from None
+
+
+def _instrumented(endpoint):
+    """Span `<endpoint>_total` + outcome 'error' untuk exception yang lolos dari view."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            with _METRICS.span(f"{endpoint}_total"):
+                try:
+                    return view(*args, **kwargs)
+                except Exception:
+                    _REQUESTS.inc(endpoint=endpoint, outcome="error")
+                    raise
+        return wrapper
+    return decorator
+
+
+def _admin_token_valid():
+    return ADMIN_TOKEN is not None and hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN)
+
+
+def _profile_mode():
+    """None (tanpa profil), 'cprofile' atau 'tf' (cProfile + trace TensorFlow)."""
+    header = request.environ.get("HTTP_X_PROFILE")
+    # Header dari non-admin diabaikan (tetap ikut sampling): klien tidak boleh
+    # memicu profiling mahal maupun keluar dari sampel
+    if header is not None and _admin_token_valid():
+        if header.strip().lower() in ("", "0", "false", "no"):
+            return None
+        return "tf" if header.strip().lower() == "tf" else "cprofile"
+    if random.random() < PROFILE_SAMPLE_RATE:
+        return "tf" if PROFILE_TF_TRACE else "cprofile"
+    return None
+
+
+def _profiled(endpoint):
+    """
+    Profil request terpilih (header X-Profile: 1|tf dengan X-Admin-Token, atau
+    sampling PROFILE_SAMPLE_RATE) ke PROFILE_DIR; id dikirim di header X-Profile-Id.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Jalur normal: satu lookup dict, tanpa alokasi
+            if PROFILE_SAMPLE_RATE <= 0 and "HTTP_X_PROFILE" not in request.environ:
+                return view(*args, **kwargs)
+            mode = _profile_mode()
+            if mode is None:
+                return view(*args, **kwargs)
+            meta = {"path": request.path, "content_length": request.content_length, "mode": mode}
+            with RequestProfile(_PROFILES, endpoint, metrics=_METRICS, tf_trace=mode == "tf", meta=meta) as prof:
+                response = app.make_response(view(*args, **kwargs))
+                prof.meta["status"] = response.status_code
+            response.headers["X-Profile-Id"] = prof.profile_id
+            return response
+        return wrapper
+    return decorator
+
+
 @app.route("/", methods=["GET"])
 def index():
     # Filter hanya 5 kelas aktif
@@ -156,44 +774,58 @@ def index():
 
 
 @app.route("/predict", methods=["POST"])
+@_profiled("predict")
+@_instrumented("predict")
+@_admitted("predict")
 def predict():
     if "file" not in request.files:
+        _REQUESTS.inc(endpoint="predict", outcome="bad_request")
         flash("Tidak ada file yang diunggah.")
         return redirect(url_for("index"))
 
     file = request.files["file"]
 
     if file.filename == "":
+        _REQUESTS.inc(endpoint="predict", outcome="bad_request")
         flash("Tidak ada file yang dipilih.")
         return redirect(url_for("index"))
 
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-        file.save(filepath)
-        
-        # --- VALIDASI GAMBAR ---
-        is_valid, error_msg = validate_image(filepath)
-        if not is_valid:
-            # Hapus file jika tidak valid (hemat storage)
-            try:
-                os.remove(filepath)
-            except OSError:
-                pass
-            flash(error_msg)
-            return redirect(url_for("index"))
-        # -----------------------
+        # Nama unik (uuid) agar upload dengan nama file sama tidak saling menimpa
+        ext = file.filename.rsplit(".", 1)[1].lower()
+        filename = UploadStore.new_name(ext)
+
+        # Decode sekali di memori; validasi, inference & Grad-CAM memakai pixel yang sama
+        with _METRICS.span("upload_read"):
+            ctx = ImageContext(file.read())
 
+        # Mode async: halaman hasil dikirim dulu, heatmap menyusul dari worker pool
+        async_heatmap = GRADCAM_MODE == "async"
+
+        # --- VALIDASI + PREDIKSI + GRAD-CAM (lewat cache berbasis isi file) ---
         try:
-            model, class_names = _get_model_and_labels()
+            analysis = _analyze_upload(ctx, with_heatmap=not async_heatmap)
         except FileNotFoundError as exc:
+            _REQUESTS.inc(endpoint="predict", outcome="error")
             flash(str(exc))
             return redirect(url_for("index"))
 
-        pred_idx, conf, probs = predict_image(
-            model, filepath, target_size=DEFAULT_IMG_SIZE
-        )
-        predicted_class_en = class_names[int(pred_idx)]
+        if not analysis["valid"]:
+            # File tidak valid tidak pernah ditulis ke disk (hemat storage)
+            _REQUESTS.inc(endpoint="predict", outcome="rejected")
+            flash(analysis["message"])
+            return redirect(url_for("index"))
+        # -----------------------
+
+        # Simpan bytes asli hanya untuk ditampilkan di halaman hasil
+        with _METRICS.span("upload_save"):
+            _get_upload_store().put(filename, ctx.data)
+
+        _, class_names = _get_model_and_labels()
+        probs = np.asarray(analysis["probs"])
+        pred_idx = int(np.argmax(probs))
+        conf = float(probs[pred_idx])
+        predicted_class_en = class_names[pred_idx]
         predicted_class = translate_class_name(predicted_class_en)
         disease_info = get_disease_info(predicted_class_en)
 
@@ -209,59 +841,424 @@ def predict():
             for name, p in raw_results
         ]
 
-
-
-        # --- GRAD-CAM GENERATION ---
-        heatmap_filename = f"heatmap_{filename}"
-        heatmap_path = os.path.join(app.config["UPLOAD_FOLDER"], heatmap_filename)
-        
-        try:
-            # 1. Preprocess image for Grad-CAM
-            img = tf.keras.preprocessing.image.load_img(filepath, target_size=DEFAULT_IMG_SIZE)
-            img_array = tf.keras.preprocessing.image.img_to_array(img)
-            img_array = tf.expand_dims(img_array, 0)
-            
-            # 2. Get target layer (otomatis cari layer conv terakhir)
-            target_layer = find_target_layer(model)
-            
-            if target_layer:
-                # 3. Generate heatmap
-                heatmap = make_gradcam_heatmap(img_array, model, target_layer, pred_index=int(pred_idx))
-                
-                # 4. Save heatmap image
-                save_and_display_gradcam(filepath, heatmap, heatmap_path)
-                heatmap_url = url_for("static", filename=f"uploads/{heatmap_filename}")
-            else:
-                heatmap_url = None
-                print("[WARNING] Could not find target layer for Grad-CAM.")
-                
-        except Exception as e:
-            print(f"[ERROR] Error generating Grad-CAM: {e}")
-            heatmap_url = None
-        # ---------------------------
-
-        # ---------------------------
+        heatmap_url = None
+        heatmap_job_url = None
+        if not async_heatmap:
+            heatmap_url = _publish_heatmap(analysis["heatmap"], filename)
+        else:
+            # Heatmap memakai resolusi yang sama dengan prediksi request ini
+            size = analysis.get("resolution") or DEFAULT_IMG_SIZE
+            cached = _CACHE.get(_cache_key(ctx, with_heatmap=True, size=size))
+            if cached is not None and cached["heatmap"] is not None:
+                heatmap_url = _publish_heatmap(cached["heatmap"], filename)
+            elif _get_handle().explainer is not None:
+                job_id = _submit_heatmap_job(ctx, filename, size)
+                heatmap_job_url = url_for("heatmap_status", job_id=job_id)
 
         # Determine if healthy
         is_healthy = (predicted_class_en == "Tomato___healthy")
 
-        return render_template(
-            "result.html",
-            is_healthy=is_healthy,
-            image_path=url_for("static", filename=f"uploads/{filename}"),
-            heatmap_path=heatmap_url,
-            predicted_class=predicted_class,
-            confidence=f"{conf * 100:.2f}%",
-            class_probs=formatted_probs,
-            disease_description=disease_info["description"],
-            disease_treatment=disease_info["treatment"],
-            disease_prevention=disease_info.get("prevention"),
-            disease_journals=disease_info.get("journals"),
-        )
+        with _METRICS.span("render"):
+            html = render_template(
+                "result.html",
+                is_healthy=is_healthy,
+                image_path=_upload_url(filename),
+                heatmap_path=heatmap_url,
+                heatmap_job_url=heatmap_job_url,
+                predicted_class=predicted_class,
+                confidence=f"{conf * 100:.2f}%",
+                class_probs=formatted_probs,
+                disease_description=disease_info["description"],
+                disease_treatment=disease_info["treatment"],
+                disease_prevention=disease_info.get("prevention"),
+                disease_journals=disease_info.get("journals"),
+            )
+        _REQUESTS.inc(endpoint="predict", outcome="predicted")
+        response = make_response(html)
+        size = analysis.get("resolution") or DEFAULT_IMG_SIZE
+        response.headers["X-Input-Resolution"] = f"{size[0]}x{size[1]}"
+        return response
     else:
+        _REQUESTS.inc(endpoint="predict", outcome="bad_request")
         flash("Tipe file tidak didukung. Gunakan png/jpg/jpeg.")
         return redirect(url_for("index"))
 
 
+def _iter_api_uploads():
+    """
+    Kumpulkan (nama, bytes) dari request API: multipart `file`/`files`
+    (boleh berisi .zip) atau body mentah application/zip.
+    Bytes None berarti tipe file tidak didukung.
+    """
+    def from_zip(stream):
+        with zipfile.ZipFile(stream) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                name = info.filename
+                yield name, zf.read(info) if allowed_file(name) else None
+
+    if request.mimetype in ("application/zip", "application/x-zip-compressed"):
+        yield from from_zip(io.BytesIO(request.get_data()))
+        return
+
+    for f in request.files.getlist("files") + request.files.getlist("file"):
+        if not f.filename:
+            continue
+        if f.filename.lower().endswith(".zip"):
+            yield from from_zip(f.stream)
+        elif allowed_file(f.filename):
+            yield f.filename, f.read()
+        else:
+            yield f.filename, None
+
+
+_API_OUTCOMES = {"ok": "predicted", "rejected": "rejected", "error": "error"}
+
+
+def _observe_since(stage, start, _future=None):
+    _METRICS.observe(stage, time.perf_counter() - start)
+
+
+def _api_result(index, filename, entry, class_names):
+    """Satu baris hasil JSON (tanpa render HTML) dari entry analisis."""
+    if not entry["valid"]:
+        return {"index": index, "filename": filename, "status": "rejected", "error": entry["message"]}
+
+    probs = entry["probs"]
+    pred_idx = int(np.argmax(probs))
+    class_en = class_names[pred_idx]
+    heatmap_url = None
+    if entry["heatmap"] is not None:
+        heatmap_url = _publish_heatmap(entry["heatmap"], UploadStore.new_name())
+    return {
+        "index": index,
+        "filename": filename,
+        "status": "ok",
+        "class": class_en,
+        "class_name": translate_class_name(class_en),
+        "confidence": float(probs[pred_idx]),
+        "probabilities": {name: float(p) for name, p in zip(class_names, probs)},
+        "heatmap_url": heatmap_url,
+        **({"resolution": entry["resolution"]} if entry.get("resolution") else {}),
+        **({"tiles": entry["tiles"]} if entry.get("tiles") else {}),
+    }
+
+
+@app.route("/api/v1/predict", methods=["POST"])
+@_admitted("api")
+def api_predict():
+    """
+    Prediksi banyak gambar sekaligus. Hasil di-stream sebagai NDJSON: satu
+    baris per gambar, dikirim begitu gambar tersebut selesai diproses.
+    Query `?heatmap=1` untuk menyertakan URL heatmap Grad-CAM, `?tta=N`
+    untuk test-time augmentation dengan N view (1..8), `?tiled=1` untuk foto
+    tanaman utuh resolusi tinggi (klasifikasi per tile + peta kelas kasar).
+    """
+    try:
+        uploads = list(_iter_api_uploads())
+    except zipfile.BadZipFile:
+        return jsonify({"error": "File zip rusak atau tidak terbaca."}), 400
+    if not uploads:
+        return jsonify({"error": "Tidak ada file yang diunggah."}), 400
+
+    try:
+        _, class_names = _get_model_and_labels()
+    except FileNotFoundError as exc:
+        return jsonify({"error": str(exc)}), 503
+
+    try:
+        tta = clamp_views(request.args.get("tta", TTA_VIEWS), DEFAULT_IMG_SIZE)
+    except ValueError:
+        return jsonify({"error": "Parameter tta harus bilangan bulat (1..8)."}), 400
+
+    tiled = request.args.get("tiled", "").lower() in ("1", "true", "yes")
+    want_heatmap = request.args.get("heatmap", "").lower() in ("1", "true", "yes") and not tiled
+    # Resolusi dipilih sekali per request: semua gambar dalam satu batch memakai model yang sama
+    size = _select_resolution()
+    tta = clamp_views(tta, size)
+
+    def line(obj, outcome=None):
+        _REQUESTS.inc(endpoint="api", outcome=outcome or _API_OUTCOMES[obj["status"]])
+        return json.dumps(obj, ensure_ascii=False) + "\n"
+
+    def finished(done, pending):
+        for future in done:
+            index, filename, ctx, key, explained = pending.pop(future)
+            try:
+                output = future.result()
+            except Exception as e:
+                yield line({"index": index, "filename": filename, "status": "error", "error": str(e)})
+                continue
+            entry = _finish_inference(ctx, output, explained, size)
+            _CACHE.put(key, entry)
+            yield line(_api_result(index, filename, entry, class_names))
+
+    expired = [False]
+
+    def expire(pending):
+        """Deadline request lewat: gambar yang belum masuk batch dibatalkan dan dilaporkan."""
+        if not expired[0]:
+            expired[0] = True
+            _deadline_exceeded()
+        for future in [f for f in pending if f.cancel()]:
+            index, filename = pending.pop(future)[:2]
+            yield line({"index": index, "filename": filename, "status": "error", "error": MSG_DEADLINE},
+                       outcome="overloaded")
+
+    def collect(pending):
+        """Tunggu sampai minimal satu gambar selesai (paling lama sampai deadline)."""
+        done, _ = wait(list(pending), timeout=None if expired[0] else _remaining_s(),
+                       return_when=FIRST_COMPLETED)
+        yield from finished(done, pending)
+        if not done:
+            yield from expire(pending)
+
+    def generate():
+        pending = {}
+        for index, (filename, data) in enumerate(uploads):
+            if data is None:
+                yield line({"index": index, "filename": filename, "status": "rejected",
+                            "error": "Tipe file tidak didukung. Gunakan png/jpg/jpeg."}, outcome="bad_request")
+                continue
+            if expired[0] or _remaining_s() == 0.0:
+                yield from expire(pending)
+                yield line({"index": index, "filename": filename, "status": "error", "error": MSG_DEADLINE},
+                           outcome="overloaded")
+                continue
+
+            ctx = ImageContext(data)
+            key = _cache_key(ctx, want_heatmap, tta, tiled, size)
+            entry = _CACHE.get(key)
+            if entry is None:
+                # Mode tile: dominasi daun dicek per tile, bukan untuk seluruh foto
+                entry = _validated(ctx, min_plant_ratio=0.0 if tiled else None)
+                if entry is not None:
+                    _CACHE.put(key, entry)
+                elif tiled:
+                    with _METRICS.span("inference_tiled"):
+                        entry = _tiled_entry(ctx)
+                    _CACHE.put(key, entry)
+            if entry is not None:
+                yield line(_api_result(index, filename, entry, class_names))
+                continue
+
+            future, explained = _submit_inference(ctx, want_heatmap, tta, size)
+            future.add_done_callback(partial(_observe_since, "api_inference", time.perf_counter()))
+            # Pixel asli hanya disimpan bila masih dibutuhkan untuk overlay heatmap
+            pending[future] = (index, filename, ctx if explained else None, key, explained)
+
+            # Batasi gambar yang sedang diproses agar memori tidak meledak
+            if len(pending) >= API_MAX_IN_FLIGHT:
+                yield from collect(pending)
+            else:
+                done = [f for f in pending if f.done()]
+                yield from finished(done, pending)
+
+        while pending:
+            yield from collect(pending)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@app.route("/api/v1/heatmap/<job_id>", methods=["GET"])
+def heatmap_status(job_id):
+    """Polling status heatmap Grad-CAM asinkron."""
+    job = _HEATMAP_JOBS.status(job_id) if _HEATMAP_JOBS is not None else None
+    if job is None:
+        return jsonify({"status": "unknown", "error": "Job tidak ditemukan atau sudah kedaluwarsa."}), 404
+    body = {"status": job["status"], "heatmap_url": None, "error": job["error"]}
+    if job["status"] == "done":
+        body["heatmap_url"] = _upload_url(job["result"])
+    return jsonify(body)
+
+
+@app.route("/uploads/<name>", methods=["GET"])
+def uploaded_file(name):
+    """Upload & heatmap dari UploadStore (disk atau memori). Nama unik -> aman di-cache browser."""
+    store = _get_upload_store()
+    if not is_store_name(name) or not store.exists(name):
+        abort(404)
+    max_age = int(store.ttl_s)
+    if store.memory:
+        data = store.get(name)
+        if data is None:
+            abort(404)
+        mimetype = mimetypes.guess_type(name)[0] or "image/jpeg"
+        response = Response(data, mimetype=mimetype)
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        return response
+    return send_from_directory(store.root, name, max_age=max_age)
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Metrik format teks Prometheus: latency per stage (p50/p95/p99), outcome, waktu load model."""
+    startup = _STARTUP.snapshot()
+    phases = startup["phases_ms"]
+    gauges = [
+        ("model_ready", "1 jika model sudah dimuat dan di-warmup.", [({}, int(startup["ready"]))]),
+        ("model_load_seconds", "Total durasi fase load model (import, load, warmup).",
+         [({}, sum(phases.values()) / 1000.0)]),
+        ("startup_phase_seconds", "Durasi tiap fase startup/preload.",
+         [({"phase": name}, ms / 1000.0) for name, ms in sorted(phases.items())]),
+    ]
+    if _ADMISSION is not None:
+        gauges += [
+            ("admission_in_flight", "Request prediksi yang sedang memegang slot.", [({}, _ADMISSION.in_flight())]),
+            ("admission_queue_depth", "Request prediksi yang menunggu slot.", [({}, _ADMISSION.queue_depth())]),
+            ("admission_max_concurrent", "Batas slot paralel (ADMISSION_MAX_CONCURRENT).",
+             [({}, _ADMISSION.max_concurrent)]),
+        ]
+    if _HANDLE is not None:
+        gauges.append(("model_info", "Versi model yang sedang melayani request.",
+                       [({"version": _HANDLE.version}, 1)]))
+    if _RESOLUTION is not None:
+        current = _RESOLUTION.current
+        gauges.append(("input_resolution", "Sisi input model yang sedang dipilih controller resolusi adaptif.",
+                       [({}, current[0])]))
+    return Response(_METRICS.render(gauges), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/api/v1/stats", methods=["GET"])
+def stats():
+    """Statistik serving (queue depth, ukuran batch, latensi) untuk tuning."""
+    handle = _HANDLE
+    batcher = handle.batcher if handle is not None else None
+    explain_batcher = handle.explain_batcher if handle is not None else None
+    resolution = _RESOLUTION.stats() if _RESOLUTION is not None else None
+    if resolution is not None and handle is not None:
+        resolution["batchers"] = [b.stats() for variant in handle.variants.values()
+                                  for b in (variant.batcher, variant.explain_batcher) if b is not None]
+    return jsonify({
+        "model": handle.info() if handle is not None else None,
+        "batcher": batcher.stats() if batcher is not None else None,
+        "explain_batcher": explain_batcher.stats() if explain_batcher is not None else None,
+        "admission": _ADMISSION.stats() if _ADMISSION is not None else None,
+        "resolution": resolution,
+        "cache": _CACHE.stats(),
+        "heatmap_jobs": _HEATMAP_JOBS.stats() if _HEATMAP_JOBS is not None else None,
+        "uploads": _UPLOADS.stats() if _UPLOADS is not None else None,
+        "stages": _METRICS.stage_summary(),
+    })
+
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """Liveness: proses hidup dan bisa melayani request (tidak menunggu model)."""
+    return jsonify({"status": "ok"})
+
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """
+    Readiness: 200 hanya jika model sudah dimuat dan di-warmup. Bila belum
+    ada preload yang berjalan, probe pertama ikut memicu preload di background.
+    """
+    if not _STARTUP.ready:
+        _start_preload()
+    state = _STARTUP.snapshot()
+    # Kapabilitas model aktif (mis. artefak .pb: tanpa Grad-CAM), agar fitur yang hilang terlihat
+    state["capabilities"] = _HANDLE.capabilities() if _HANDLE is not None else None
+    return jsonify(state), 200 if state["ready"] else 503
+
+
+def _admin_only(fn):
+    """Endpoint admin hanya aktif bila ADMIN_TOKEN di-set; token dikirim lewat header X-Admin-Token."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if ADMIN_TOKEN is None:
+            return jsonify({"error": "Endpoint admin nonaktif (set ADMIN_TOKEN)."}), 403
+        if not _admin_token_valid():
+            return jsonify({"error": "Token admin tidak valid."}), 401
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def _models_status():
+    reload_state = None
+    if _RELOAD is not None:
+        reload_state = dict(_RELOAD.snapshot(), target=_RELOAD_TARGET)
+    return {
+        "active": _HANDLE.info() if _HANDLE is not None else None,
+        "registry": _REGISTRY.snapshot() if _REGISTRY is not None else None,
+        "reload": reload_state,
+    }
+
+
+def _reload_response(version, rollback=False):
+    """Mulai reload di background; `?wait=1` menunggu sampai versi baru aktif (atau gagal)."""
+    if not _start_reload(version, rollback):
+        return jsonify(dict(_models_status(), error="Reload lain masih berjalan.")), 409
+    if request.args.get("wait", "").lower() in ("1", "true", "yes"):
+        state = _RELOAD
+        state.wait()
+        if not state.ready:
+            return jsonify(_models_status()), 500
+        return jsonify(_models_status()), 200
+    return jsonify(_models_status()), 202
+
+
+@app.route("/admin/models", methods=["GET"])
+@_admin_only
+def admin_models():
+    """Versi aktif, isi registry, dan status reload terakhir."""
+    return jsonify(_models_status())
+
+
+@app.route("/admin/models/reload", methods=["POST"])
+@_admin_only
+def admin_reload_model():
+    """
+    Muat + warmup versi model di background lalu swap tanpa downtime.
+    `version` (query/form/JSON) kosong = versi aktif/terbaru di registry
+    (tanpa registry: muat ulang MODEL_PATH).
+    """
+    body = request.get_json(silent=True) or {}
+    version = request.values.get("version") or body.get("version")
+    if version is not None:
+        if _REGISTRY is None:
+            return jsonify({"error": "MODEL_REGISTRY_DIR tidak di-set."}), 400
+        try:
+            _REGISTRY.resolve(version)
+        except FileNotFoundError as exc:
+            return jsonify({"error": str(exc)}), 404
+    return _reload_response(version)
+
+
+@app.route("/admin/models/rollback", methods=["POST"])
+@_admin_only
+def admin_rollback_model():
+    """Kembali ke versi aktif sebelumnya (history di registry)."""
+    if _REGISTRY is None:
+        return jsonify({"error": "MODEL_REGISTRY_DIR tidak di-set."}), 400
+    try:
+        version = _REGISTRY.previous()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 409
+    return _reload_response(version, rollback=True)
+
+
+@app.route("/admin/profiles", methods=["GET"])
+@_admin_only
+def admin_profiles():
+    """Daftar profil request (terbaru dulu) beserta breakdown timing-nya."""
+    return jsonify({"dir": _PROFILES.root, "profiles": _PROFILES.list()})
+
+
+@app.route("/admin/profiles/<profile_id>/<name>", methods=["GET"])
+@_admin_only
+def admin_profile_file(profile_id, name):
+    """Unduh profile.pstats / summary.txt / timing.json dari satu profil."""
+    if name not in (PROFILE_FILE, SUMMARY_FILE, TIMING_FILE) or _PROFILES.path(profile_id, name) is None:
+        abort(404)
+    return send_from_directory(_PROFILES.path(profile_id), name, as_attachment=name == PROFILE_FILE)
+
+
+if PRELOAD_MODEL:
+    _start_preload()
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1 @@
+# Benchmark & tool pengukuran performa TomatoCare AI
@@ -0,0 +1,90 @@
+"""
+Benchmark overlay Grad-CAM: pipeline lama (colormap float64 di resolusi
+penuh + cv2.imwrite ke disk) vs encode_overlay (LUT uint8, blend di
+resolusi tampilan, encode langsung ke buffer memori).
+
+    python -m benchmarks.bench_overlay                       # foto 12 MP (4032x3024)
+    python -m benchmarks.bench_overlay --max_side 1280 --format webp
+"""
+import argparse
+import json
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+from src.config import HEATMAP_MAX_SIDE, HEATMAP_QUALITY
+from src.explain import encode_overlay
+from benchmarks.common import time_fn
+
+
+def legacy_save_and_display_gradcam(img, heatmap, cam_path, alpha=0.4):
+    """Salinan save_and_display_gradcam sebelum LUT (matplotlib >= 3.9 tidak punya cm.get_cmap lagi)."""
+    import matplotlib
+
+    heatmap = np.uint8(255 * heatmap)
+    jet_colors = matplotlib.colormaps["jet"](np.arange(256))[:, :3]
+    jet_heatmap = jet_colors[heatmap]
+    jet_heatmap = cv2.resize(jet_heatmap, (img.shape[1], img.shape[0]))
+    jet_heatmap = np.uint8(255 * jet_heatmap)
+    jet_heatmap = cv2.cvtColor(jet_heatmap, cv2.COLOR_RGB2BGR)
+    superimposed_img = np.clip(jet_heatmap * alpha + img, 0, 255).astype('uint8')
+    cv2.imwrite(cam_path, superimposed_img)
+    return cam_path
+
+
+def run(img: np.ndarray, heatmap: np.ndarray, max_side: int = HEATMAP_MAX_SIDE, fmt: str = "jpeg",
+        quality: int = HEATMAP_QUALITY, repeats: int = 10) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        cam_path = os.path.join(tmp, "cam.jpg")
+        legacy = time_fn(lambda: legacy_save_and_display_gradcam(img, heatmap, cam_path), repeats, warmup=1)
+        legacy_bytes = os.path.getsize(cam_path)
+    encoded = encode_overlay(img, heatmap, max_side=max_side, fmt=fmt, quality=quality)
+    lut = time_fn(lambda: encode_overlay(img, heatmap, max_side=max_side, fmt=fmt, quality=quality),
+                  repeats, warmup=1)
+    full = time_fn(lambda: encode_overlay(img, heatmap, max_side=None, fmt=fmt, quality=quality),
+                   repeats, warmup=1)
+    return {
+        "image": f"{img.shape[1]}x{img.shape[0]}",
+        "heatmap": f"{heatmap.shape[1]}x{heatmap.shape[0]}",
+        "format": fmt,
+        "max_side": max_side,
+        "legacy_float_imwrite": legacy,
+        "lut_full_res": full,
+        "lut_display_res": lut,
+        "legacy_bytes": legacy_bytes,
+        "lut_bytes": len(encoded),
+        "speedup_p50": legacy["p50_ms"] / lut["p50_ms"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--image', type=str, default=None, help='Foto (default: sintetis 4032x3024)')
+    parser.add_argument('--heatmap_size', type=int, default=6, help='Sisi heatmap Grad-CAM (DenseNet121 @192: 6)')
+    parser.add_argument('--max_side', type=int, default=HEATMAP_MAX_SIDE)
+    parser.add_argument('--format', type=str, default='jpeg', choices=['jpeg', 'webp'])
+    parser.add_argument('--quality', type=int, default=HEATMAP_QUALITY)
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--output', type=str, default=None, help='Simpan hasil sebagai JSON')
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(0)
+    img = cv2.imread(args.image) if args.image else rng.randint(0, 256, (3024, 4032, 3), dtype=np.uint8)
+    heatmap = rng.rand(args.heatmap_size, args.heatmap_size).astype(np.float32)
+
+    r = run(img, heatmap, args.max_side, args.format, args.quality, args.repeats)
+
+    print(f"Image {r['image']}, heatmap {r['heatmap']}, {r['format']} @ max_side {r['max_side']}")
+    for name in ("legacy_float_imwrite", "lut_full_res", "lut_display_res"):
+        print(f"{name:<22} p50 {r[name]['p50_ms']:>8.1f} ms   p95 {r[name]['p95_ms']:>8.1f} ms")
+    print(f"Output: legacy {r['legacy_bytes'] / 1024:.0f} KiB -> {r['lut_bytes'] / 1024:.0f} KiB, "
+          f"speedup {r['speedup_p50']:.1f}x")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(r, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Benchmark serving prefork: throughput dan memori total vs jumlah worker.
+
+Untuk setiap jumlah worker, `python -m src.serve` dijalankan sebagai
+subprocess, lalu beberapa thread klien mengirim gambar (berbeda-beda, cache
+dimatikan) ke /api/v1/predict selama `--duration` detik. Memori dilaporkan
+sebagai jumlah RSS dan PSS (Proportional Set Size: halaman yang di-share
+copy-on-write dihitung proporsional) dari master + semua worker.
+
+    python -m benchmarks.bench_prefork --workers 1 2 4
+    python -m benchmarks.bench_prefork --model_path models/densenet121_best_int8.tflite
+"""
+import os
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+
+import cv2
+import numpy as np
+
+from src.config import DEFAULT_IMG_SIZE, LABEL_MAP_PATH
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def leaf_jpegs(count: int, size: int = 256):
+    """Gambar daun sintetis yang lolos validasi, semuanya berbeda (tidak kena cache)."""
+    images = []
+    for i in range(count):
+        rng = np.random.RandomState(i)
+        hsv = np.empty((size, size, 3), dtype=np.uint8)
+        hsv[..., 0] = rng.randint(35, 70, (size, size))
+        hsv[..., 1] = rng.randint(120, 220, (size, size))
+        hsv[..., 2] = rng.randint(60, 200, (size, size))
+        images.append(cv2.imencode('.jpg', cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR))[1].tobytes())
+    return images
+
+
+def process_memory_mb(pid: int) -> dict:
+    """RSS & PSS (MB) satu proses dari /proc/<pid>/smaps_rollup."""
+    out = {"rss": 0.0, "pss": 0.0}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key = line.split(":")[0]
+            if key in ("Rss", "Pss"):
+                out[key.lower()] = int(line.split()[1]) / 1024.0
+    return out
+
+
+def tree_memory_mb(master_pid: int) -> dict:
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+        pids = [master_pid] + [int(p) for p in f.read().split()]
+    total = {"rss": 0.0, "pss": 0.0, "processes": len(pids)}
+    for pid in pids:
+        mem = process_memory_mb(pid)
+        total["rss"] += mem["rss"]
+        total["pss"] += mem["pss"]
+    return total
+
+
+def _multipart(data: bytes):
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"files\"; filename=\"leaf.jpg\"\r\n"
+            f"Content-Type: image/jpeg\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def load(url: str, images, concurrency: int, duration: float) -> dict:
+    """Kirim request terus-menerus dari `concurrency` thread; return throughput & latensi."""
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    counter = iter(range(10 ** 9))
+
+    def client():
+        while time.monotonic() < deadline:
+            with lock:
+                i = next(counter)
+            body, ctype = _multipart(images[i % len(images)])
+            req = urllib.request.Request(url, data=body, headers={"Content-Type": ctype})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=60) as resp:
+                    ok = b'"status": "ok"' in resp.read()
+            except Exception:  # noqa: BLE001 - dihitung sebagai error
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000.0
+            with lock:
+                (latencies if ok else errors).append(elapsed)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.monotonic() - start
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "throughput_rps": len(latencies) / wall,
+        "latency_ms_p50": float(np.percentile(latencies, 50)) if latencies else None,
+        "latency_ms_p95": float(np.percentile(latencies, 95)) if latencies else None,
+    }
+
+
+def start_server(workers: int, threads: int, port: int, model_path: str, timeout: float = 600.0):
+    env = dict(os.environ, MODEL_PATH=model_path, CACHE_MAX_ENTRIES="0", CACHE_DIR="", UPLOAD_STORE="memory")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "src.serve", "--workers", str(workers), "--threads", str(threads),
+         "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    ready = 0
+    deadline = time.monotonic() + timeout
+    for line in proc.stdout:
+        if "[SERVE] worker" in line and "siap" in line:
+            ready += 1
+            if ready == workers:
+                break
+        if "gagal start" in line or time.monotonic() > deadline:
+            proc.kill()
+            raise RuntimeError(f"Server failed to start: {line.strip()}")
+    # Kosongkan pipe di background agar server tidak blok saat menulis log
+    threading.Thread(target=lambda: [None for _ in proc.stdout], daemon=True).start()
+    return proc
+
+
+def standin_model_path(img_size=DEFAULT_IMG_SIZE) -> str:
+    from benchmarks.common import build_standin_model
+
+    with open(LABEL_MAP_PATH, encoding='utf-8') as f:
+        num_classes = len(json.load(f))
+    path = os.path.join(tempfile.mkdtemp(), "standin_densenet121.keras")
+    build_standin_model(img_size, num_classes).save(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model_path', type=str, default=None, help='Default: stand-in DenseNet121 (tanpa bobot)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=1, help='Thread per worker')
+    parser.add_argument('--concurrency', type=int, default=None, help='Default: 2 x workers')
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--output', type=str, default=None)
+    args = parser.parse_args()
+
+    model_path = args.model_path or standin_model_path()
+    images = leaf_jpegs(64)
+    url = f"http://127.0.0.1:{args.port}/api/v1/predict"
+
+    results = []
+    for n in args.workers:
+        proc = start_server(n, args.threads, args.port, model_path)
+        try:
+            load(url, images, concurrency=n, duration=2.0)  # pemanasan koneksi/batcher
+            r = load(url, images, args.concurrency or 2 * n, args.duration)
+            r.update(workers=n, threads=args.threads, memory_mb=tree_memory_mb(proc.pid))
+            results.append(r)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    print(f"\n{'workers':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'RSS MB':>9} {'PSS MB':>9}")
+    for r in results:
+        mem = r["memory_mb"]
+        print(f"{r['workers']:>7} {r['throughput_rps']:>8.2f} {r['latency_ms_p50'] or 0:>8.1f} "
+              f"{r['latency_ms_p95'] or 0:>8.1f} {mem['rss']:>9.0f} {mem['pss']:>9.0f}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark validasi upload: validate_image asli (resolusi penuh) vs quality_gate.
+
+    python -m benchmarks.bench_quality                     # foto sintetis 12 MP
+    python -m benchmarks.bench_quality --image_dir data/val --max_images 200
+
+Selain latensi, dilaporkan agreement verdict + pesan antara kedua versi.
+"""
+import argparse
+import glob
+import os
+
+import cv2
+import numpy as np
+
+from src.config import ALLOWED_EXTENSIONS, QUALITY_MAX_SIDE
+from src.preprocess import ImageContext
+from src.quality import quality_gate, validate_image_full
+from benchmarks.common import time_fn
+
+
+def synthetic_photos(size=(3024, 4032), count: int = 4):
+    """Foto 'daun' bertekstur (hijau & coklat) berukuran kamera HP, ter-encode JPEG."""
+    photos = []
+    for i in range(count):
+        rng = np.random.RandomState(i)
+        hue = (35, 70) if i % 2 == 0 else (10, 25)
+        hsv = np.empty(size + (3,), dtype=np.uint8)
+        hsv[..., 0] = rng.randint(hue[0], hue[1], size)
+        hsv[..., 1] = rng.randint(120, 220, size)
+        hsv[..., 2] = rng.randint(60, 200, size)
+        ok, buf = cv2.imencode('.jpg', cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR))
+        photos.append(buf.tobytes())
+    return photos
+
+
+def run(photos, repeats: int = 5, max_side: int = QUALITY_MAX_SIDE) -> dict:
+    # Decode di luar pengukuran: yang dibandingkan hanya biaya validasi
+    contexts = [ImageContext(data) for data in photos]
+    for ctx in contexts:
+        ctx.bgr
+
+    def full():
+        for ctx in contexts:
+            ctx._cache.clear()  # HSV/gray ikut dihitung seperti pada request baru
+            validate_image_full(ctx)
+
+    def gate():
+        for ctx in contexts:
+            quality_gate(ctx, max_side=max_side)
+
+    agree = sum(validate_image_full(ctx) == quality_gate(ctx, max_side) for ctx in contexts)
+    n = len(contexts)
+    full_stats = time_fn(full, repeats, warmup=1)
+    gate_stats = time_fn(gate, repeats, warmup=1)
+    return {
+        "num_images": n,
+        "agreement": agree / n,
+        "full_ms_per_image": full_stats["p50_ms"] / n,
+        "gate_ms_per_image": gate_stats["p50_ms"] / n,
+        "speedup": full_stats["p50_ms"] / gate_stats["p50_ms"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--image_dir', type=str, default=None)
+    parser.add_argument('--max_images', type=int, default=100)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--max_side', type=int, default=QUALITY_MAX_SIDE)
+    args = parser.parse_args()
+
+    if args.image_dir:
+        photos = []
+        paths = sorted(p for p in glob.glob(os.path.join(args.image_dir, '**', '*'), recursive=True)
+                       if p.rsplit('.', 1)[-1].lower() in ALLOWED_EXTENSIONS)
+        for path in paths[:args.max_images]:
+            with open(path, 'rb') as f:
+                photos.append(f.read())
+    else:
+        photos = synthetic_photos()
+
+    r = run(photos, args.repeats, args.max_side)
+    print(f"images: {r['num_images']}  agreement: {r['agreement'] * 100:.1f}%")
+    print(f"validate_image (full): {r['full_ms_per_image']:.1f} ms/img")
+    print(f"quality_gate:          {r['gate_ms_per_image']:.1f} ms/img  ({r['speedup']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
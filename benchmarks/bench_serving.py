@@ -0,0 +1,63 @@
+"""
+Micro-benchmark: `model.predict` vs ServingModel (tf.function dengan signature tetap).
+
+    python -m benchmarks.bench_serving                     # stand-in DenseNet121 (offline)
+    python -m benchmarks.bench_serving --model_path models/densenet121_best.keras
+"""
+import argparse
+import json
+
+import numpy as np
+
+from src.config import DEFAULT_IMG_SIZE
+from benchmarks.common import build_standin_model, time_fn
+
+
+def run(model, batch_sizes=(1, 4, 8), repeats: int = 20) -> dict:
+    from src.inference import ServingModel
+
+    serving = ServingModel(model)
+    warmup_ms = serving.warmup(batch_sizes)
+
+    results = {"warmup_ms": warmup_ms, "batches": {}}
+    for n in batch_sizes:
+        x = np.random.RandomState(n).rand(n, *serving.input_shape[1:]).astype(np.float32) * 255
+        np.testing.assert_allclose(serving.predict(x), model.predict(x, verbose=0), atol=1e-4)
+        keras_stats = time_fn(lambda: model.predict(x, verbose=0), repeats)
+        traced_stats = time_fn(lambda: serving.predict(x), repeats)
+        results["batches"][n] = {
+            "model_predict": keras_stats,
+            "traced": traced_stats,
+            "speedup_p50": keras_stats["p50_ms"] / traced_stats["p50_ms"],
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model_path', type=str, default=None)
+    parser.add_argument('--img_size', type=int, nargs=2, default=DEFAULT_IMG_SIZE)
+    parser.add_argument('--batch_sizes', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--output', type=str, default=None, help='Simpan hasil sebagai JSON')
+    args = parser.parse_args()
+
+    if args.model_path:
+        import tensorflow as tf
+        model = tf.keras.models.load_model(args.model_path)
+    else:
+        model = build_standin_model(tuple(args.img_size))
+
+    results = run(model, tuple(args.batch_sizes), args.repeats)
+
+    print(f"{'batch':>5} {'predict p50':>12} {'traced p50':>11} {'speedup':>8}")
+    for n, r in results["batches"].items():
+        print(f"{n:>5} {r['model_predict']['p50_ms']:>10.2f}ms {r['traced']['p50_ms']:>9.2f}ms "
+              f"{r['speedup_p50']:>7.2f}x")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark mode tile pada foto lapangan sintetis (default 4000x3000).
+
+Dibandingkan: resize penuh ke input model (mode biasa), semua tile tanpa
+skip, dan tile dengan skip tile tanpa daun. Dilaporkan jumlah tile yang
+dilewati serta waktu yang dihemat (terukur dan estimasi dari predict_tiled).
+
+    python -m benchmarks.bench_tiling
+    python -m benchmarks.bench_tiling --model_path models/densenet121_best.keras --tile_size 1024
+"""
+import argparse
+import json
+
+import cv2
+import numpy as np
+
+from src.config import DEFAULT_IMG_SIZE
+from benchmarks.common import build_standin_model, time_fn
+
+
+def field_photo(width: int = 4000, height: int = 3000, leaf_fraction: float = 0.4, seed: int = 0) -> np.ndarray:
+    """Foto tanaman sintetis: elips daun bertekstur di atas background abu-abu, beberapa lesi coklat."""
+    rng = np.random.RandomState(seed)
+    img = rng.randint(90, 150, (height, width, 1), dtype=np.uint8).repeat(3, axis=2)
+    mask = np.zeros((height, width), dtype=np.uint8)
+    target = leaf_fraction * width * height
+    while mask.sum() / 255 < target:
+        center = (int(rng.randint(0, width)), int(rng.randint(0, height)))
+        axes = (int(rng.randint(150, 450)), int(rng.randint(80, 250)))
+        cv2.ellipse(mask, center, axes, float(rng.randint(0, 180)), 0, 360, 255, -1)
+    leaf = np.empty_like(img)
+    leaf[..., 0] = rng.randint(20, 70, (height, width))
+    leaf[..., 1] = rng.randint(120, 200, (height, width))
+    leaf[..., 2] = rng.randint(30, 90, (height, width))
+    img[mask > 0] = leaf[mask > 0]
+    ys, xs = np.nonzero(mask[::50, ::50])
+    for i in rng.choice(len(ys), size=min(5, len(ys)), replace=False):
+        cv2.circle(img, (int(xs[i]) * 50, int(ys[i]) * 50), 25, (30, 80, 150), -1)
+    return img
+
+
+def run(model, img: np.ndarray, img_size=DEFAULT_IMG_SIZE, tile_size: int = 768, overlap: float = 0.25,
+        repeats: int = 3) -> dict:
+    from src.inference import ServingModel
+    from src.preprocess import preprocess_image_bgr
+    from src.tiling import predict_tiled
+
+    serving = ServingModel(model)
+    serving.warmup((1, 8, 32))
+
+    def full():
+        return serving.predict(preprocess_image_bgr(img, target_size=img_size)[None])
+
+    last = {}
+
+    def tiled(min_foliage):
+        def fn():
+            last[min_foliage] = predict_tiled(serving, img, img_size, tile_size=tile_size, overlap=overlap,
+                                              min_foliage=min_foliage)
+        return fn
+
+    results = {
+        "image": f"{img.shape[1]}x{img.shape[0]}",
+        "full_resize": time_fn(full, repeats, warmup=1),
+        "tiled_all": time_fn(tiled(0.0), repeats, warmup=1),
+        "tiled_skip": time_fn(tiled(0.2), repeats, warmup=1),
+    }
+    skip = last[0.2]
+    results.update(
+        tiles_total=skip["tiles_total"],
+        tiles_skipped=skip["tiles_skipped"],
+        saved_ms_measured=results["tiled_all"]["p50_ms"] - results["tiled_skip"]["p50_ms"],
+        saved_ms_est=skip["saved_ms_est"],
+        mask_ms=skip["mask_ms"],
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model_path', type=str, default=None)
+    parser.add_argument('--img_size', type=int, nargs=2, default=DEFAULT_IMG_SIZE)
+    parser.add_argument('--image', type=str, default=None, help='Foto lapangan (default: sintetis 4000x3000)')
+    parser.add_argument('--tile_size', type=int, default=768)
+    parser.add_argument('--overlap', type=float, default=0.25)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', type=str, default=None, help='Simpan hasil sebagai JSON')
+    args = parser.parse_args()
+
+    if args.model_path:
+        import tensorflow as tf
+        model = tf.keras.models.load_model(args.model_path)
+    else:
+        model = build_standin_model(tuple(args.img_size))
+    img = cv2.imread(args.image) if args.image else field_photo()
+
+    r = run(model, img, tuple(args.img_size), args.tile_size, args.overlap, args.repeats)
+
+    print(f"Image {r['image']}, {r['tiles_total']} tiles, {r['tiles_skipped']} skipped "
+          f"(mask {r['mask_ms']:.1f} ms)")
+    for name in ("full_resize", "tiled_all", "tiled_skip"):
+        print(f"{name:<12} p50 {r[name]['p50_ms']:>9.1f} ms")
+    print(f"Saved by skipping: {r['saved_ms_measured']:.1f} ms measured, {r['saved_ms_est']:.1f} ms estimated")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(r, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark TTA: K view dalam satu batch vs K panggilan berurutan.
+
+Per jumlah view dilaporkan latensi total (p50) dan latensi per view, untuk
+satu forward pass batched (predict_tta) dan K forward pass batch-1.
+
+    python -m benchmarks.bench_tta                         # stand-in DenseNet121 (offline)
+    python -m benchmarks.bench_tta --model_path models/densenet121_best.keras --views 1 4 8
+"""
+import argparse
+import json
+
+import numpy as np
+
+from src.config import DEFAULT_IMG_SIZE
+from benchmarks.common import build_standin_model, time_fn
+
+
+def run(model, views=(1, 2, 4, 8), repeats: int = 20) -> dict:
+    from src.inference import ServingModel
+    from src.tta import predict_tta, tta_views
+
+    serving = ServingModel(model)
+    serving.warmup(tuple(sorted(set(views) | {1})))
+    img = np.random.RandomState(0).rand(*serving.input_shape[1:]).astype(np.float32) * 255
+
+    results = {}
+    for k in views:
+        batch = tta_views(img, k)
+
+        def sequential():
+            return np.mean([serving.predict(v[None])[0] for v in batch], axis=0)
+
+        np.testing.assert_allclose(predict_tta(serving, img, k), sequential(), atol=1e-5)
+        batched_stats = time_fn(lambda: predict_tta(serving, img, k), repeats)
+        sequential_stats = time_fn(sequential, repeats)
+        results[k] = {
+            "batched": batched_stats,
+            "sequential": sequential_stats,
+            "batched_per_view_ms": batched_stats["p50_ms"] / k,
+            "sequential_per_view_ms": sequential_stats["p50_ms"] / k,
+            "speedup_p50": sequential_stats["p50_ms"] / batched_stats["p50_ms"],
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model_path', type=str, default=None)
+    parser.add_argument('--img_size', type=int, nargs=2, default=DEFAULT_IMG_SIZE)
+    parser.add_argument('--views', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--output', type=str, default=None, help='Simpan hasil sebagai JSON')
+    args = parser.parse_args()
+
+    if args.model_path:
+        import tensorflow as tf
+        model = tf.keras.models.load_model(args.model_path)
+    else:
+        model = build_standin_model(tuple(args.img_size))
+
+    results = run(model, tuple(args.views), args.repeats)
+
+    print(f"{'views':>5} {'batched p50':>12} {'per view':>9} {'sequential p50':>15} {'per view':>9} {'speedup':>8}")
+    for k, r in results.items():
+        print(f"{k:>5} {r['batched']['p50_ms']:>10.2f}ms {r['batched_per_view_ms']:>7.2f}ms "
+              f"{r['sequential']['p50_ms']:>13.2f}ms {r['sequential_per_view_ms']:>7.2f}ms {r['speedup_p50']:>7.2f}x")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Utilitas bersama untuk benchmark (stand-in model, timing)."""
+from src.metrics import time_fn  # noqa: F401 (re-export untuk benchmark)
+
+
+def build_standin_model(img_size=(192, 192), num_classes: int = 5, backbone: str = "densenet121"):
+    """
+    Model pengganti dengan struktur yang sama seperti build_model_improved
+    (augmentasi -> base model nested -> GAP -> Dropout -> Dense), tanpa bobot
+    ImageNet sehingga bisa jalan offline. `backbone="tiny"`: base conv kecil
+    untuk micro-benchmark yang cepat.
+    """
+    import tensorflow as tf
+    from tensorflow.keras import layers, models
+
+    shape = (img_size[0], img_size[1], 3)
+    if backbone == "densenet121":
+        base_model = tf.keras.applications.DenseNet121(include_top=False, weights=None, input_shape=shape)
+    elif backbone == "tiny":
+        # Base kecil (beberapa conv ber-stride) dengan layer terakhir bernama 'relu' seperti DenseNet121
+        base_in = layers.Input(shape=shape)
+        x = base_in
+        for filters in (16, 32, 64):
+            x = layers.Conv2D(filters, 3, strides=2, padding='same', activation='relu')(x)
+        x = layers.Conv2D(128, 3, strides=2, padding='same')(x)
+        x = layers.Activation('relu', name='relu')(x)
+        base_model = models.Model(base_in, x, name='tiny_base')
+    else:
+        raise ValueError(f"Unknown backbone: {backbone}")
+
+    inputs = layers.Input(shape=shape)
+    x = layers.RandomFlip('horizontal_and_vertical')(inputs)
+    x = layers.RandomRotation(0.25)(x)
+    x = layers.RandomZoom(0.2)(x)
+    x = layers.RandomTranslation(0.1, 0.1)(x)
+    x = layers.RandomBrightness(0.2)(x)
+    x = layers.RandomContrast(0.4)(x)
+    x = base_model(x, training=False)
+    x = layers.GlobalAveragePooling2D()(x)
+    x = layers.Dropout(0.3)(x)
+    outputs = layers.Dense(num_classes, activation='softmax')(x)
+    return models.Model(inputs, outputs)
@@ -0,0 +1,453 @@
+"""
+Load test lokal untuk web service, reproducible (seed tetap).
+
+Gambar daun sintetis (hijau bertekstur, sebagian dengan lesi coklat) yang
+lolos validate_image dibuat di beberapa resolusi, ditambah gambar yang
+pasti ditolak validasi (gelap / coretan biru). Request dikirim oleh
+`--concurrency` klien closed-loop ke app in-process (Flask test client,
+default) atau ke server di `--url`. Setiap request diberi komentar JPEG
+unik sehingga cache hasil tidak pernah kena.
+
+Jenis request (`--mix`):
+  predict  POST /api/v1/predict            validasi + inference
+  gradcam  POST /api/v1/predict?heatmap=1  + Grad-CAM & encode overlay
+  reject   POST /api/v1/predict            gambar yang ditolak validasi
+Dengan `--endpoint web` semua request dikirim ke /predict (halaman HTML;
+Grad-CAM mengikuti GRADCAM_MODE server), jenis 'gradcam' tidak dipakai.
+
+Dilaporkan throughput & latensi p50/p95/p99 per level concurrency, per
+jenis request dan per resolusi; 429/503 dihitung sebagai 'shed'. Hasil
+disimpan sebagai JSON baseline dan bisa dibandingkan dengan run berikutnya:
+
+    python -m benchmarks.loadtest --output results/loadtest_baseline.json
+    python -m benchmarks.loadtest --concurrency 1 4 8 --duration 30 --resolutions 640x480 4032x3024
+    python -m benchmarks.loadtest --url http://127.0.0.1:5000 --baseline results/loadtest_baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import struct
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+KINDS = ("predict", "gradcam", "reject")
+DEFAULT_MIX = "predict=0.6,gradcam=0.3,reject=0.1"
+DEFAULT_RESOLUTIONS = ("640x480", "1600x1200", "4032x3024")
+QUANTILES = (50, 95, 99)
+SHED_STATUSES = (429, 503)
+
+
+# --- Gambar sintetis ---------------------------------------------------------
+def synthetic_leaf(width: int, height: int, seed: int = 0, diseased: bool = False) -> np.ndarray:
+    """Daun hijau bertekstur (variasi lembut + noise + tulang daun), opsional dengan lesi coklat."""
+    rng = np.random.RandomState(seed)
+    # Variasi warna frekuensi rendah (dibuat kecil lalu di-resize) + noise piksel agar tidak "buram"
+    low = cv2.resize(rng.rand(8, 8).astype(np.float32), (width, height), interpolation=cv2.INTER_CUBIC)
+    hsv = np.empty((height, width, 3), dtype=np.uint8)
+    hsv[..., 0] = np.clip(40 + 15 * low + rng.randint(-3, 4, (height, width)), 30, 85)
+    hsv[..., 1] = rng.randint(120, 210, (height, width))
+    hsv[..., 2] = np.clip(90 + 80 * low + rng.randint(-25, 26, (height, width)), 50, 210)
+    img = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+
+    thickness = max(1, min(width, height) // 200)
+    cv2.line(img, (0, height // 2), (width, height // 2), (120, 200, 160), thickness * 2)
+    for i in range(1, 8):
+        x = width * i // 8
+        cv2.line(img, (x, height // 2), (x + width // 10, 0), (110, 190, 150), thickness)
+        cv2.line(img, (x, height // 2), (x + width // 10, height), (110, 190, 150), thickness)
+
+    if diseased:
+        for _ in range(6):
+            center = (int(rng.randint(0, width)), int(rng.randint(0, height)))
+            radius = int(rng.randint(min(width, height) // 40 + 1, min(width, height) // 15 + 2))
+            cv2.circle(img, center, radius, (30, 70, 140), -1)
+            cv2.circle(img, center, radius, (20, 50, 90), thickness)
+    return img
+
+
+def synthetic_reject(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """Gambar yang ditolak validasi: foto terlalu gelap, atau coretan biru di kertas."""
+    rng = np.random.RandomState(seed)
+    if seed % 2 == 0:
+        return rng.randint(0, 25, (height, width, 3), dtype=np.uint8)
+    img = np.full((height, width, 3), 235, dtype=np.uint8)
+    img += rng.randint(0, 15, (height, width, 3), dtype=np.uint8)
+    for _ in range(40):
+        pts = rng.randint(0, [width, height], (2, 2))
+        cv2.line(img, tuple(map(int, pts[0])), tuple(map(int, pts[1])), (200, 60, 20),
+                 max(2, min(width, height) // 30))
+    return img
+
+
+def parse_resolution(text: str):
+    width, height = (int(v) for v in text.lower().split("x"))
+    return width, height
+
+
+def build_pool(resolutions, per_kind: int = 4, seed: int = 0, quality: int = 90) -> dict:
+    """{(kind, 'WxH'): [bytes JPEG, ...]}; 'predict' & 'gradcam' memakai pool daun yang sama."""
+    pool = {}
+    for res in resolutions:
+        width, height = parse_resolution(res)
+        leaves, rejects = [], []
+        for i in range(per_kind):
+            leaf = synthetic_leaf(width, height, seed + i, diseased=i % 2 == 1)
+            leaves.append(cv2.imencode(".jpg", leaf, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes())
+            reject = synthetic_reject(width, height, seed + i)
+            rejects.append(cv2.imencode(".jpg", reject, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes())
+        pool[("predict", res)] = pool[("gradcam", res)] = leaves
+        pool[("reject", res)] = rejects
+    return pool
+
+
+def unique_jpeg(data: bytes, tag: str) -> bytes:
+    """Sisipkan segmen komentar (COM) setelah SOI: pixel identik, hash isi (key cache) berbeda."""
+    payload = tag.encode()
+    return data[:2] + b"\xff\xfe" + struct.pack(">H", len(payload) + 2) + payload + data[2:]
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise ValueError(f"Unknown request kind '{kind}' (choose from {', '.join(KINDS)})")
+        mix[kind] = float(weight or 1.0)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("Request mix weights must sum to > 0")
+    return {k: v / total for k, v in mix.items()}
+
+
+def schedule(mix: dict, resolutions, count: int, seed: int = 0):
+    """Urutan (kind, resolusi) deterministik untuk `count` request."""
+    rng = np.random.RandomState(seed)
+    kinds = list(mix)
+    picks = rng.choice(len(kinds), size=count, p=[mix[k] for k in kinds])
+    res = rng.randint(0, len(resolutions), size=count)
+    return [(kinds[k], resolutions[r]) for k, r in zip(picks, res)]
+
+
+# --- Target ------------------------------------------------------------------
+def _multipart(field: str, filename: str, data: bytes):
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: image/jpeg\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+class HttpTarget:
+    """Server yang sudah berjalan (mis. `python -m src.serve`)."""
+
+    def __init__(self, url: str, timeout: float = 120.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def post(self, path: str, body: bytes, content_type: str):
+        req = urllib.request.Request(self.url + path, data=body, headers={"Content-Type": content_type})
+        opener = urllib.request.build_opener(_NoRedirect)
+        try:
+            with opener.open(req, timeout=self.timeout) as resp:
+                return resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def get_json(self, path: str):
+        try:
+            with urllib.request.urlopen(self.url + path, timeout=self.timeout) as resp:
+                return json.loads(resp.read())
+        except (OSError, ValueError):
+            return None
+
+    def describe(self) -> str:
+        return self.url
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Redirect /predict (penolakan validasi) diukur apa adanya, tidak diikuti
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class InProcessTarget:
+    """App Flask di proses ini (test client per thread); cache hasil dimatikan."""
+
+    def __init__(self, model_path: str = None):
+        if model_path:
+            os.environ["MODEL_PATH"] = model_path
+        os.environ.setdefault("CACHE_MAX_ENTRIES", "0")
+        os.environ["CACHE_DIR"] = ""
+        os.environ.setdefault("UPLOAD_STORE", "memory")
+        import app as app_module
+
+        self.app = app_module.app
+        self.model_path = model_path or app_module.MODEL_PATH
+        self._local = threading.local()
+
+    def _client(self):
+        if not hasattr(self._local, "client"):
+            self._local.client = self.app.test_client()
+        return self._local.client
+
+    def post(self, path: str, body: bytes, content_type: str):
+        resp = self._client().post(path, data=body, content_type=content_type, buffered=True)
+        return resp.status_code, resp.data
+
+    def get_json(self, path: str):
+        return self._client().get(path, buffered=True).get_json()
+
+    def describe(self) -> str:
+        return f"in-process ({self.model_path})"
+
+
+def _request_spec(kind: str, endpoint: str):
+    """(path, field multipart, status & isi yang diharapkan)."""
+    if endpoint == "web":
+        return "/predict", "file", (302 if kind == "reject" else 200)
+    path = "/api/v1/predict?heatmap=1" if kind == "gradcam" else "/api/v1/predict"
+    return path, "files", 200
+
+
+def classify(kind: str, endpoint: str, status: int, body: bytes) -> str:
+    """Outcome satu request: ok / shed (429, 503) / mismatch (hasil tidak sesuai jenis) / error."""
+    if status in SHED_STATUSES:
+        return "shed"
+    _, _, expected = _request_spec(kind, endpoint)
+    if status != expected:
+        return "error"
+    if endpoint == "web":
+        return "ok"
+    try:
+        result = json.loads(body.splitlines()[0])
+    except (ValueError, IndexError):
+        return "error"
+    want = "rejected" if kind == "reject" else "ok"
+    if result.get("status") != want:
+        return "error" if result.get("status") == "error" else "mismatch"
+    if kind == "gradcam" and not result.get("heatmap_url"):
+        return "mismatch"
+    return "ok"
+
+
+# --- Load --------------------------------------------------------------------
+def summarize(samples, wall_s: float) -> dict:
+    """samples: list (outcome, latency_ms). Latensi hanya dari request 'ok'."""
+    counts = defaultdict(int)
+    ok_ms = []
+    for outcome, ms in samples:
+        counts[outcome] += 1
+        if outcome == "ok":
+            ok_ms.append(ms)
+    out = {
+        "requests": len(samples),
+        "ok": counts["ok"],
+        "shed": counts["shed"],
+        "mismatch": counts["mismatch"],
+        "errors": counts["error"],
+        "throughput_rps": counts["ok"] / wall_s if wall_s > 0 else 0.0,
+    }
+    for q in QUANTILES:
+        out[f"p{q}_ms"] = float(np.percentile(ok_ms, q)) if ok_ms else None
+    out["mean_ms"] = float(np.mean(ok_ms)) if ok_ms else None
+    return out
+
+
+def run_level(target, pool, plan, concurrency: int, endpoint: str = "api", duration: float = 20.0,
+              max_requests: int = None, tag: str = "") -> dict:
+    """Closed-loop: `concurrency` klien mengambil request berikutnya dari `plan` sampai waktu/jumlah habis."""
+    lock = threading.Lock()
+    samples = []  # (kind, res, outcome, ms)
+    cursor = [0]
+    limit = max_requests or float("inf")
+    stop_at = time.monotonic() + duration
+
+    def client():
+        while time.monotonic() < stop_at:
+            with lock:
+                i = cursor[0]
+                if i >= limit:
+                    return
+                cursor[0] += 1
+            kind, res = plan[i % len(plan)]
+            images = pool[(kind, res)]
+            data = unique_jpeg(images[i % len(images)], f"loadtest-{tag}-{i}")
+            path, field, _ = _request_spec(kind, endpoint)
+            body, ctype = _multipart(field, f"leaf_{i}.jpg", data)
+            start = time.perf_counter()
+            try:
+                status, payload = target.post(path, body, ctype)
+                outcome = classify(kind, endpoint, status, payload)
+            except Exception:  # noqa: BLE001 - koneksi gagal dihitung sebagai error
+                outcome = "error"
+            elapsed = (time.perf_counter() - start) * 1000.0
+            with lock:
+                samples.append((kind, res, outcome, elapsed))
+
+    threads = [threading.Thread(target=client, name=f"loadtest-{k}") for k in range(concurrency)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.monotonic() - start
+
+    by_kind, by_res = defaultdict(list), defaultdict(list)
+    for kind, res, outcome, ms in samples:
+        by_kind[kind].append((outcome, ms))
+        by_res[res].append((outcome, ms))
+    return {
+        "concurrency": concurrency,
+        "wall_s": wall,
+        "total": summarize([(o, ms) for _, _, o, ms in samples], wall),
+        "by_kind": {k: summarize(v, wall) for k, v in sorted(by_kind.items())},
+        "by_resolution": {r: summarize(v, wall) for r, v in sorted(by_res.items())},
+    }
+
+
+def warmup(target, pool, endpoint: str, kinds):
+    """Satu request per jenis (model dimuat + di-warmup di luar pengukuran)."""
+    for kind in kinds:
+        res = next(r for k, r in pool if k == kind)
+        path, field, _ = _request_spec(kind, endpoint)
+        body, ctype = _multipart(field, "warmup.jpg", unique_jpeg(pool[(kind, res)][0], f"warmup-{time.time()}"))
+        target.post(path, body, ctype)
+
+
+# --- Baseline ----------------------------------------------------------------
+def compare(current: dict, baseline: dict, tolerance: float = 0.15):
+    """
+    Bandingkan per (concurrency, jenis): throughput turun atau p95 naik lebih
+    dari `tolerance` (relatif) = regresi. Return list baris perbandingan.
+    """
+    base_levels = {lvl["concurrency"]: lvl for lvl in baseline.get("levels", [])}
+    rows = []
+    for lvl in current["levels"]:
+        base = base_levels.get(lvl["concurrency"])
+        if base is None:
+            continue
+        groups = [("total", lvl["total"], base["total"])]
+        groups += [(k, v, base["by_kind"][k]) for k, v in lvl["by_kind"].items() if k in base["by_kind"]]
+        for name, cur, old in groups:
+            for metric, higher_is_better in (("throughput_rps", True), ("p95_ms", False)):
+                a, b = old.get(metric), cur.get(metric)
+                if not a or b is None:
+                    continue
+                change = (b - a) / a
+                regressed = change < -tolerance if higher_is_better else change > tolerance
+                rows.append({"concurrency": lvl["concurrency"], "group": name, "metric": metric,
+                             "baseline": a, "current": b, "change": change, "regression": regressed})
+    return rows
+
+
+def _fmt_ms(value):
+    return f"{value:8.1f}" if value is not None else "       -"
+
+
+def print_level(level: dict):
+    print(f"\n== concurrency {level['concurrency']} ({level['wall_s']:.1f} s) ==")
+    print(f"{'':<12}{'req':>6}{'ok':>6}{'shed':>6}{'err':>6}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}")
+    rows = [("total", level["total"])] + list(level["by_kind"].items()) + list(level["by_resolution"].items())
+    for name, s in rows:
+        print(f"{name:<12}{s['requests']:>6}{s['ok']:>6}{s['shed']:>6}{s['errors'] + s['mismatch']:>6}"
+              f"{s['throughput_rps']:>8.2f} {_fmt_ms(s['p50_ms'])} {_fmt_ms(s['p95_ms'])} {_fmt_ms(s['p99_ms'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', type=str, default=None, help='Server yang sudah jalan (default: app in-process)')
+    parser.add_argument('--model_path', type=str, default=None,
+                        help='Mode in-process: model yang dipakai (default: stand-in DenseNet121 tanpa bobot)')
+    parser.add_argument('--endpoint', choices=['api', 'web'], default='api')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--duration', type=float, default=20.0, help='Detik per level concurrency')
+    parser.add_argument('--requests', type=int, default=None, help='Batas request per level (opsional)')
+    parser.add_argument('--resolutions', type=str, nargs='+', default=list(DEFAULT_RESOLUTIONS))
+    parser.add_argument('--mix', type=str, default=DEFAULT_MIX)
+    parser.add_argument('--pool', type=int, default=4, help='Gambar berbeda per jenis & resolusi')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=str, default=None, help='Simpan hasil (baseline) sebagai JSON')
+    parser.add_argument('--baseline', type=str, default=None, help='JSON run sebelumnya untuk dibandingkan')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Regresi relatif yang ditoleransi')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    if args.endpoint == "web":
+        mix.pop("gradcam", None)
+        mix = {k: v / sum(mix.values()) for k, v in mix.items()}
+
+    if args.url:
+        target = HttpTarget(args.url)
+    else:
+        model_path = args.model_path
+        if model_path is None:
+            from benchmarks.bench_prefork import standin_model_path
+            model_path = standin_model_path()
+        target = InProcessTarget(model_path)
+
+    print(f"Target: {target.describe()}, endpoint {args.endpoint}, "
+          f"mix {', '.join(f'{k}={v:.2f}' for k, v in mix.items())}")
+    pool = build_pool(args.resolutions, args.pool, args.seed)
+    plan = schedule(mix, args.resolutions, 10000, args.seed)
+    warmup(target, pool, args.endpoint, mix)
+
+    levels = []
+    run_id = uuid.uuid4().hex[:8]
+    for c in args.concurrency:
+        level = run_level(target, pool, plan, c, args.endpoint, args.duration, args.requests, f"{run_id}-{c}")
+        print_level(level)
+        levels.append(level)
+
+    stats = target.get_json("/api/v1/stats") or {}
+    result = {
+        "meta": {
+            "target": target.describe(),
+            "endpoint": args.endpoint,
+            "mix": mix,
+            "resolutions": args.resolutions,
+            "duration_s": args.duration,
+            "max_requests": args.requests,
+            "seed": args.seed,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "levels": levels,
+        # Latency per stage dari sisi server (kumulatif sejak proses start)
+        "server_stages": stats.get("stages"),
+        "server_admission": stats.get("admission"),
+    }
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare(result, baseline, args.tolerance)
+        result["comparison"] = {"baseline": args.baseline, "tolerance": args.tolerance, "rows": rows}
+        print(f"\nVs baseline {args.baseline} (tolerance {args.tolerance:.0%}):")
+        for r in rows:
+            flag = "REGRESSION" if r["regression"] else ""
+            print(f"  c={r['concurrency']:<3} {r['group']:<8} {r['metric']:<15} "
+                  f"{r['baseline']:>9.2f} -> {r['current']:>9.2f} ({r['change']:+.1%}) {flag}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"\nSaved: {args.output}")
+
+    if args.baseline and any(r["regression"] for r in result["comparison"]["rows"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
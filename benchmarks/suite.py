@@ -0,0 +1,171 @@
+"""
+Micro-benchmark suite untuk hot path preprocessing, validasi, inference dan
+Grad-CAM, pada input sintetis tetap (seed) di beberapa resolusi.
+
+Model: stand-in Keras dengan struktur yang sama seperti model produksi
+(augmentasi -> base nested dengan layer 'relu' -> GAP -> Dense), tanpa bobot
+sehingga jalan offline. Default base kecil ('tiny') agar suite cepat;
+`--backbone densenet121` untuk ukuran model sesungguhnya.
+
+    python -m benchmarks.suite run --output results/bench_base.json
+    python -m benchmarks.suite run --only validate preprocess --resolutions 4032x3024
+    python -m benchmarks.suite compare results/bench_base.json results/bench_new.json --threshold 0.15
+
+`compare` menandai case yang p50-nya lebih lambat dari baseline lebih dari
+`--threshold` (relatif) dan `--min_delta_ms` (absolut), lalu exit 1.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import cv2
+
+from src.config import DEFAULT_IMG_SIZE
+from benchmarks.common import build_standin_model, time_fn
+from benchmarks.loadtest import DEFAULT_RESOLUTIONS, parse_resolution, synthetic_leaf
+
+
+def build_cases(model, resolutions, img_size=DEFAULT_IMG_SIZE, workdir: str = None):
+    """List (nama, fn tanpa argumen). Input dibuat sekali di sini, di luar pengukuran."""
+    from src.explain import (
+        GradCamExplainer, encode_overlay, find_target_layer, make_gradcam_heatmap, save_and_display_gradcam,
+    )
+    from src.inference import predict_image
+    from src.preprocess import ImageContext, preprocess_image_bgr
+    from src.quality import quality_gate
+
+    workdir = workdir or tempfile.mkdtemp()
+    layer = find_target_layer(model)
+    explainer = GradCamExplainer(model, layer)
+    x = preprocess_image_bgr(synthetic_leaf(*img_size, seed=0, diseased=True), target_size=img_size)
+    _, heatmap = explainer.explain(x)
+
+    cases = [
+        ("make_gradcam_heatmap", lambda: make_gradcam_heatmap(x[None], model, layer)),
+        ("gradcam_explainer", lambda: explainer.explain(x)),
+    ]
+    for res in resolutions:
+        width, height = parse_resolution(res)
+        img = synthetic_leaf(width, height, seed=1, diseased=True)
+        data = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+        cam_path = os.path.join(workdir, f"cam_{res}.jpg")
+        cases += [
+            (f"decode@{res}", lambda data=data: ImageContext(data).bgr),
+            (f"preprocess_image_bgr@{res}", lambda img=img: preprocess_image_bgr(img, target_size=img_size)),
+            # Context baru per panggilan: HSV/gray dihitung ulang seperti pada upload baru
+            (f"validate_image@{res}", lambda img=img: quality_gate(ImageContext.from_bgr(img))),
+            (f"predict_image@{res}",
+             lambda img=img: predict_image(model, ImageContext.from_bgr(img), target_size=img_size)),
+            (f"save_and_display_gradcam@{res}",
+             lambda img=img, path=cam_path: save_and_display_gradcam(img, heatmap, path)),
+            (f"encode_overlay@{res}", lambda img=img: encode_overlay(img, heatmap)),
+        ]
+    return cases
+
+
+def run(model, resolutions=DEFAULT_RESOLUTIONS, img_size=DEFAULT_IMG_SIZE, repeats: int = 10, only=None) -> dict:
+    results = {}
+    for name, fn in build_cases(model, resolutions, img_size):
+        if only and not any(pattern in name for pattern in only):
+            continue
+        results[name] = time_fn(fn, repeats, warmup=2)
+        print(f"{name:<40} p50 {results[name]['p50_ms']:>9.2f} ms   p95 {results[name]['p95_ms']:>9.2f} ms")
+    return results
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.15, min_delta_ms: float = 0.5):
+    """Baris perbandingan per case yang ada di kedua hasil (berdasarkan p50)."""
+    rows = []
+    for name, cur in current["cases"].items():
+        old = baseline["cases"].get(name)
+        if old is None:
+            continue
+        a, b = old["p50_ms"], cur["p50_ms"]
+        change = (b - a) / a if a else 0.0
+        rows.append({"case": name, "baseline_ms": a, "current_ms": b, "change": change,
+                     "slowdown": change > threshold and (b - a) > min_delta_ms})
+    return rows
+
+
+def _load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def cmd_run(args):
+    import tensorflow as tf
+
+    if args.model_path:
+        model = tf.keras.models.load_model(args.model_path)
+    else:
+        tf.keras.utils.set_random_seed(0)
+        model = build_standin_model(tuple(args.img_size), backbone=args.backbone)
+    cases = run(model, args.resolutions, tuple(args.img_size), args.repeats, args.only)
+    result = {
+        "meta": {
+            "model": args.model_path or f"standin:{args.backbone}",
+            "img_size": list(args.img_size),
+            "resolutions": args.resolutions,
+            "repeats": args.repeats,
+            "python": sys.version.split()[0],
+            "tensorflow": tf.__version__,
+            "opencv": cv2.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "cases": cases,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved: {args.output}")
+    return 0
+
+
+def cmd_compare(args):
+    rows = compare(_load(args.baseline), _load(args.current), args.threshold, args.min_delta_ms)
+    print(f"{'case':<40} {'base ms':>9} {'new ms':>9} {'change':>8}")
+    for r in rows:
+        flag = "  SLOWER" if r["slowdown"] else ""
+        print(f"{r['case']:<40} {r['baseline_ms']:>9.2f} {r['current_ms']:>9.2f} {r['change']:>+8.1%}{flag}")
+    slow = [r["case"] for r in rows if r["slowdown"]]
+    if slow:
+        print(f"\n{len(slow)} case lebih lambat dari baseline (> {args.threshold:.0%}): {', '.join(slow)}")
+        return 1
+    print(f"\nTidak ada regresi (threshold {args.threshold:.0%}).")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser('run', help='Jalankan suite dan simpan hasil JSON')
+    p_run.add_argument('--model_path', type=str, default=None, help='Default: stand-in (tanpa bobot)')
+    p_run.add_argument('--backbone', choices=['tiny', 'densenet121'], default='tiny')
+    p_run.add_argument('--img_size', type=int, nargs=2, default=DEFAULT_IMG_SIZE)
+    p_run.add_argument('--resolutions', type=str, nargs='+', default=list(DEFAULT_RESOLUTIONS))
+    p_run.add_argument('--repeats', type=int, default=10)
+    p_run.add_argument('--only', type=str, nargs='+', default=None, help='Hanya case yang namanya memuat teks ini')
+    p_run.add_argument('--output', type=str, default=None, help='Simpan hasil sebagai JSON')
+    p_run.set_defaults(func=cmd_run)
+
+    p_cmp = sub.add_parser('compare', help='Bandingkan dua hasil JSON')
+    p_cmp.add_argument('baseline', type=str)
+    p_cmp.add_argument('current', type=str)
+    p_cmp.add_argument('--threshold', type=float, default=0.15, help='Perlambatan relatif yang ditoleransi')
+    p_cmp.add_argument('--min_delta_ms', type=float, default=0.5, help='Abaikan selisih absolut di bawah ini')
+    p_cmp.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Admission control untuk endpoint prediksi.
+
+Saat burst, tanpa batas semua upload diterima lalu antre di belakang
+inference + Grad-CAM yang CPU-bound; latensi naik tanpa batas. Controller
+ini membatasi request yang diproses bersamaan (`max_concurrent`) dengan
+antrian tunggu terbatas (`max_queue`):
+
+- antrian penuh                         -> ditolak langsung (429)
+- menunggu slot lebih dari `max_wait_s` -> ditolak (503)
+
+Keduanya membawa estimasi `retry_after` (detik) dari rata-rata waktu layanan
+(EWMA) x posisi antrian / slot. Counter & kedalaman antrian tersedia lewat
+`stats()` untuk sizing fleet.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+QUEUE_FULL = "queue_full"
+WAIT_TIMEOUT = "wait_timeout"
+DEADLINE = "deadline"
+
+MSG_DEADLINE = "Batas waktu request terlampaui, server sedang sibuk."
+
+
+class Overloaded(RuntimeError):
+    """Request ditolak karena server jenuh; `status` HTTP (429/503) + `retry_after` detik."""
+
+    def __init__(self, message: str, reason: str, status: int, retry_after: int):
+        super().__init__(message)
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Overloaded):
+    """Deadline per request terlampaui sebelum inference selesai."""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__(MSG_DEADLINE, DEADLINE, 503, retry_after)
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int = 16, max_queue: int = 64, max_wait_s: float = 10.0,
+                 name: str = "predict", ewma_alpha: float = 0.2):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent harus >= 1")
+        self.max_concurrent = int(max_concurrent)
+        self.max_queue = int(max_queue)
+        self.max_wait_s = float(max_wait_s)
+        self.name = name
+        self.ewma_alpha = float(ewma_alpha)
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._service_s = None  # EWMA waktu layanan per request (detik)
+        self._counters = {"admitted": 0, "queued": 0, "completed": 0,
+                          "rejected_" + QUEUE_FULL: 0, "rejected_" + WAIT_TIMEOUT: 0, "rejected_" + DEADLINE: 0}
+        self._max_queue_depth = 0
+        self._wait_ms_total = 0.0
+        self._wait_ms_max = 0.0
+
+    def acquire(self, max_wait_s: Optional[float] = None) -> float:
+        """Ambil satu slot (blocking s.d. `max_wait_s`); return waktu tunggu (detik) atau raise Overloaded."""
+        wait_s = self.max_wait_s if max_wait_s is None else min(max_wait_s, self.max_wait_s)
+        start = time.monotonic()
+        with self._cond:
+            if self._active < self.max_concurrent and self._waiting == 0:
+                self._active += 1
+                self._counters["admitted"] += 1
+                return 0.0
+            if self._waiting >= self.max_queue:
+                self._counters["rejected_" + QUEUE_FULL] += 1
+                raise Overloaded("Antrian server penuh, coba lagi nanti.", QUEUE_FULL, 429,
+                                 self._retry_after_locked())
+
+            self._waiting += 1
+            self._counters["queued"] += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._waiting)
+            deadline = start + wait_s
+            admitted = False
+            try:
+                while self._active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                else:
+                    self._active += 1
+                    self._counters["admitted"] += 1
+                    admitted = True
+            finally:
+                self._waiting -= 1
+            if not admitted:
+                self._counters["rejected_" + WAIT_TIMEOUT] += 1
+                raise Overloaded("Server sedang sibuk, coba lagi nanti.", WAIT_TIMEOUT, 503,
+                                 self._retry_after_locked())
+
+            waited = time.monotonic() - start
+            self._wait_ms_total += waited * 1000.0
+            self._wait_ms_max = max(self._wait_ms_max, waited * 1000.0)
+            return waited
+
+    def release(self, service_s: Optional[float] = None):
+        """Kembalikan slot; `service_s` (lama slot dipegang) memperbarui estimasi Retry-After."""
+        with self._cond:
+            self._active -= 1
+            self._counters["completed"] += 1
+            if service_s is not None:
+                if self._service_s is None:
+                    self._service_s = service_s
+                else:
+                    self._service_s += self.ewma_alpha * (service_s - self._service_s)
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self, max_wait_s: Optional[float] = None):
+        self.acquire(max_wait_s)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def record_deadline(self):
+        """Request yang sudah diterima tapi melewati deadline-nya (dihitung terpisah untuk sizing)."""
+        with self._cond:
+            self._counters["rejected_" + DEADLINE] += 1
+
+    def retry_after(self) -> int:
+        with self._cond:
+            return self._retry_after_locked()
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return self._waiting
+
+    def in_flight(self) -> int:
+        with self._cond:
+            return self._active
+
+    def stats(self) -> dict:
+        with self._cond:
+            queued = max(self._counters["queued"], 1)
+            return {
+                "name": self.name,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "max_wait_s": self.max_wait_s,
+                "in_flight": self._active,
+                "queue_depth": self._waiting,
+                "max_queue_depth": self._max_queue_depth,
+                **self._counters,
+                "avg_wait_ms": self._wait_ms_total / queued,
+                "max_wait_ms_seen": self._wait_ms_max,
+                "service_s_ewma": self._service_s,
+                "retry_after_s": self._retry_after_locked(),
+            }
+
+    def _retry_after_locked(self) -> int:
+        # Perkiraan waktu sampai slot kosong untuk request di belakang antrian saat ini
+        service = self._service_s if self._service_s is not None else 1.0
+        estimate = (self._waiting + 1) * service / self.max_concurrent
+        return int(min(60, max(1, math.ceil(estimate))))
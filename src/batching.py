@@ -0,0 +1,187 @@
+"""
+Micro-batching scheduler untuk inference.
+
+Request yang datang bersamaan dikumpulkan selama `max_wait_ms` (atau sampai
+`max_batch_size` gambar), lalu dijalankan dalam SATU forward pass. Hasil tiap
+baris batch dikembalikan ke pemanggilnya lewat `concurrent.futures.Future`.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+import numpy as np
+
+
+class BatcherClosed(RuntimeError):
+    """Dilempar saat submit ke batcher yang sudah di-close."""
+
+
+def wait_result(future: Future, timeout: Optional[float] = None):
+    """future.result(timeout); bila timeout, future di-cancel agar tidak ikut dihitung di batch berikutnya."""
+    try:
+        return future.result(timeout=timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+class _Stats:
+    """Counter sederhana untuk tuning (queue depth, ukuran batch, latensi)."""
+
+    def __init__(self):
+        self.requests = 0
+        self.completed = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_queue_depth = 0
+        self.batch_size_total = 0
+        self.max_batch_size_seen = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.run_ms_total = 0.0
+        self.run_ms_max = 0.0
+
+
+class MicroBatcher:
+    """
+    Scheduler batching in-process.
+
+    `batch_fn` menerima array (N, ...) dan mengembalikan array (N, ...) atau
+    tuple dari array (N, ...). Baris ke-i dari output dikirim ke future ke-i.
+    """
+
+    def __init__(self, batch_fn: Callable, max_batch_size: int = 8, max_wait_ms: float = 10.0,
+                 name: str = "batcher"):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size harus >= 1")
+        self.batch_fn = batch_fn
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait_ms = float(max_wait_ms)
+        self.name = name
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stats = _Stats()
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, x: np.ndarray) -> Future:
+        """Masukkan satu sampel (tanpa dimensi batch) ke antrian."""
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise BatcherClosed(f"{self.name} sudah ditutup")
+            self._queue.append((x, future, time.perf_counter()))
+            self._stats.requests += 1
+            depth = len(self._queue)
+            if depth > self._stats.max_queue_depth:
+                self._stats.max_queue_depth = depth
+            self._cond.notify()
+        return future
+
+    def predict(self, x: np.ndarray, timeout: Optional[float] = None):
+        """Versi blocking dari `submit`."""
+        return wait_result(self.submit(x), timeout)
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def stats(self) -> dict:
+        with self._cond:
+            s = self._stats
+            batches = max(s.batches, 1)
+            completed = max(s.completed, 1)
+            return {
+                "name": self.name,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "queue_depth": len(self._queue),
+                "max_queue_depth": s.max_queue_depth,
+                "requests": s.requests,
+                "completed": s.completed,
+                "batches": s.batches,
+                "errors": s.errors,
+                "avg_batch_size": s.batch_size_total / batches,
+                "max_batch_size_seen": s.max_batch_size_seen,
+                "avg_wait_ms": s.wait_ms_total / completed,
+                "max_wait_ms_seen": s.wait_ms_max,
+                "avg_run_ms": s.run_ms_total / batches,
+                "max_run_ms": s.run_ms_max,
+            }
+
+    def close(self, timeout: Optional[float] = None):
+        """Hentikan worker setelah antrian yang tersisa selesai diproses."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+
+    # ------------------------------------------------------------------
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return None
+
+            # Tunggu sampai batch penuh atau deadline dari request pertama lewat
+            deadline = self._queue[0][2] + self.max_wait_ms / 1000.0
+            while len(self._queue) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            n = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(n)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        # Future yang sudah di-cancel pemanggil tidak perlu dihitung
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        start = time.perf_counter()
+        try:
+            outputs = self.batch_fn(np.stack([x for x, _, _ in batch]))
+        except Exception as exc:  # noqa: BLE001 - error diteruskan ke setiap caller
+            with self._cond:
+                self._stats.errors += 1
+            for _, future, _ in batch:
+                future.set_exception(exc)
+            return
+        end = time.perf_counter()
+
+        if isinstance(outputs, (tuple, list)):
+            outputs = tuple(np.asarray(o) for o in outputs)
+            for i, (_, future, _) in enumerate(batch):
+                future.set_result(tuple(o[i] for o in outputs))
+        else:
+            outputs = np.asarray(outputs)
+            for i, (_, future, _) in enumerate(batch):
+                future.set_result(outputs[i])
+
+        run_ms = (end - start) * 1000.0
+        with self._cond:
+            s = self._stats
+            s.batches += 1
+            s.completed += len(batch)
+            s.batch_size_total += len(batch)
+            s.max_batch_size_seen = max(s.max_batch_size_seen, len(batch))
+            s.run_ms_total += run_ms
+            s.run_ms_max = max(s.run_ms_max, run_ms)
+            for _, _, enqueued in batch:
+                wait_ms = (start - enqueued) * 1000.0
+                s.wait_ms_total += wait_ms
+                s.wait_ms_max = max(s.wait_ms_max, wait_ms)
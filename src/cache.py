@@ -0,0 +1,244 @@
+"""
+Cache hasil analisis berbasis isi file (content-addressed).
+
+Key = SHA-256 dari bytes upload + fingerprint model, sehingga foto yang sama
+tidak divalidasi/di-inference ulang, dan cache otomatis "basi" saat model
+diganti. Dua tier: LRU di memori dan (opsional) direktori di disk dengan
+batas ukuran. Request identik yang datang bersamaan digabung: hanya satu
+yang benar-benar menghitung, sisanya menunggu hasil yang sama.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+
+def model_fingerprint(model_path: str) -> str:
+    """Fingerprint murah dari file model (path + ukuran + mtime)."""
+    try:
+        st = os.stat(model_path)
+    except OSError:
+        return "missing"
+    raw = f"{os.path.abspath(model_path)}:{st.st_size}:{st.st_mtime_ns}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def make_key(data: bytes, fingerprint: str, *parts: str) -> str:
+    h = hashlib.sha256(data)
+    for part in (fingerprint,) + parts:
+        h.update(b"\0" + part.encode("utf-8"))
+    return h.hexdigest()
+
+
+class PredictionCache:
+    """
+    Entry berupa dict: {"valid", "message", "probs", "heatmap"} dengan
+    `heatmap` berisi bytes gambar overlay yang sudah di-encode (atau None).
+    """
+
+    def __init__(self, max_entries: int = 256, disk_dir: Optional[str] = None,
+                 disk_max_bytes: int = 512 * 1024 * 1024):
+        self.max_entries = int(max_entries)
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = int(disk_max_bytes)
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._disk_index = OrderedDict()  # key -> ukuran bytes (urutan = LRU)
+        self._disk_bytes = 0
+        self._counters = {
+            "hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0,
+            "coalesced": 0, "coalesced_timeouts": 0, "evictions": 0, "disk_evictions": 0,
+        }
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    # ------------------------------------------------------------------
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._memory_get(key)
+            if entry is not None:
+                return entry
+        entry = self._disk_get(key)
+        with self._lock:
+            if entry is None:
+                self._counters["misses"] += 1
+            else:
+                self._memory_put(key, entry)
+        return entry
+
+    def put(self, key: str, entry: dict):
+        with self._lock:
+            self._memory_put(key, entry)
+        self._disk_put(key, entry)
+
+    def get_or_compute(self, key: str, compute: Callable[[], dict], timeout: Optional[float] = None) -> dict:
+        """
+        Ambil dari cache; jika belum ada, hitung SEKALI meski dipanggil bersamaan.
+        `timeout` (detik) membatasi waktu menunggu hasil request lain yang sedang menghitung
+        key yang sama (TimeoutError); perhitungan milik request tersebut tidak dibatalkan.
+        """
+        with self._lock:
+            entry = self._memory_get(key)
+            if entry is not None:
+                return entry
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self._counters["coalesced"] += 1
+
+        if not owner:
+            try:
+                return future.result(timeout=timeout)
+            except TimeoutError:
+                with self._lock:
+                    self._counters["coalesced_timeouts"] += 1
+                raise
+
+        try:
+            entry = self._disk_get(key)
+            if entry is None:
+                with self._lock:
+                    self._counters["misses"] += 1
+                entry = compute()
+                self.put(key, entry)
+            else:
+                with self._lock:
+                    self._memory_put(key, entry)
+            future.set_result(entry)
+            return entry
+        except BaseException as exc:
+            # Error tidak di-cache; request yang menunggu ikut menerima error yang sama
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self):
+        """Kosongkan tier memori (tier disk dibiarkan)."""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return dict(
+                self._counters,
+                hit_rate=self._counters["hits"] / lookups if lookups else 0.0,
+                entries=len(self._memory),
+                max_entries=self.max_entries,
+                disk_entries=len(self._disk_index),
+                disk_bytes=self._disk_bytes,
+                inflight=len(self._inflight),
+            )
+
+    # ------------------------------------------------------------------
+    def _memory_get(self, key):
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self._counters["hits"] += 1
+            self._counters["memory_hits"] += 1
+        return entry
+
+    def _memory_put(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _paths(self, key):
+        base = os.path.join(self.disk_dir, key)
+        return base + ".json", base + ".bin"
+
+    def _load_disk_index(self):
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".json"):
+                continue
+            key = name[:-5]
+            meta_path, blob_path = self._paths(key)
+            try:
+                size = os.path.getsize(meta_path)
+                if os.path.exists(blob_path):
+                    size += os.path.getsize(blob_path)
+                entries.append((os.path.getmtime(meta_path), key, size))
+            except OSError:
+                continue
+        for _, key, size in sorted(entries):
+            self._disk_index[key] = size
+            self._disk_bytes += size
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        with self._lock:
+            if key not in self._disk_index:
+                return None
+        meta_path, blob_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            entry["heatmap"] = None
+            if entry.pop("has_heatmap", False):
+                with open(blob_path, "rb") as f:
+                    entry["heatmap"] = f.read()
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            if key in self._disk_index:
+                self._disk_index.move_to_end(key)
+            self._counters["hits"] += 1
+            self._counters["disk_hits"] += 1
+        return entry
+
+    def _disk_put(self, key, entry):
+        if not self.disk_dir:
+            return
+        meta_path, blob_path = self._paths(key)
+        heatmap = entry.get("heatmap")
+        meta = {k: v for k, v in entry.items() if k != "heatmap"}
+        meta["has_heatmap"] = heatmap is not None
+        try:
+            if heatmap is not None:
+                _atomic_write(blob_path, heatmap)
+            payload = json.dumps(meta).encode("utf-8")
+            _atomic_write(meta_path, payload)
+        except OSError as e:
+            print(f"[WARNING] Gagal menulis cache disk: {e}")
+            return
+        size = len(payload) + (len(heatmap) if heatmap is not None else 0)
+
+        evicted = []
+        with self._lock:
+            self._disk_bytes += size - self._disk_index.pop(key, 0)
+            self._disk_index[key] = size
+            while self._disk_bytes > self.disk_max_bytes and len(self._disk_index) > 1:
+                old_key, old_size = self._disk_index.popitem(last=False)
+                self._disk_bytes -= old_size
+                self._counters["disk_evictions"] += 1
+                evicted.append(old_key)
+        for old_key in evicted:
+            for path in self._paths(old_key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def _atomic_write(path: str, data: bytes):
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
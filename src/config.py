@@ -9,7 +9,8 @@ STATIC_DIR = os.path.join(BASE_DIR, 'static')
 UPLOAD_FOLDER = os.path.join(STATIC_DIR, 'uploads')
 
 # Files
-MODEL_PATH = os.path.join(MODELS_DIR, 'densenet121_best.keras')
+# MODEL_PATH boleh menunjuk ke .keras, .tflite (src/convert_tflite.py) atau .pb (src/export.py)
+MODEL_PATH = os.environ.get('MODEL_PATH', os.path.join(MODELS_DIR, 'densenet121_best.keras'))
 LABEL_MAP_PATH = os.path.join(MODELS_DIR, 'label_map.json')
 
 # Training defaults
@@ -22,6 +23,78 @@ SEED = 42
 # Flask
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 
+# Serving: jumlah thread interpreter TFLite (None = default TFLite)
+TFLITE_NUM_THREADS = int(os.environ['TFLITE_NUM_THREADS']) if os.environ.get('TFLITE_NUM_THREADS') else None
+
+# Serving: micro-batching (request bersamaan digabung jadi satu forward pass)
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 8))
+# Ukuran batch yang di-warmup saat model dimuat (1, 2, 4, ... s.d. BATCH_MAX_SIZE)
+SERVING_WARMUP_BATCH_SIZES = tuple(sorted({min(2 ** i, BATCH_MAX_SIZE) for i in range(8)}))
+BATCH_MAX_WAIT_MS = float(os.environ.get('BATCH_MAX_WAIT_MS', 10))
+# Batas gambar yang sedang diproses per request /api/v1/predict
+API_MAX_IN_FLIGHT = int(os.environ.get('API_MAX_IN_FLIGHT', 32))
+# Test-time augmentation: jumlah view dihedral (1 = mati, maks 8); API bisa override lewat ?tta=N
+TTA_VIEWS = int(os.environ.get('TTA_VIEWS', 1))
+# Mode tile (API ?tiled=1): sisi tile dalam pixel asli, overlap relatif, rasio daun minimal per tile
+TILE_SIZE = int(os.environ.get('TILE_SIZE', 768))
+TILE_OVERLAP = float(os.environ.get('TILE_OVERLAP', 0.25))
+TILE_MIN_FOLIAGE = float(os.environ.get('TILE_MIN_FOLIAGE', 0.2))
+
+# Admission control endpoint prediksi: slot paralel (0 = tanpa batas), antrian tunggu, deadline per request
+ADMISSION_MAX_CONCURRENT = int(os.environ.get('ADMISSION_MAX_CONCURRENT', 16))
+ADMISSION_QUEUE_SIZE = int(os.environ.get('ADMISSION_QUEUE_SIZE', 64))
+ADMISSION_MAX_WAIT_S = float(os.environ.get('ADMISSION_MAX_WAIT_S', 10))
+REQUEST_DEADLINE_S = float(os.environ.get('REQUEST_DEADLINE_S', 30))  # 0 = tanpa deadline
+
+# Profiling per request /predict (header admin X-Profile atau sampling); PROFILE_MAX_KEEP profil terbaru disimpan
+PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(BASE_DIR, 'profiles')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))  # 0 = hanya lewat header
+PROFILE_MAX_KEEP = int(os.environ.get('PROFILE_MAX_KEEP', 50))
+PROFILE_TF_TRACE = os.environ.get('PROFILE_TF_TRACE', '0').lower() in ('1', 'true', 'yes')  # trace TF untuk sampel
+
+# Resolusi input adaptif (src/multires.py): daftar sisi lebih kecil, mis. "160,128"; kosong = selalu DEFAULT_IMG_SIZE
+ADAPTIVE_RESOLUTIONS = os.environ.get('ADAPTIVE_RESOLUTIONS', '')
+# Turun resolusi bila antrian admission / EWMA latensi inference di atas batas atas; naik lagi di bawah batas bawah
+ADAPTIVE_QUEUE_HIGH = int(os.environ.get('ADAPTIVE_QUEUE_HIGH', 4))
+ADAPTIVE_QUEUE_LOW = int(os.environ.get('ADAPTIVE_QUEUE_LOW', 0))
+ADAPTIVE_LATENCY_HIGH_MS = float(os.environ.get('ADAPTIVE_LATENCY_HIGH_MS', 1500))
+ADAPTIVE_LATENCY_LOW_MS = float(os.environ.get('ADAPTIVE_LATENCY_LOW_MS', 500))
+ADAPTIVE_COOLDOWN_S = float(os.environ.get('ADAPTIVE_COOLDOWN_S', 15))  # minimal bertahan sebelum naik lagi
+
+# Serving: cache hasil (key = hash isi upload + fingerprint model)
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 256))
+CACHE_DIR = os.environ.get('CACHE_DIR') or None  # None = tanpa tier disk
+CACHE_DISK_MAX_MB = int(os.environ.get('CACHE_DISK_MAX_MB', 512))
+
+# Serving: Grad-CAM 'sync' (heatmap di halaman hasil) atau 'async' (worker pool + polling)
+GRADCAM_MODE = os.environ.get('GRADCAM_MODE', 'sync').lower()
+HEATMAP_WORKERS = int(os.environ.get('HEATMAP_WORKERS', 2))
+HEATMAP_QUEUE_SIZE = int(os.environ.get('HEATMAP_QUEUE_SIZE', 32))
+HEATMAP_MAX_WAIT_S = float(os.environ.get('HEATMAP_MAX_WAIT_S', 30))
+# Overlay Grad-CAM: di-render pada resolusi tampilan (sisi terpanjang) lalu di-encode 'jpeg' atau 'webp'
+HEATMAP_MAX_SIDE = int(os.environ.get('HEATMAP_MAX_SIDE', 1024))
+HEATMAP_FORMAT = os.environ.get('HEATMAP_FORMAT', 'jpeg').lower()
+HEATMAP_QUALITY = int(os.environ.get('HEATMAP_QUALITY', 85))
+
+# Validasi upload: cek cahaya/warna pada downsample (sisi terpanjang), blur pada seluruh frame resolusi penuh
+QUALITY_MAX_SIDE = int(os.environ.get('QUALITY_MAX_SIDE', 512))
+
+# Upload store: 'disk' (UPLOAD_FOLDER) atau 'memory'; file lebih tua dari TTL / melewati budget dihapus sweeper
+UPLOAD_STORE = os.environ.get('UPLOAD_STORE', 'disk').lower()
+UPLOAD_MAX_MB = int(os.environ.get('UPLOAD_MAX_MB', 512))
+UPLOAD_TTL_S = float(os.environ.get('UPLOAD_TTL_S', 3600))
+UPLOAD_SWEEP_INTERVAL_S = float(os.environ.get('UPLOAD_SWEEP_INTERVAL_S', 60))
+
+# Serving: muat + warmup model di background saat proses start (lihat /readyz)
+PRELOAD_MODEL = os.environ.get('PRELOAD_MODEL', '0').lower() in ('1', 'true', 'yes')
+
+# Serving: registry model berversi untuk hot reload (None = pakai MODEL_PATH/LABEL_MAP_PATH)
+MODEL_REGISTRY_DIR = os.environ.get('MODEL_REGISTRY_DIR') or None
+# Interval watcher memantau versi aktif di registry (0 = hanya lewat endpoint admin)
+MODEL_REGISTRY_POLL_S = float(os.environ.get('MODEL_REGISTRY_POLL_S', 10))
+# Token untuk endpoint /admin/* (header X-Admin-Token); kosong = endpoint admin nonaktif
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN') or None
+
 # Create dirs
 os.makedirs(MODELS_DIR, exist_ok=True)
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -0,0 +1,162 @@
+"""
+Konversi model Keras ke TFLite (float16 & INT8) untuk serving di CPU.
+
+INT8 memakai representative dataset dari folder training (struktur
+image_dataset_from_directory). Setelah konversi, setiap backend dibandingkan
+dengan baseline Keras pada folder gambar lokal: latensi per gambar dan
+top-1 agreement.
+
+Contoh:
+    python -m src.convert_tflite --data_dir data/train --eval_dir data/val
+    MODEL_PATH=models/densenet121_best_int8.tflite python app.py
+"""
+import os
+import argparse
+import json
+import random
+import time
+from typing import Dict, List
+
+import numpy as np
+import tensorflow as tf
+
+from .config import DEFAULT_IMG_SIZE, MODEL_PATH, MODELS_DIR, SEED
+from .inference import TFLiteModel
+from .preprocess import load_and_preprocess
+from .utils import list_images
+
+
+def representative_dataset(data_dir: str, img_size=DEFAULT_IMG_SIZE, num_samples: int = 200):
+    """Generator kalibrasi INT8: sampel acak dari folder training, preprocessing sama dengan serving."""
+    if not data_dir:
+        raise ValueError("INT8 conversion needs a representative dataset (--data_dir)")
+    paths = list_images(data_dir)
+    if not paths:
+        raise FileNotFoundError(f"No images found in {data_dir}")
+    random.Random(SEED).shuffle(paths)
+    paths = paths[:num_samples]
+
+    def gen():
+        for path in paths:
+            yield [np.expand_dims(load_and_preprocess(path, target_size=img_size), 0)]
+    return gen
+
+
+def convert(model, mode: str, rep_dataset=None) -> bytes:
+    """mode: 'fp16' (bobot float16) atau 'int8' (bobot+aktivasi INT8, I/O tetap float32)."""
+    # from_keras_model membekukan bobot jadi konstanta; dimensi batch tetap dinamis
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == 'fp16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif mode == 'int8':
+        if rep_dataset is None:
+            raise ValueError("INT8 conversion needs a representative dataset (--data_dir)")
+        converter.representative_dataset = rep_dataset
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+    return converter.convert()
+
+
+def compare_backends(backends: Dict[str, object], image_paths: List[str], img_size=DEFAULT_IMG_SIZE,
+                     baseline: str = 'keras', warmup: int = 3) -> dict:
+    """Latensi (batch 1) dan top-1 agreement setiap backend terhadap baseline."""
+    inputs = [np.expand_dims(load_and_preprocess(p, target_size=img_size), 0) for p in image_paths]
+    if not inputs:
+        raise ValueError("No images to compare on")
+
+    top1 = {}
+    report = {}
+    for name, model in backends.items():
+        for x in inputs[:warmup]:
+            model.predict(x, verbose=0)
+        latencies = []
+        preds = []
+        for x in inputs:
+            start = time.perf_counter()
+            p = model.predict(x, verbose=0)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+            preds.append(int(np.argmax(p[0])))
+        top1[name] = np.array(preds)
+        report[name] = {
+            'latency_ms_mean': float(np.mean(latencies)),
+            'latency_ms_p50': float(np.percentile(latencies, 50)),
+            'latency_ms_p95': float(np.percentile(latencies, 95)),
+        }
+
+    for name in backends:
+        if baseline in top1:
+            report[name]['top1_agreement'] = float(np.mean(top1[name] == top1[baseline]))
+    return {'num_images': len(inputs), 'baseline': baseline, 'backends': report}
+
+
+def _print_report(report: dict):
+    print(f"\nBackend comparison on {report['num_images']} images (baseline: {report['baseline']})")
+    print(f"{'backend':<10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'top-1 agree':>12}")
+    for name, r in report['backends'].items():
+        agree = r.get('top1_agreement')
+        agree = f"{agree * 100:.2f}%" if agree is not None else '-'
+        print(f"{name:<10} {r['latency_ms_mean']:>9.2f} {r['latency_ms_p50']:>9.2f} "
+              f"{r['latency_ms_p95']:>9.2f} {agree:>12}")
+
+
+def main(model_path: str, output_dir: str, modes: List[str], data_dir: str = None, eval_dir: str = None,
+         img_size=DEFAULT_IMG_SIZE, num_calibration: int = 200, max_eval: int = 200, report_json: str = None):
+    if 'int8' in modes and not data_dir:
+        # Mode default memuat int8: tanpa data kalibrasi, lewati int8 daripada gagal di tengah jalan
+        print("[WARNING] INT8 dilewati: butuh representative dataset (--data_dir).")
+        modes = [m for m in modes if m != 'int8']
+        if not modes:
+            raise ValueError("INT8 conversion needs a representative dataset (--data_dir)")
+    os.makedirs(output_dir, exist_ok=True)
+    model = tf.keras.models.load_model(model_path)
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+
+    outputs = {}
+    for mode in modes:
+        rep = representative_dataset(data_dir, img_size, num_calibration) if mode == 'int8' else None
+        out_path = os.path.join(output_dir, f"{stem}_{mode}.tflite")
+        with open(out_path, 'wb') as f:
+            f.write(convert(model, mode, rep))
+        outputs[mode] = out_path
+        print(f"[{mode}] saved {out_path} ({os.path.getsize(out_path) / 1e6:.1f} MB)")
+
+    if eval_dir:
+        image_paths = list_images(eval_dir)[:max_eval]
+        backends = {'keras': model}
+        backends.update({mode: TFLiteModel(path) for mode, path in outputs.items()})
+        report = compare_backends(backends, image_paths, img_size)
+        report['model_path'] = model_path
+        report['outputs'] = outputs
+        _print_report(report)
+        if report_json:
+            os.makedirs(os.path.dirname(report_json) or ".", exist_ok=True)
+            with open(report_json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convert Keras model to float16 / INT8 TFLite')
+    parser.add_argument('--model_path', type=str, default=MODEL_PATH)
+    parser.add_argument('--output_dir', type=str, default=MODELS_DIR)
+    parser.add_argument('--modes', type=str, nargs='+', default=['fp16', 'int8'], choices=['fp16', 'int8'])
+    parser.add_argument('--data_dir', type=str, default=None, help='Training folders for INT8 calibration')
+    parser.add_argument('--eval_dir', type=str, default=None, help='Local image folder for latency/agreement report')
+    parser.add_argument('--img_size', type=int, nargs=2, default=DEFAULT_IMG_SIZE)
+    parser.add_argument('--num_calibration', type=int, default=200)
+    parser.add_argument('--max_eval', type=int, default=200)
+    parser.add_argument('--report_json', type=str, default=None)
+
+    args = parser.parse_args()
+
+    main(
+        args.model_path,
+        args.output_dir,
+        args.modes,
+        args.data_dir,
+        args.eval_dir,
+        tuple(args.img_size),
+        args.num_calibration,
+        args.max_eval,
+        args.report_json
+    )
@@ -44,8 +44,10 @@ def _save_misclassified_grid(misclassified: List[dict], out_path: str, max_image
 
 def evaluate(test_dir: str, model_path: str, label_map: str, img_size=(224, 224), batch_size=32,
              report_path: str = None, cm_path: str = None, plots_dir: str = None,
-             report_json: str = None, misclassified_csv: str = None, misclassified_grid: str = None):
-    model, class_names = load_model_and_labels(model_path, label_map)
+             report_json: str = None, misclassified_csv: str = None, misclassified_grid: str = None,
+             traced: bool = False):
+    # traced=True: forward pass lewat ServingModel (tf.function) alih-alih model.predict
+    model, class_names = load_model_and_labels(model_path, label_map, serving=traced)
 
     ds = tf.keras.preprocessing.image_dataset_from_directory(
         test_dir,
@@ -133,6 +135,7 @@ if __name__ == "__main__":
     parser.add_argument('--report_json', type=str, default=None)
     parser.add_argument('--misclassified_csv', type=str, default=None)
     parser.add_argument('--misclassified_grid', type=str, default=None)
+    parser.add_argument('--traced', action='store_true', help='Use the traced tf.function serving path')
 
     args = parser.parse_args()
 
@@ -147,5 +150,6 @@ if __name__ == "__main__":
         args.plots_dir,
         args.report_json,
         args.misclassified_csv,
-        args.misclassified_grid
+        args.misclassified_grid,
+        args.traced
     )
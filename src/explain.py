@@ -1,11 +1,14 @@
-import tensorflow as tf
+import time
+
 import numpy as np
 import cv2
-import matplotlib.cm as cm
 
-def make_gradcam_heatmap(img_array, model, last_conv_layer_name, pred_index=None):
+from .lazy import tf
+
+
+def build_gradcam_model(model, last_conv_layer_name):
     """
-    Generate Grad-CAM heatmap for a specific image and model.
+    Bangun model Grad-CAM: Input -> [output layer konvolusi target, prediksi kelas].
     """
     # 1. Handle Nested Model (Transfer Learning case)
     # Check if the model has a nested 'densenet121' layer (or similar base model layer)
@@ -43,7 +46,7 @@ def make_gradcam_heatmap(img_array, model, last_conv_layer_name, pred_index=None
         # Input: Base Model Input
         # Outputs: [Target Layer Output, Base Model Final Output]
         base_multi_output_model = tf.keras.models.Model(
-            [base_model_layer.inputs], 
+            base_model_layer.inputs, 
             [base_model_layer.get_layer(last_conv_layer_name).output, base_model_layer.output]
         )
         
@@ -77,9 +80,19 @@ def make_gradcam_heatmap(img_array, model, last_conv_layer_name, pred_index=None
     else:
         # SIMPLE CASE: Target layer is directly in the main model
         grad_model = tf.keras.models.Model(
-            [model.inputs], [model.get_layer(last_conv_layer_name).output, model.output]
+            model.inputs, [model.get_layer(last_conv_layer_name).output, model.output]
         )
 
+    return grad_model
+
+
+def make_gradcam_heatmap(img_array, model, last_conv_layer_name, pred_index=None):
+    """
+    Generate Grad-CAM heatmap for a specific image and model.
+    Graph Grad-CAM dibangun ulang setiap panggilan; untuk serving gunakan GradCamExplainer.
+    """
+    grad_model = build_gradcam_model(model, last_conv_layer_name)
+
     # 2. Rekam operasi untuk menghitung gradien
     with tf.GradientTape() as tape:
         last_conv_layer_output, preds = grad_model(img_array)
@@ -102,37 +115,82 @@ def make_gradcam_heatmap(img_array, model, last_conv_layer_name, pred_index=None
     heatmap = tf.maximum(heatmap, 0) / tf.math.reduce_max(heatmap)
     return heatmap.numpy()
 
-def save_and_display_gradcam(img_path, heatmap, cam_path="cam.jpg", alpha=0.4):
+# Segment data colormap 'jet' (sama dengan matplotlib): (posisi, nilai) per kanal
+_JET_SEGMENTS = {
+    "red": ((0.0, 0.0), (0.35, 0.0), (0.66, 1.0), (0.89, 1.0), (1.0, 0.5)),
+    "green": ((0.0, 0.0), (0.125, 0.0), (0.375, 1.0), (0.64, 1.0), (0.91, 0.0), (1.0, 0.0)),
+    "blue": ((0.0, 0.5), (0.11, 1.0), (0.34, 1.0), (0.65, 0.0), (1.0, 0.0)),
+}
+
+
+def _build_jet_lut() -> np.ndarray:
+    """LUT (256, 1, 3) uint8 BGR untuk cv2.applyColorMap, dihitung sekali saat import."""
+    x = np.linspace(0.0, 1.0, 256)
+    channels = []
+    for name in ("blue", "green", "red"):
+        pos, val = zip(*_JET_SEGMENTS[name])
+        channels.append(np.interp(x, pos, val))
+    return np.uint8(255 * np.stack(channels, axis=1))[:, None, :]
+
+
+JET_LUT = _build_jet_lut()
+
+_ENCODE_PARAMS = {
+    "jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+
+
+def render_overlay(img, heatmap, alpha=0.4, max_side=None):
     """
-    Overlay heatmap on original image and save it.
+    Overlay heatmap di atas gambar, seluruhnya uint8.
+
+    Gambar diperkecil dulu ke resolusi tampilan (sisi terpanjang <= `max_side`,
+    None = resolusi asli), heatmap kecil (mis. 6x6 atau 192x192) di-resize
+    sebagai indeks uint8 lalu diwarnai lewat LUT jet, kemudian di-blend
+    dengan saturasi: img + alpha * jet.
+    `img` boleh path file, ImageContext, atau array BGR yang sudah di-decode.
     """
-    # 1. Load image asli
-    img = cv2.imread(img_path)
-    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB) # OpenCV loads BGR, convert to RGB
+    if isinstance(img, str):
+        img = cv2.imread(img)
+    elif hasattr(img, "bgr"):
+        img = img.bgr
 
-    # 2. Rescale heatmap ke ukuran image asli (0-255)
-    heatmap = np.uint8(255 * heatmap)
+    h, w = img.shape[:2]
+    # Faktor bulat (sisi terpanjang <= max_side): INTER_AREA dengan faktor bulat ~2.5x lebih cepat
+    step = -(-max(h, w) // max_side) if max_side else 1
+    if step > 1:
+        w, h = max(1, w // step), max(1, h // step)
+        img = cv2.resize(img, (w, h), interpolation=cv2.INTER_AREA)
 
-    # 3. Gunakan colormap jet (Biru = rendah, Merah = tinggi)
-    jet = cm.get_cmap("jet")
-    
-    # Ambil nilai warna RGB dari colormap
-    jet_colors = jet(np.arange(256))[:, :3]
-    jet_heatmap = jet_colors[heatmap]
+    index = np.uint8(255 * np.clip(np.nan_to_num(np.asarray(heatmap, dtype=np.float32)), 0.0, 1.0))
+    index = cv2.resize(index, (w, h), interpolation=cv2.INTER_LINEAR)
+    jet = cv2.applyColorMap(index, JET_LUT)
+    return cv2.addWeighted(img, 1.0, jet, alpha, 0.0)
 
-    # 4. Resize heatmap agar sama dengan ukuran gambar asli
-    jet_heatmap = cv2.resize(jet_heatmap, (img.shape[1], img.shape[0]))
-    
-    # Konversi ke format uint8 (0-255)
-    jet_heatmap =  np.uint8(255 * jet_heatmap)
-    
-    # Karena OpenCV pakai BGR, kita balik urutan warnanya
-    jet_heatmap = cv2.cvtColor(jet_heatmap, cv2.COLOR_RGB2BGR)
-    img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR) # Balikkan lagi img ke BGR untuk save
 
-    # 5. Gabungkan gambar asli dengan heatmap
-    superimposed_img = jet_heatmap * alpha + img
-    superimposed_img = np.clip(superimposed_img, 0, 255).astype('uint8')
+def encode_overlay(img, heatmap, alpha=0.4, max_side=1024, fmt="jpeg", quality=85) -> bytes:
+    """Overlay pada resolusi tampilan -> bytes JPEG/WebP di memori (tanpa file sementara)."""
+    ext, flag = _ENCODE_PARAMS[fmt]
+    ok, buf = cv2.imencode(ext, render_overlay(img, heatmap, alpha, max_side), [flag, int(quality)])
+    if not ok:
+        raise ValueError(f"Failed to encode heatmap as {fmt}")
+    return buf.tobytes()
+
+
+def render_gradcam(img, heatmap, alpha=0.4):
+    """
+    Overlay heatmap on original image (tanpa menulis ke disk).
+    Return: array BGR uint8 seukuran gambar asli.
+    """
+    return render_overlay(img, heatmap, alpha, max_side=None)
+
+
+def save_and_display_gradcam(img, heatmap, cam_path="cam.jpg", alpha=0.4):
+    """
+    Overlay heatmap on original image and save it.
+    """
+    superimposed_img = render_gradcam(img, heatmap, alpha)
 
     # 6. Simpan hasil
     cv2.imwrite(cam_path, superimposed_img)
@@ -184,3 +242,57 @@ def find_target_layer(model):
 
     # Start search
     return search_in_model(model)
+
+
+class GradCamExplainer:
+    """
+    Grad-CAM siap serving: dibuat SEKALI per model yang dimuat.
+
+    Menyimpan nama target layer dan graph Grad-CAM, lalu men-trace satu
+    `tf.function` yang mengembalikan probabilitas kelas DAN heatmap dari satu
+    forward pass (gradien dihitung terhadap kelas argmax masing-masing gambar).
+    """
+
+    def __init__(self, model, target_layer=None):
+        self.model = model
+        self.target_layer = target_layer or find_target_layer(model)
+        if not self.target_layer:
+            raise ValueError("Could not find target layer for Grad-CAM.")
+        self.grad_model = build_gradcam_model(model, self.target_layer)
+
+        self.input_shape = (None,) + tuple(model.inputs[0].shape[1:])
+        self._explain_fn = tf.function(
+            self._explain,
+            input_signature=[tf.TensorSpec(self.input_shape, tf.float32)],
+        )
+
+    def _explain(self, x):
+        with tf.GradientTape() as tape:
+            conv_output, preds = self.grad_model(x, training=False)
+            pred_index = tf.argmax(preds, axis=1)
+            class_channel = tf.gather(preds, pred_index, axis=1, batch_dims=1)
+
+        # Gradien per gambar (gambar dalam batch saling independen)
+        grads = tape.gradient(class_channel, conv_output)
+        pooled_grads = tf.reduce_mean(grads, axis=(1, 2))
+
+        heatmap = tf.einsum('bhwc,bc->bhw', conv_output, pooled_grads)
+        heatmap = tf.maximum(heatmap, 0)
+        heatmap = tf.math.divide_no_nan(heatmap, tf.reduce_max(heatmap, axis=(1, 2), keepdims=True))
+        return preds, heatmap
+
+    def explain_batch(self, x):
+        """Batch (N, H, W, 3) -> (probs (N, C), heatmaps (N, h, w)). Dipakai oleh MicroBatcher."""
+        preds, heatmaps = self._explain_fn(tf.convert_to_tensor(x, dtype=tf.float32))
+        return preds.numpy(), heatmaps.numpy()
+
+    def warmup(self) -> float:
+        """Trace tf.function (sekali, batch dinamis); return waktu dalam ms."""
+        start = time.perf_counter()
+        self.explain_batch(np.zeros((1,) + self.input_shape[1:], dtype=np.float32))
+        return (time.perf_counter() - start) * 1000.0
+
+    def explain(self, x):
+        """Satu gambar (H, W, 3) -> (probs (C,), heatmap (h, w))."""
+        preds, heatmaps = self.explain_batch(np.expand_dims(x, 0))
+        return preds[0], heatmaps[0]
@@ -0,0 +1,260 @@
+"""
+Export model Keras ke artefak inference-only (.pb) untuk serving.
+
+Model dari build_model_improved masih membawa layer augmentasi (RandomFlip,
+RandomRotation, ...) dan Dropout; setiap load men-deserialisasi semuanya.
+Export ini:
+
+1. membuang layer training-only (augmentasi + dropout)
+2. men-trace satu signature serving (batch dinamis, H x W x 3, float32)
+3. membekukan bobot jadi konstanta, lalu Grappler mem-fold konstanta dan
+   batch norm (BN setelah conv dilebur ke kernel conv)
+4. membundel label map + ukuran input ke dalam GraphDef (node `export_metadata`)
+
+Output diverifikasi terhadap model asli (max abs diff + top-1 agreement) pada
+gambar dari `--eval_dir` (atau input acak), dan waktu load dibandingkan
+dengan `tf.keras.models.load_model`.
+
+Contoh:
+    python -m src.export --eval_dir data/val
+    python -m src.export --resolutions 160 128     # + densenet121_best_160.pb, densenet121_best_128.pb
+    MODEL_PATH=models/densenet121_best.pb python app.py
+"""
+import os
+import argparse
+import json
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers
+
+from .config import DEFAULT_IMG_SIZE, MODEL_PATH, LABEL_MAP_PATH, SEED
+from .inference import EXPORT_METADATA_NODE, FrozenGraphModel, load_model_and_labels
+from .multires import parse_resolutions, variant_path, with_input_size
+from .preprocess import load_and_preprocess
+from .utils import list_images
+
+# Layer yang hanya aktif saat training (identity saat inference)
+TRAINING_ONLY_LAYERS = (
+    layers.RandomFlip, layers.RandomRotation, layers.RandomZoom, layers.RandomTranslation,
+    layers.RandomBrightness, layers.RandomContrast,
+    layers.Dropout, layers.SpatialDropout2D, layers.GaussianNoise, layers.GaussianDropout, layers.AlphaDropout,
+)
+# Pass Grappler (urutan sama dengan converter TF.js): fold konstanta/BN, hapus node mati
+GRAPPLER_PASSES = ['pruning', 'constfold', 'arithmetic', 'dependency', 'pruning', 'remap',
+                   'constfold', 'arithmetic', 'dependency']
+
+
+def strip_training_layers(model):
+    """Salinan model (bobot dipakai bersama) dengan layer training-only diganti Identity."""
+    removed = []
+
+    def clone(layer):
+        if isinstance(layer, TRAINING_ONLY_LAYERS):
+            removed.append(layer.name)
+            return layers.Identity(name=layer.name)
+        return layer
+
+    return tf.keras.models.clone_model(model, clone_function=clone), removed
+
+
+def freeze(model, img_size=DEFAULT_IMG_SIZE, optimize: bool = True):
+    """GraphDef beku (+ dioptimasi Grappler) untuk forward pass; return (graph_def, nama input, nama output)."""
+    from tensorflow.python.framework.convert_to_constants import convert_variables_to_constants_v2
+
+    @tf.function
+    def serve(x):
+        return model(x, training=False)
+
+    concrete = serve.get_concrete_function(tf.TensorSpec((None, img_size[0], img_size[1], 3), tf.float32))
+    frozen = convert_variables_to_constants_v2(concrete)
+    graph_def = frozen.graph.as_graph_def()
+    inp, out = frozen.inputs[0], frozen.outputs[0]
+    if optimize:
+        graph_def = _run_grappler(graph_def, frozen.graph, inp, out)
+    return graph_def, inp.name, out.name
+
+
+def _run_grappler(graph_def, graph, inp, out):
+    # API Grappler offline hanya ada di tensorflow.python (dipakai juga oleh converter TFLite/TF.js)
+    from tensorflow.core.protobuf import config_pb2
+    from tensorflow.python.grappler import tf_optimizer
+
+    meta = tf.compat.v1.train.export_meta_graph(graph_def=graph_def, graph=graph)
+    signature = meta.signature_def['serving_default']
+    for info, tensor in ((signature.inputs['x'], inp), (signature.outputs['y'], out)):
+        info.name = tensor.name
+        info.dtype = tensor.dtype.as_datatype_enum
+        info.tensor_shape.CopyFrom(tensor.shape.as_proto())
+    # Node output harus di-fetch agar tidak ikut dipangkas
+    meta.collection_def['train_op'].node_list.value.append(out.name.split(':')[0])
+
+    config = config_pb2.ConfigProto()
+    rewrite = config.graph_options.rewrite_options
+    rewrite.optimizers.extend(GRAPPLER_PASSES)
+    rewrite.meta_optimizer_iterations = 2  # TWO
+    return tf_optimizer.OptimizeGraph(config, meta)
+
+
+def attach_metadata(graph_def, metadata: dict):
+    """Tambahkan node Const string berisi metadata JSON (tidak terhubung ke graph forward)."""
+    node = graph_def.node.add()
+    node.name = EXPORT_METADATA_NODE
+    node.op = 'Const'
+    node.attr['dtype'].type = tf.string.as_datatype_enum
+    node.attr['value'].tensor.CopyFrom(tf.make_tensor_proto(json.dumps(metadata).encode('utf-8')))
+    return graph_def
+
+
+def verification_inputs(eval_dir: str = None, img_size=DEFAULT_IMG_SIZE, max_images: int = 32) -> np.ndarray:
+    """Batch gambar dari `eval_dir` (preprocessing serving), atau input acak 0-255 bila tidak ada."""
+    paths = list_images(eval_dir)[:max_images] if eval_dir else []
+    if paths:
+        return np.stack([load_and_preprocess(p, target_size=img_size) for p in paths])
+    rng = np.random.RandomState(SEED)
+    return rng.uniform(0, 255, (8, img_size[0], img_size[1], 3)).astype(np.float32)
+
+
+def verify(reference, exported, x: np.ndarray, batch_size: int = 8) -> dict:
+    ref = np.concatenate([reference.predict(x[i:i + batch_size], verbose=0) for i in range(0, len(x), batch_size)])
+    out = np.concatenate([exported.predict(x[i:i + batch_size]) for i in range(0, len(x), batch_size)])
+    return {
+        'num_inputs': int(len(x)),
+        'max_abs_diff': float(np.max(np.abs(ref - out))),
+        'top1_agreement': float(np.mean(np.argmax(ref, axis=1) == np.argmax(out, axis=1))),
+    }
+
+
+def measure_load(model_path: str, export_path: str, label_map_path: str) -> dict:
+    """Waktu load (+ predict pertama, termasuk trace) Keras vs artefak export."""
+    report = {}
+    for name, load in (('keras', lambda: tf.keras.models.load_model(model_path)),
+                       ('export', lambda: load_model_and_labels(export_path, label_map_path)[0])):
+        start = time.perf_counter()
+        model = load()
+        loaded = time.perf_counter()
+        model.predict(np.zeros((1,) + tuple(model.input_shape[1:]), dtype=np.float32), verbose=0)
+        report[name] = {'load_s': loaded - start, 'load_and_first_predict_s': time.perf_counter() - start}
+    return report
+
+
+def _export_graph(model, class_names, img_size, output_path: str, source_model: str, eval_dir: str = None,
+                  max_eval: int = 32, atol: float = 1e-4, optimize: bool = True):
+    """Satu artefak .pb untuk `img_size`; file hanya ditulis bila lolos verifikasi."""
+    slim, removed = strip_training_layers(model)
+    graph_def, input_name, output_name = freeze(slim, img_size, optimize=optimize)
+
+    metadata = {
+        'class_names': class_names,
+        'input_size': list(img_size),
+        'input': input_name,
+        'output': output_name,
+        'source_model': source_model,
+        'removed_layers': removed,
+        'grappler': optimize,
+        'exported_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    attach_metadata(graph_def, metadata)
+
+    x = verification_inputs(eval_dir, img_size, max_eval)
+    verification = verify(model, FrozenGraphModel(graph_def=graph_def), x)
+    if verification['max_abs_diff'] > atol:
+        raise ValueError(f"Exported graph does not match {source_model} at {img_size}: {verification}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'wb') as f:
+        f.write(graph_def.SerializeToString())
+    return graph_def, removed, verification
+
+
+def export(model_path: str = MODEL_PATH, label_map_path: str = LABEL_MAP_PATH, output_path: str = None,
+           img_size=DEFAULT_IMG_SIZE, eval_dir: str = None, max_eval: int = 32, atol: float = 1e-4,
+           optimize: bool = True, resolutions=()) -> dict:
+    """
+    Export + verifikasi; raise ValueError (file tidak ditulis) bila output berbeda lebih dari `atol`.
+    `resolutions` (mis. [160, 128]): artefak tambahan `<output>_<sisi>.pb` dengan bobot yang sama,
+    untuk resolusi adaptif (src/multires.py).
+    """
+    output_path = output_path or os.path.splitext(model_path)[0] + '.pb'
+    model, class_names = load_model_and_labels(model_path, label_map_path)
+    source = os.path.basename(model_path)
+    graph_def, removed, verification = _export_graph(model, class_names, img_size, output_path, source,
+                                                     eval_dir, max_eval, atol, optimize)
+
+    variants = {}
+    for size in parse_resolutions(resolutions) if resolutions else []:
+        if size == tuple(img_size):
+            continue
+        path = variant_path(output_path, size)
+        _, _, variant_verification = _export_graph(with_input_size(model, size), class_names, size, path, source,
+                                                   eval_dir, max_eval, atol, optimize)
+        variants[f"{size[0]}x{size[1]}"] = {'output_path': path, 'verification': variant_verification}
+
+    return {
+        'model_path': model_path,
+        'output_path': output_path,
+        'size_mb': {'keras': os.path.getsize(model_path) / 1e6, 'export': os.path.getsize(output_path) / 1e6},
+        'num_nodes': len(graph_def.node),
+        'removed_layers': removed,
+        'verification': verification,
+        'variants': variants,
+        'load': measure_load(model_path, output_path, label_map_path),
+    }
+
+
+def _print_report(report: dict):
+    v = report['verification']
+    print(f"\nSaved {report['output_path']} ({report['num_nodes']} nodes, "
+          f"{report['size_mb']['keras']:.1f} MB -> {report['size_mb']['export']:.1f} MB)")
+    print(f"Removed layers: {', '.join(report['removed_layers']) or '-'}")
+    print(f"Verification on {v['num_inputs']} inputs: max abs diff {v['max_abs_diff']:.2e}, "
+          f"top-1 agreement {v['top1_agreement'] * 100:.2f}%")
+    print(f"{'artifact':<10} {'load s':>9} {'load+predict s':>15}")
+    for name, r in report['load'].items():
+        print(f"{name:<10} {r['load_s']:>9.2f} {r['load_and_first_predict_s']:>15.2f}")
+    for name, r in report['variants'].items():
+        print(f"Variant {name}: {r['output_path']} (max abs diff {r['verification']['max_abs_diff']:.2e})")
+
+
+def main(model_path: str, label_map_path: str, output_path: str = None, img_size=DEFAULT_IMG_SIZE,
+         eval_dir: str = None, max_eval: int = 32, atol: float = 1e-4, optimize: bool = True,
+         report_json: str = None, resolutions=()) -> dict:
+    report = export(model_path, label_map_path, output_path, img_size, eval_dir, max_eval, atol, optimize,
+                    resolutions)
+    _print_report(report)
+    if report_json:
+        os.makedirs(os.path.dirname(report_json) or ".", exist_ok=True)
+        with open(report_json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model_path', type=str, default=MODEL_PATH)
+    parser.add_argument('--label_map', type=str, default=LABEL_MAP_PATH)
+    parser.add_argument('--output_path', type=str, default=None, help='Default: <model_path tanpa ekstensi>.pb')
+    parser.add_argument('--img_size', type=int, nargs=2, default=DEFAULT_IMG_SIZE)
+    parser.add_argument('--eval_dir', type=str, default=None, help='Gambar untuk verifikasi (default: input acak)')
+    parser.add_argument('--max_eval', type=int, default=32)
+    parser.add_argument('--atol', type=float, default=1e-4, help='Selisih probabilitas maksimum yang diterima')
+    parser.add_argument('--no_grappler', action='store_true', help='Hanya bekukan bobot, tanpa optimasi graph')
+    parser.add_argument('--report_json', type=str, default=None)
+    parser.add_argument('--resolutions', type=int, nargs='*', default=[],
+                        help='Resolusi tambahan (serving adaptif), mis. 160 128 -> <output>_160.pb, <output>_128.pb')
+
+    args = parser.parse_args()
+
+    main(
+        args.model_path,
+        args.label_map,
+        args.output_path,
+        tuple(args.img_size),
+        args.eval_dir,
+        args.max_eval,
+        args.atol,
+        not args.no_grappler,
+        args.report_json,
+        args.resolutions
+    )
@@ -1,18 +1,174 @@
 import os
 import json
+import threading
+import time
 import numpy as np
-import tensorflow as tf
-from typing import Tuple, List
-from .preprocess import load_and_preprocess
+from typing import List, Optional, Tuple
+from .preprocess import load_and_preprocess, ImageContext
+from .config import TFLITE_NUM_THREADS, SERVING_WARMUP_BATCH_SIZES
+from .lazy import tf
+from .batching import wait_result
+from .tta import predict_tta, submit_tta
 
+try:
+    from ai_edge_litert.interpreter import Interpreter as _TFLiteInterpreter
+except Exception:
+    _TFLiteInterpreter = None  # fallback ke tf.lite.Interpreter (TensorFlow di-import saat dipakai)
 
-def load_model_and_labels(model_path: str, label_map_path: str):
+
+class _WarmupMixin:
+    """`warmup` bersama untuk backend serving dengan `predict` + `input_shape`."""
+
+    def warmup(self, batch_sizes=(1,)) -> dict:
+        """Jalankan sekali per ukuran batch (alokasi / trace); return waktu (ms) per ukuran."""
+        timings = {}
+        for n in batch_sizes:
+            start = time.perf_counter()
+            self.predict(np.zeros((n,) + self.input_shape[1:], dtype=np.float32))
+            timings[int(n)] = (time.perf_counter() - start) * 1000.0
+        return timings
+
+
+class _TensorForward(_WarmupMixin):
+    """predict / __call__ di atas `self._forward` (tf.function atau graph beku yang di-prune)."""
+
+    def predict(self, x, verbose=0) -> np.ndarray:
+        return self._forward(tf.convert_to_tensor(x, dtype=tf.float32)).numpy()
+
+    def __call__(self, x, training=False):
+        return self._forward(tf.convert_to_tensor(x, dtype=tf.float32))
+
+    def warmup(self, batch_sizes=(1, 2, 4, 8)) -> dict:
+        return super().warmup(batch_sizes)
+
+
+class TFLiteModel(_WarmupMixin):
+    """
+    Backend TFLite (float16 / INT8) dengan interface yang sama seperti model
+    Keras untuk inference: `predict(x, verbose=0)` dengan x (N, H, W, 3) float32.
+    """
+
+    def __init__(self, model_path: str, num_threads: int = None):
+        self.model_path = model_path
+        interpreter_cls = _TFLiteInterpreter or tf.lite.Interpreter
+        self.interpreter = interpreter_cls(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.input_shape = tuple(int(d) for d in self._input['shape_signature'])
+        # Interpreter tidak thread-safe; MicroBatcher tetap memanggil dari satu thread
+        self._lock = threading.Lock()
+
+    def predict(self, x, verbose=0) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float32)
+        inp, out = self._input, self._output
+        with self._lock:
+            if tuple(inp['shape']) != x.shape:
+                self.interpreter.resize_tensor_input(inp['index'], list(x.shape))
+                self.interpreter.allocate_tensors()
+                self._input = inp = self.interpreter.get_input_details()[0]
+                self._output = out = self.interpreter.get_output_details()[0]
+
+            if inp['dtype'] != np.float32:
+                # Model full-integer: kuantisasi input sesuai scale/zero-point
+                scale, zero_point = inp['quantization']
+                x = np.round(x / scale + zero_point)
+                info = np.iinfo(inp['dtype'])
+                x = np.clip(x, info.min, info.max).astype(inp['dtype'])
+
+            self.interpreter.set_tensor(inp['index'], x)
+            self.interpreter.invoke()
+            preds = self.interpreter.get_tensor(out['index'])
+
+        if out['dtype'] != np.float32:
+            scale, zero_point = out['quantization']
+            preds = (preds.astype(np.float32) - zero_point) * scale
+        return preds
+
+
+# Node Const berisi metadata JSON (label, ukuran input, nama tensor) di artefak src/export.py
+EXPORT_METADATA_NODE = "export_metadata"
+
+
+def read_export_metadata(graph_def) -> dict:
+    for node in graph_def.node:
+        if node.name == EXPORT_METADATA_NODE:
+            return json.loads(node.attr["value"].tensor.string_val[0].decode("utf-8"))
+    raise ValueError(f"Graph has no '{EXPORT_METADATA_NODE}' node (not created by src.export?)")
+
+
+class FrozenGraphModel(_TensorForward):
+    """
+    Artefak inference dari src/export.py: GraphDef beku (.pb) tanpa layer
+    augmentasi/dropout, konstanta & batch norm sudah di-fold, plus metadata
+    (label, ukuran input). Dimuat tanpa deserialisasi Keras; interface sama
+    dengan ServingModel.
+    """
+
+    def __init__(self, model_path: str = None, graph_def=None):
+        if graph_def is None:
+            graph_def = tf.compat.v1.GraphDef()
+            with open(model_path, 'rb') as f:
+                graph_def.ParseFromString(f.read())
+        self.model_path = model_path
+        self.metadata = read_export_metadata(graph_def)
+        self.class_names = list(self.metadata["class_names"])
+        height, width = self.metadata["input_size"]
+        self.input_shape = (None, height, width, 3)
+
+        wrapped = tf.compat.v1.wrap_function(lambda: tf.compat.v1.import_graph_def(graph_def, name=""), [])
+        self._forward = wrapped.prune(wrapped.graph.get_tensor_by_name(self.metadata["input"]),
+                                      wrapped.graph.get_tensor_by_name(self.metadata["output"]))
+
+
+class ServingModel(_TensorForward):
+    """
+    Wrapper model Keras untuk serving.
+
+    `model.predict` menyiapkan data adapter + callback loop di setiap panggilan.
+    Di sini forward pass dijalankan lewat satu `tf.function` dengan input
+    signature tetap (batch dinamis, H x W x 3), di-trace sekali saat warmup.
+    """
+
+    def __init__(self, keras_model):
+        self.keras_model = keras_model
+        self.input_shape = (None,) + tuple(keras_model.inputs[0].shape[1:])
+        self._forward = tf.function(
+            lambda x: keras_model(x, training=False),
+            input_signature=[tf.TensorSpec(self.input_shape, tf.float32)],
+        )
+
+
+def load_model_and_labels(model_path: str, label_map_path: str, serving: bool = False, warmup: bool = True):
+    """
+    Muat model + label map. `serving=True` membungkus model Keras dengan
+    ServingModel dan (kecuali `warmup=False`) melakukan warmup pada
+    SERVING_WARMUP_BATCH_SIZES. Artefak `.pb` (src/export.py) membawa label
+    map sendiri; file label map hanya dicek kecocokannya bila ada.
+    """
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Model not found at {model_path}")
+    if model_path.endswith('.pb'):
+        model = FrozenGraphModel(model_path)
+        if label_map_path and os.path.exists(label_map_path):
+            with open(label_map_path, 'r', encoding='utf-8') as f:
+                mapping = json.load(f)
+            if [mapping[str(i)] for i in range(len(mapping))] != model.class_names:
+                raise ValueError(f"Label map {label_map_path} does not match the labels bundled in {model_path}")
+        if serving and warmup:
+            model.warmup(SERVING_WARMUP_BATCH_SIZES)
+        return model, model.class_names
     if not os.path.exists(label_map_path):
         raise FileNotFoundError(f"Label map not found at {label_map_path}")
 
-    model = tf.keras.models.load_model(model_path)
+    if model_path.endswith('.tflite'):
+        model = TFLiteModel(model_path, num_threads=TFLITE_NUM_THREADS)
+    else:
+        model = tf.keras.models.load_model(model_path)
+        if serving:
+            model = ServingModel(model)
+            if warmup:
+                model.warmup(SERVING_WARMUP_BATCH_SIZES)
     with open(label_map_path, 'r', encoding='utf-8') as f:
         mapping = json.load(f)
     # Convert to ordered class names list
@@ -20,10 +176,29 @@ def load_model_and_labels(model_path: str, label_map_path: str):
     return model, class_names
 
 
-def predict_image(model, image_path: str, target_size: Tuple[int, int] = (224, 224)) -> Tuple[str, float, np.ndarray]:
-    img = load_and_preprocess(image_path, target_size=target_size)
-    x = np.expand_dims(img, axis=0)
-    preds = model.predict(x, verbose=0)[0]
+def predict_batch(model, x: np.ndarray) -> np.ndarray:
+    """Forward pass untuk batch (N, H, W, 3). Dipakai sebagai `batch_fn` MicroBatcher."""
+    return model.predict(x, verbose=0)
+
+
+def predict_image(model, image, target_size: Tuple[int, int] = (224, 224),
+                  batcher=None, tta: int = 1, timeout: Optional[float] = None) -> Tuple[str, float, np.ndarray]:
+    # `image` boleh path file atau ImageContext (pixel sudah di-decode di memori)
+    # `timeout` (detik) hanya berlaku lewat batcher: TimeoutError dan request dibatalkan dari antrian
+    if isinstance(image, ImageContext):
+        img = image.model_input(target_size)
+    else:
+        img = load_and_preprocess(image, target_size=target_size)
+    if tta > 1:
+        # TTA: semua view dalam satu batch, probabilitas dirata-rata
+        preds = wait_result(submit_tta(batcher, img, tta), timeout) if batcher is not None \
+            else predict_tta(model, img, tta)
+    elif batcher is not None:
+        # Digabung dengan request lain oleh MicroBatcher
+        preds = batcher.predict(img, timeout=timeout)
+    else:
+        x = np.expand_dims(img, axis=0)
+        preds = model.predict(x, verbose=0)[0]
     idx = int(np.argmax(preds))
     conf = float(preds[idx])
     return str(idx), conf, preds  # idx string will be mapped by caller if needed
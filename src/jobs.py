@@ -0,0 +1,109 @@
+"""
+Antrian job latar belakang (dipakai untuk Grad-CAM asinkron).
+
+Halaman hasil prediksi dikirim lebih dulu; heatmap dihitung oleh worker pool
+lalu browser melakukan polling status job. Saat server sibuk, pekerjaan
+heatmap boleh dibuang (prediksi tetap jalan):
+- antrian penuh  -> job baru langsung berstatus "dropped"
+- job terlalu lama menunggu (> max_wait_s) sebelum dikerjakan -> "dropped"
+"""
+import queue
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+DROPPED = "dropped"
+ERROR = "error"
+
+
+class JobQueue:
+    def __init__(self, workers: int = 2, max_queue: int = 32, max_wait_s: float = 30.0,
+                 ttl_s: float = 600.0, name: str = "jobs"):
+        self.max_queue = int(max_queue)
+        self.max_wait_s = float(max_wait_s)
+        self.ttl_s = float(ttl_s)
+        self.name = name
+
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._counters = {"submitted": 0, "completed": 0, "dropped_full": 0, "dropped_stale": 0, "errors": 0}
+        self._workers = [
+            threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True)
+            for i in range(int(workers))
+        ]
+        for t in self._workers:
+            t.start()
+
+    def submit(self, fn: Callable[[], object], cleanup: Optional[Callable[[], None]] = None) -> str:
+        """
+        Daftarkan job; selalu mengembalikan job_id (status bisa langsung 'dropped').
+        `cleanup` dipanggil sekali setelah job selesai, gagal, atau di-drop (mis. melepas handle model).
+        """
+        job_id = uuid.uuid4().hex
+        now = time.monotonic()
+        job = {"status": PENDING, "result": None, "error": None, "created": now, "updated": now}
+        with self._lock:
+            self._purge_expired(now)
+            self._jobs[job_id] = job
+            self._counters["submitted"] += 1
+        try:
+            self._queue.put_nowait((job_id, fn, cleanup))
+        except queue.Full:
+            self._finish(job_id, DROPPED, error="Server sibuk, heatmap dilewati.", counter="dropped_full")
+            if cleanup is not None:
+                cleanup()
+        return job_id
+
+    def status(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {"status": job["status"], "result": job["result"], "error": job["error"]}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters, queue_depth=self._queue.qsize(), max_queue=self.max_queue,
+                        workers=len(self._workers), tracked_jobs=len(self._jobs))
+
+    # ------------------------------------------------------------------
+    def _finish(self, job_id, status, result=None, error=None, counter=None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(status=status, result=result, error=error, updated=time.monotonic())
+            if counter:
+                self._counters[counter] += 1
+
+    def _purge_expired(self, now):
+        expired = [jid for jid, job in self._jobs.items()
+                   if job["status"] in (DONE, DROPPED, ERROR) and now - job["updated"] > self.ttl_s]
+        for jid in expired:
+            del self._jobs[jid]
+
+    def _run(self):
+        while True:
+            job_id, fn, cleanup = self._queue.get()
+            try:
+                with self._lock:
+                    job = self._jobs.get(job_id)
+                    waited = time.monotonic() - job["created"] if job else 0.0
+                if waited > self.max_wait_s:
+                    self._finish(job_id, DROPPED, error="Heatmap kedaluwarsa di antrian.", counter="dropped_stale")
+                    continue
+                self._finish(job_id, RUNNING)
+                try:
+                    result = fn()
+                except Exception as e:  # noqa: BLE001 - error disimpan untuk polling
+                    self._finish(job_id, ERROR, error=str(e), counter="errors")
+                else:
+                    self._finish(job_id, DONE, result=result, counter="completed")
+            finally:
+                if cleanup is not None:
+                    cleanup()
+                self._queue.task_done()
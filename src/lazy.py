@@ -0,0 +1,35 @@
+"""
+Import lazy untuk modul berat (TensorFlow).
+
+`import tensorflow` memakan beberapa detik. Modul serving memakai proxy `tf`
+dari sini sehingga `import app` tetap cepat; TensorFlow baru benar-benar
+di-import saat atribut pertama diakses (atau saat `tf.load()` dipanggil
+oleh preload).
+"""
+import importlib
+import sys
+
+
+class LazyModule:
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None or self._name in sys.modules
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+tf = LazyModule("tensorflow")
@@ -0,0 +1,214 @@
+"""
+Instrumentasi ringan untuk pipeline prediksi.
+
+Setiap stage (validasi, inference, Grad-CAM, simpan upload, render, ...)
+dicatat sebagai span ke histogram dengan bucket tetap (log-spaced), sehingga
+biaya per observasi hanya perf_counter + bisect + satu lock (~1-2 us) dan
+memori konstan. Quantile p50/p95/p99 diestimasi dari bucket (interpolasi
+linear di dalam bucket) lalu diekspor dalam format teks Prometheus.
+
+Catatan: metrik disimpan per proses (mode prefork = per worker).
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 0.5 ms .. ~60 s, faktor sqrt(2) per bucket
+DEFAULT_BUCKETS = tuple(0.0005 * (2 ** (i / 2.0)) for i in range(35))
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # slot terakhir = +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+            if value > self._max:
+                self._max = value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"counts": list(self._counts), "sum": self._sum, "count": self._count, "max": self._max}
+
+    def quantile(self, q: float, snapshot: Optional[dict] = None) -> Optional[float]:
+        snap = snapshot or self.snapshot()
+        if snap["count"] == 0:
+            return None
+        rank = q * snap["count"]
+        cumulative = 0
+        for i, n in enumerate(snap["counts"]):
+            if n and cumulative + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else snap["max"]
+                upper = min(upper, snap["max"])
+                lower = min(lower, upper)
+                return lower + (upper - lower) * (rank - cumulative) / n
+            cumulative += n
+        return snap["max"]
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> Dict[Tuple, float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class Metrics:
+    """Registry histogram per stage + counter, dengan renderer format Prometheus."""
+
+    def __init__(self, namespace: str = "tomatocare", buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self._buckets = tuple(buckets)
+        self._stages = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()  # recorder per thread (lihat capture)
+
+    def _stage(self, stage: str) -> Histogram:
+        hist = self._stages.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self._stages.setdefault(stage, Histogram(self._buckets))
+        return hist
+
+    def observe(self, stage: str, seconds: float):
+        self._stage(stage).observe(seconds)
+        recorder = getattr(self._local, "recorder", None)
+        if recorder is not None:
+            recorder.append((stage, seconds))
+
+    @contextmanager
+    def span(self, stage: str):
+        """Ukur durasi blok kode sebagai satu observasi untuk `stage` (juga saat exception)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    @contextmanager
+    def capture(self):
+        """Salin juga observasi di thread ini ke list [(stage, detik), ...] (breakdown per request)."""
+        previous = getattr(self._local, "recorder", None)
+        recorder = []
+        self._local.recorder = recorder
+        try:
+            yield recorder
+        finally:
+            self._local.recorder = previous
+
+    def counter(self, name: str, help: str) -> Counter:
+        with self._lock:
+            if name not in self._counters:
+                self._counters[name] = Counter(f"{self.namespace}_{name}", help)
+            return self._counters[name]
+
+    def _stage_items(self) -> List[Tuple[str, Histogram]]:
+        # Snapshot di bawah lock: stage baru bisa dibuat thread lain saat scrape
+        with self._lock:
+            return sorted(self._stages.items())
+
+    def stage_summary(self) -> dict:
+        """Ringkasan JSON per stage: count, rata-rata & quantile dalam ms."""
+        summary = {}
+        for stage, hist in self._stage_items():
+            snap = hist.snapshot()
+            if not snap["count"]:
+                continue
+            entry = {"count": snap["count"], "mean_ms": snap["sum"] / snap["count"] * 1000.0}
+            for q in QUANTILES:
+                entry[f"p{int(q * 100)}_ms"] = hist.quantile(q, snap) * 1000.0
+            summary[stage] = entry
+        return summary
+
+    def render(self, gauges: Optional[List[tuple]] = None) -> str:
+        """
+        Teks exposition Prometheus. `gauges`: list (name, help, [(labels_dict, value), ...])
+        untuk nilai yang dihitung saat scrape (mis. waktu load model).
+        """
+        ns = self.namespace
+        lines = [
+            f"# HELP {ns}_stage_seconds Latency per stage pipeline prediksi (quantile dari histogram).",
+            f"# TYPE {ns}_stage_seconds summary",
+        ]
+        for stage, hist in self._stage_items():
+            snap = hist.snapshot()
+            for q in QUANTILES:
+                value = hist.quantile(q, snap)
+                lines.append(f'{ns}_stage_seconds{{stage="{stage}",quantile="{q}"}} {_fmt(value)}')
+            lines.append(f'{ns}_stage_seconds_sum{{stage="{stage}"}} {_fmt(snap["sum"])}')
+            lines.append(f'{ns}_stage_seconds_count{{stage="{stage}"}} {snap["count"]}')
+
+        with self._lock:
+            counters = list(self._counters.values())
+        for counter in counters:
+            lines.append(f"# HELP {counter.name} {counter.help}")
+            lines.append(f"# TYPE {counter.name} counter")
+            for key, value in sorted(counter.values().items()):
+                lines.append(f"{counter.name}{_labels(dict(key))} {_fmt(value)}")
+
+        for name, help, samples in gauges or []:
+            lines.append(f"# HELP {ns}_{name} {help}")
+            lines.append(f"# TYPE {ns}_{name} gauge")
+            for labels, value in samples:
+                lines.append(f"{ns}_{name}{_labels(labels)} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def time_fn(fn: Callable[[], object], repeats: int = 20, warmup: int = 3) -> dict:
+    """Jalankan `fn` berulang (benchmark / laporan offline); return statistik latensi dalam ms."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    samples = np.array(samples)
+    return {
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "min_ms": float(samples.min()),
+        "repeats": int(repeats),
+    }
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{str(v)}"' for k, v in sorted(labels.items()))
+    return "{" + inner + "}"
+
+
+def _fmt(value) -> str:
+    if value is None:
+        return "NaN"
+    if isinstance(value, float):
+        return repr(round(value, 9))
+    return str(value)
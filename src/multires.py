@@ -0,0 +1,282 @@
+"""
+Resolusi input adaptif untuk serving.
+
+Backbone (DenseNet121 / student distilasi) fully convolutional + GAP, sehingga
+bobot yang sama bisa dijalankan pada input lebih kecil (mis. 160 atau 128)
+dengan biaya komputasi ~ (sisi / 192)^2. Modul ini berisi:
+
+- `with_input_size`: salinan model Keras dengan ukuran input lain (bobot sama)
+- `load_variants`: varian serving per resolusi (Keras, atau file `<stem>_<sisi>.pb`
+  hasil `python -m src.export --resolutions ...`)
+- `ResolutionController`: turun satu tingkat resolusi saat antrian atau
+  latensi melewati batas atas, naik lagi setelah beban di bawah batas bawah
+  selama `cooldown_s` (histeresis agar tidak bolak-balik)
+- CLI laporan offline akurasi + latensi per resolusi pada validation set:
+
+    python -m src.multires --val_dir data/val --resolutions 192 160 128 --output results/resolution_report.json
+"""
+import os
+import argparse
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .config import DEFAULT_IMG_SIZE, MODEL_PATH, LABEL_MAP_PATH, BATCH_MAX_SIZE
+from .metrics import time_fn
+from .preprocess import preprocess_image_bgr
+
+
+def with_input_size(model, img_size: Tuple[int, int]):
+    """Bangun ulang model Keras (fungsional, boleh nested) dengan input (H, W, 3) baru; bobot disalin."""
+    def resize(cfg):
+        if isinstance(cfg, dict):
+            # build_config menyimpan shape lama; layer di-build ulang dari graph
+            out = {k: resize(v) for k, v in cfg.items() if k != 'build_config'}
+            if cfg.get('class_name') == 'InputLayer':
+                shape = list(out['config']['batch_shape'])
+                shape[1:3] = list(img_size)
+                out['config']['batch_shape'] = shape
+            return out
+        if isinstance(cfg, list):
+            return [resize(v) for v in cfg]
+        return cfg
+
+    resized = model.__class__.from_config(resize(model.get_config()))
+    resized.set_weights(model.get_weights())
+    return resized
+
+
+def parse_resolutions(value) -> List[Tuple[int, int]]:
+    """'160,128' / [160, 128] -> [(160, 160), (128, 128)] (urut dari besar ke kecil, tanpa duplikat)."""
+    if isinstance(value, str):
+        value = value.replace(',', ' ').split()
+    sizes = {int(v) for v in value}
+    if any(s < 32 for s in sizes):
+        raise ValueError("Resolusi minimal 32")
+    return [(s, s) for s in sorted(sizes, reverse=True)]
+
+
+def variant_path(model_path: str, img_size: Tuple[int, int]) -> str:
+    """models/densenet121_best.pb -> models/densenet121_best_160.pb (artefak export per resolusi)."""
+    stem, ext = os.path.splitext(model_path)
+    suffix = str(img_size[0]) if img_size[0] == img_size[1] else f"{img_size[0]}x{img_size[1]}"
+    return f"{stem}_{suffix}{ext}"
+
+
+class ResolutionVariant:
+    """Model (+ Grad-CAM) untuk satu resolusi; batcher dibuat lazily oleh app."""
+
+    def __init__(self, img_size: Tuple[int, int], model, explainer=None):
+        self.img_size = tuple(img_size)
+        self.model = model
+        self.explainer = explainer
+        self.batcher = None
+        self.explain_batcher = None
+
+
+def load_variants(model, model_path: str, sizes: Sequence[Tuple[int, int]],
+                  warmup_batch_sizes=(1,)) -> Dict[Tuple[int, int], ResolutionVariant]:
+    """
+    Varian serving per resolusi untuk model yang sudah dimuat. Keras: dibangun
+    ulang dari bobot yang sama; `.pb`: dimuat dari `variant_path` bila ada.
+    Backend lain (TFLite) dilewati.
+    """
+    from .explain import GradCamExplainer
+    from .inference import FrozenGraphModel, ServingModel
+
+    keras_model = getattr(model, 'keras_model', None)
+    variants = {}
+    for size in sizes:
+        size = tuple(size)
+        explainer = None
+        if keras_model is not None:
+            variant_model = ServingModel(with_input_size(keras_model, size))
+            try:
+                explainer = GradCamExplainer(variant_model.keras_model)
+                explainer.warmup()
+            except Exception as e:
+                print(f"[WARNING] Grad-CAM tidak tersedia untuk resolusi {size}: {e}")
+                explainer = None
+        elif model_path.endswith('.pb') and os.path.exists(variant_path(model_path, size)):
+            variant_model = FrozenGraphModel(variant_path(model_path, size))
+        else:
+            print(f"[WARNING] Tidak ada varian resolusi {size} untuk {model_path}, dilewati.")
+            continue
+        variant_model.warmup(warmup_batch_sizes)
+        variants[size] = ResolutionVariant(size, variant_model, explainer)
+    return variants
+
+
+class ResolutionController:
+    """
+    Pilih resolusi input per request dari kedalaman antrian + EWMA latensi inference.
+
+    - turun satu tingkat bila queue_depth >= queue_high ATAU latensi >= latency_high_ms
+      (paling cepat setiap `min_dwell_s`, agar efek penurunan sempat terlihat)
+    - naik satu tingkat bila queue_depth <= queue_low DAN latensi <= latency_low_ms,
+      dan resolusi sudah bertahan minimal `cooldown_s`
+    """
+
+    def __init__(self, resolutions: Sequence[Tuple[int, int]], queue_high: int = 4, queue_low: int = 0,
+                 latency_high_ms: float = 1500.0, latency_low_ms: float = 500.0, cooldown_s: float = 15.0,
+                 min_dwell_s: float = 2.0, ewma_alpha: float = 0.2, clock=time.monotonic):
+        if not resolutions:
+            raise ValueError("resolutions tidak boleh kosong")
+        self.resolutions = [tuple(r) for r in resolutions]  # index 0 = resolusi penuh
+        self.queue_high = queue_high
+        self.queue_low = queue_low
+        self.latency_high_ms = latency_high_ms
+        self.latency_low_ms = latency_low_ms
+        self.cooldown_s = cooldown_s
+        self.min_dwell_s = min_dwell_s
+        self.ewma_alpha = ewma_alpha
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._level = 0
+        self._latency_s = None
+        self._last_switch = clock()
+        self._switches = {"down": 0, "up": 0}
+        self._last_reason = None
+
+    def observe(self, seconds: float):
+        """Latensi inference satu request (detik) pada resolusi yang sedang dipakai."""
+        with self._lock:
+            if self._latency_s is None:
+                self._latency_s = seconds
+            else:
+                self._latency_s += self.ewma_alpha * (seconds - self._latency_s)
+
+    def select(self, queue_depth: int = 0) -> Tuple[int, int]:
+        with self._lock:
+            now = self._clock()
+            latency_ms = self._latency_s * 1000.0 if self._latency_s is not None else 0.0
+            since = now - self._last_switch
+            if queue_depth >= self.queue_high or latency_ms >= self.latency_high_ms:
+                if self._level < len(self.resolutions) - 1 and since >= self.min_dwell_s:
+                    self._switch(+1, now, f"queue_depth={queue_depth} latency_ms={latency_ms:.0f}")
+            elif queue_depth <= self.queue_low and latency_ms <= self.latency_low_ms:
+                if self._level > 0 and since >= self.cooldown_s:
+                    self._switch(-1, now, f"queue_depth={queue_depth} latency_ms={latency_ms:.0f}")
+            return self.resolutions[self._level]
+
+    def _switch(self, step: int, now: float, reason: str):
+        self._level += step
+        self._last_switch = now
+        self._switches["down" if step > 0 else "up"] += 1
+        self._last_reason = reason
+        # EWMA lama berasal dari resolusi sebelumnya: mulai ulang
+        self._latency_s = None
+        print(f"[RESOLUTION] -> {self.resolutions[self._level]} ({reason})")
+
+    @property
+    def current(self) -> Tuple[int, int]:
+        with self._lock:
+            return self.resolutions[self._level]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "resolutions": [list(r) for r in self.resolutions],
+                "current": list(self.resolutions[self._level]),
+                "latency_ms_ewma": self._latency_s * 1000.0 if self._latency_s is not None else None,
+                "switches_down": self._switches["down"],
+                "switches_up": self._switches["up"],
+                "last_reason": self._last_reason,
+            }
+
+
+# --- Laporan offline -------------------------------------------------------
+
+def load_validation_set(val_dir: str, class_names: List[str], max_images: Optional[int] = None):
+    """(list gambar BGR, label int) dari folder per kelas; nama folder harus ada di label map."""
+    from .utils import list_images  # utils mengimpor TensorFlow; app hanya butuh controller
+
+    images, labels = [], []
+    for idx, name in enumerate(class_names):
+        folder = os.path.join(val_dir, name)
+        if not os.path.isdir(folder):
+            continue
+        for path in list_images(folder):
+            img = cv2.imread(path)
+            if img is not None:
+                images.append(img)
+                labels.append(idx)
+    if not images:
+        raise FileNotFoundError(f"No images for classes {class_names} in {val_dir}")
+    if max_images and len(images) > max_images:
+        keep = np.random.RandomState(0).choice(len(images), max_images, replace=False)
+        images, labels = [images[i] for i in sorted(keep)], [labels[i] for i in sorted(keep)]
+    return images, np.array(labels)
+
+
+def _latency(model, x: np.ndarray, repeats: int) -> dict:
+    return time_fn(lambda: model.predict(x, verbose=0), repeats, warmup=1)
+
+
+def resolution_report(model_path: str, label_map_path: str, val_dir: str, resolutions, max_images: int = None,
+                      batch_size: int = BATCH_MAX_SIZE, repeats: int = 30) -> dict:
+    """Akurasi, agreement dengan resolusi penuh, dan latensi CPU (batch 1 & batch penuh) per resolusi."""
+    from .inference import load_model_and_labels
+
+    model, class_names = load_model_and_labels(model_path, label_map_path, serving=True, warmup=False)
+    native = tuple(model.input_shape[1:3])
+    sizes = [native] + [s for s in parse_resolutions(resolutions) if s != native]
+    variants = {native: model}
+    variants.update({size: v.model for size, v in load_variants(model, model_path, sizes[1:]).items()})
+
+    images, labels = load_validation_set(val_dir, class_names, max_images)
+    report = {"model_path": model_path, "num_images": int(len(images)), "native": list(native), "resolutions": {}}
+    native_pred = None
+    for size, variant in variants.items():
+        x = np.stack([preprocess_image_bgr(img, target_size=size) for img in images])
+        probs = np.concatenate([variant.predict(x[i:i + batch_size], verbose=0)
+                                for i in range(0, len(x), batch_size)])
+        pred = np.argmax(probs, axis=1)
+        if native_pred is None:
+            native_pred = pred
+        batch = _latency(variant, x[:batch_size], max(3, repeats // 3))
+        report["resolutions"][f"{size[0]}x{size[1]}"] = {
+            "accuracy": float(np.mean(pred == labels)),
+            "agreement_with_native": float(np.mean(pred == native_pred)),
+            "mean_confidence": float(np.mean(np.max(probs, axis=1))),
+            "latency_batch1": _latency(variant, x[:1], repeats),
+            "latency_batch": dict(batch, batch_size=int(min(batch_size, len(x)))),
+            "throughput_img_s": float(min(batch_size, len(x)) / (batch["p50_ms"] / 1000.0)),
+        }
+    return report
+
+
+def _print_report(report: dict):
+    print(f"\nValidation: {report['num_images']} images, native {report['native'][0]}x{report['native'][1]}")
+    print(f"{'resolution':<11} {'accuracy':>9} {'agree':>7} {'b1 p50 ms':>10} {'b1 p95 ms':>10} {'img/s':>8}")
+    for name, r in report["resolutions"].items():
+        print(f"{name:<11} {r['accuracy']:>9.4f} {r['agreement_with_native']:>7.1%} "
+              f"{r['latency_batch1']['p50_ms']:>10.2f} {r['latency_batch1']['p95_ms']:>10.2f} "
+              f"{r['throughput_img_s']:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model_path', type=str, default=MODEL_PATH)
+    parser.add_argument('--label_map', type=str, default=LABEL_MAP_PATH)
+    parser.add_argument('--val_dir', type=str, required=True)
+    parser.add_argument('--resolutions', type=int, nargs='+', default=[DEFAULT_IMG_SIZE[0], 160, 128])
+    parser.add_argument('--max_images', type=int, default=None)
+    parser.add_argument('--batch_size', type=int, default=BATCH_MAX_SIZE)
+    parser.add_argument('--repeats', type=int, default=30)
+    parser.add_argument('--output', type=str, default=None, help='Simpan laporan sebagai JSON')
+
+    args = parser.parse_args()
+
+    result = resolution_report(args.model_path, args.label_map, args.val_dir, args.resolutions,
+                               args.max_images, args.batch_size, args.repeats)
+    _print_report(result)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
@@ -0,0 +1,191 @@
+"""
+Inference massal (offline) untuk folder gambar tanpa label.
+
+Gambar di dalam folder (rekursif) di-decode & di-resize paralel lewat
+pipeline tf.data (`num_parallel_calls=AUTOTUNE` + prefetch), sehingga CPU
+tetap sibuk decode batch berikutnya selagi model memproses batch sekarang.
+Preprocessing sama persis dengan serving (cv2 + preprocess_image_bgr).
+
+Hasil ditulis bertahap ke CSV (flush per batch). Bila proses mati di tengah
+jalan, menjalankan perintah yang sama lagi akan melanjutkan: path yang sudah
+ada di CSV dilewati dan baris terakhir yang terpotong dibuang.
+Opsional `--parquet` menulis salinan kolumnar di akhir (butuh pyarrow atau
+fastparquet).
+
+Contoh:
+    python -m src.predict_batch --input_dir /mnt/greenhouse/2024-06-01 --output results/2024-06-01.csv
+    python -m src.predict_batch --input_dir dump/ --output out.csv --parquet out.parquet --batch_size 64
+"""
+import os
+import argparse
+import csv
+import json
+import time
+from typing import List, Set
+
+import cv2
+import numpy as np
+import tensorflow as tf
+
+from .config import DEFAULT_IMG_SIZE, LABEL_MAP_PATH, MODEL_PATH
+from .inference import load_model_and_labels
+from .preprocess import preprocess_image_bgr
+from .utils import list_images
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+
+def csv_header(class_names: List[str]) -> List[str]:
+    return ["path", "status", "predicted_class", "confidence"] + [f"prob_{c}" for c in class_names]
+
+
+def read_done(output_path: str, header: List[str]) -> Set[str]:
+    """
+    Path yang sudah tercatat di CSV hasil run sebelumnya.
+
+    Baris terakhir yang tidak diakhiri newline (proses mati saat menulis)
+    dipotong dari file agar append berikutnya tetap valid.
+    """
+    if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        return set()
+
+    with open(output_path, 'rb+') as f:
+        data = f.read()
+        if not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+    with open(output_path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        existing = next(reader, None)
+        if existing is None:
+            return set()
+        if existing != header:
+            raise ValueError(f"{output_path} has a different header (other model/label map?); "
+                             "use another --output or remove the file")
+        return {row[0] for row in reader if row}
+
+
+def make_dataset(paths: List[str], img_size=DEFAULT_IMG_SIZE, batch_size: int = 32):
+    """tf.data: (image float32 RGB, ok) per gambar, decode+resize paralel, batched + prefetch."""
+    w, h = img_size  # urutan cv2.resize, sama dengan serving
+
+    def _load(path):
+        img = cv2.imread(path.decode('utf-8'))
+        if img is None:
+            return np.zeros((h, w, 3), dtype=np.float32), False
+        return preprocess_image_bgr(img, target_size=img_size), True
+
+    def _map(path):
+        image, ok = tf.numpy_function(_load, [path], [tf.float32, tf.bool])
+        image.set_shape((h, w, 3))
+        ok.set_shape(())
+        return image, ok
+
+    ds = tf.data.Dataset.from_tensor_slices(tf.constant(paths, dtype=tf.string))
+    ds = ds.map(_map, num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
+    return ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def write_parquet(csv_path: str, parquet_path: str):
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    try:
+        df.to_parquet(parquet_path, index=False)
+    except ImportError as e:
+        print(f"[WARNING] Parquet not written ({str(e).splitlines()[0]}); install pyarrow or fastparquet")
+        return False
+    print(f"[INFO] Parquet saved to {parquet_path}")
+    return True
+
+
+def main(input_dir: str, output: str, model_path: str = MODEL_PATH, label_map: str = LABEL_MAP_PATH,
+         img_size=DEFAULT_IMG_SIZE, batch_size: int = 32, parquet: str = None, report_json: str = None) -> dict:
+    model, class_names = load_model_and_labels(model_path, label_map, serving=True, warmup=False)
+    header = csv_header(class_names)
+
+    all_paths = list_images(input_dir)
+    done = read_done(output, header)
+    # Path relatif di CSV: hasil tetap cocok saat folder di-mount di lokasi lain
+    todo = [p for p in all_paths if os.path.relpath(p, input_dir) not in done]
+    print(f"[INFO] {len(all_paths)} images found, {len(all_paths) - len(todo)} already done, {len(todo)} to go")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    new_file = not os.path.exists(output) or os.path.getsize(output) == 0
+    counts = {STATUS_OK: 0, STATUS_ERROR: 0}
+    start = time.perf_counter()
+
+    with open(output, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(header)
+            f.flush()
+        if todo:
+            offset = 0
+            for images, oks in make_dataset(todo, img_size, batch_size):
+                probs = model.predict(images.numpy(), verbose=0)
+                for path, ok, p in zip(todo[offset:offset + len(probs)], oks.numpy(), probs):
+                    rel = os.path.relpath(path, input_dir)
+                    if ok:
+                        idx = int(np.argmax(p))
+                        writer.writerow([rel, STATUS_OK, class_names[idx], f"{p[idx]:.6f}"] +
+                                        [f"{v:.6f}" for v in p])
+                        counts[STATUS_OK] += 1
+                    else:
+                        writer.writerow([rel, STATUS_ERROR, "", ""] + [""] * len(class_names))
+                        counts[STATUS_ERROR] += 1
+                offset += len(probs)
+                f.flush()
+                elapsed = time.perf_counter() - start
+                print(f"[INFO] {offset}/{len(todo)} images ({offset / elapsed:.1f} img/s)")
+
+    elapsed = time.perf_counter() - start
+    processed = counts[STATUS_OK] + counts[STATUS_ERROR]
+    report = {
+        'input_dir': input_dir,
+        'output': output,
+        'model_path': model_path,
+        'images_total': len(all_paths),
+        'images_skipped': len(all_paths) - len(todo),
+        'images_processed': processed,
+        'images_ok': counts[STATUS_OK],
+        'images_error': counts[STATUS_ERROR],
+        'elapsed_s': elapsed,
+        'images_per_s': processed / elapsed if processed and elapsed > 0 else 0.0,
+    }
+    print(f"[INFO] Done: {processed} images in {elapsed:.1f}s ({report['images_per_s']:.1f} img/s), "
+          f"{counts[STATUS_ERROR]} unreadable")
+
+    if parquet:
+        report['parquet'] = parquet if write_parquet(output, parquet) else None
+    if report_json:
+        os.makedirs(os.path.dirname(report_json) or ".", exist_ok=True)
+        with open(report_json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Bulk inference over an image folder tree (resumable CSV output)')
+    parser.add_argument('--input_dir', type=str, required=True)
+    parser.add_argument('--output', type=str, required=True, help='CSV file; existing rows are skipped on rerun')
+    parser.add_argument('--model_path', type=str, default=MODEL_PATH)
+    parser.add_argument('--label_map', type=str, default=LABEL_MAP_PATH)
+    parser.add_argument('--img_size', type=int, nargs=2, default=DEFAULT_IMG_SIZE)
+    parser.add_argument('--batch_size', type=int, default=32)
+    parser.add_argument('--parquet', type=str, default=None, help='Optional columnar copy (needs pyarrow/fastparquet)')
+    parser.add_argument('--report_json', type=str, default=None)
+
+    args = parser.parse_args()
+
+    main(
+        args.input_dir,
+        args.output,
+        args.model_path,
+        args.label_map,
+        tuple(args.img_size),
+        args.batch_size,
+        args.parquet,
+        args.report_json
+    )
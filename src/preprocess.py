@@ -29,3 +29,62 @@ def load_and_preprocess(path: str, target_size=(224, 224), use_clahe=False) -> n
         raise FileNotFoundError(f"Unable to read image at {path}")
     img = preprocess_image_bgr(img_bgr, target_size=target_size, use_clahe=use_clahe)
     return img
+
+
+class ImageContext:
+    """
+    Satu upload = satu decode.
+
+    Bytes upload di-decode sekali di memori; representasi turunan (BGR asli,
+    HSV, grayscale, tensor RGB float hasil resize) dihitung saat pertama
+    dibutuhkan lalu dipakai ulang oleh validasi, inference, dan Grad-CAM.
+    """
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self._bgr = None
+        self._decoded = False
+        self._cache = {}
+
+    @classmethod
+    def from_path(cls, path: str) -> "ImageContext":
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    @classmethod
+    def from_bgr(cls, img_bgr: np.ndarray, data: bytes = b"") -> "ImageContext":
+        """Context dari pixel yang sudah di-decode (mis. frame kamera / benchmark)."""
+        ctx = cls(data)
+        ctx._bgr = img_bgr
+        ctx._decoded = True
+        return ctx
+
+    @property
+    def bgr(self):
+        """Gambar asli (BGR uint8), atau None jika bytes tidak bisa di-decode."""
+        if not self._decoded:
+            self._decoded = True
+            buf = np.frombuffer(self.data, dtype=np.uint8)
+            self._bgr = cv2.imdecode(buf, cv2.IMREAD_COLOR) if buf.size else None
+        return self._bgr
+
+    @property
+    def hsv(self) -> np.ndarray:
+        if 'hsv' not in self._cache:
+            self._cache['hsv'] = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2HSV)
+        return self._cache['hsv']
+
+    @property
+    def gray(self) -> np.ndarray:
+        if 'gray' not in self._cache:
+            self._cache['gray'] = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY)
+        return self._cache['gray']
+
+    def model_input(self, target_size: Tuple[int, int] = (224, 224), use_clahe: bool = False) -> np.ndarray:
+        """Tensor RGB float32 (H, W, 3) siap masuk model, di-cache per ukuran."""
+        key = ('input', tuple(target_size), use_clahe)
+        if key not in self._cache:
+            if self.bgr is None:
+                raise ValueError("Unable to decode image bytes")
+            self._cache[key] = preprocess_image_bgr(self.bgr, target_size=target_size, use_clahe=use_clahe)
+        return self._cache[key]
@@ -0,0 +1,169 @@
+"""
+Profiling on-demand untuk satu request.
+
+Upload yang sesekali sangat lambat sulit direproduksi. Request yang dipilih
+(header admin `X-Profile` atau sampling acak) diprofil dan hasilnya ditulis
+ke satu folder per request di bawah `root`:
+
+    <root>/20240601-101500-123456-1a2b3c4d/
+        profile.pstats   # dump cProfile (thread request), buka dengan pstats / snakeviz
+        summary.txt      # 40 fungsi teratas menurut waktu kumulatif
+        timing.json      # breakdown per stage (span Metrics) + metadata request
+        tf_trace/        # opsional: trace TensorFlow profiler (buka di TensorBoard)
+
+Folder dirotasi: hanya `max_keep` profil terbaru yang disimpan.
+
+Catatan: cProfile hanya merekam thread request. Forward pass yang berjalan
+di thread MicroBatcher terlihat sebagai waktu menunggu future; detail op
+model ada di trace TensorFlow.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+PROFILE_FILE = "profile.pstats"
+SUMMARY_FILE = "summary.txt"
+TIMING_FILE = "timing.json"
+TF_TRACE_DIR = "tf_trace"
+SUMMARY_TOP = 40
+
+_ID_RE = re.compile(r"^\d{8}-\d{6}-\d{6}-[0-9a-f]{8}$")
+# Profiler TensorFlow bersifat global per proses: hanya satu trace dalam satu waktu
+_TF_TRACE_LOCK = threading.Lock()
+
+
+class ProfileStore:
+    def __init__(self, root: str, max_keep: int = 50):
+        self.root = root
+        self.max_keep = int(max_keep)
+        self._lock = threading.Lock()
+
+    def create(self) -> str:
+        """Folder baru untuk satu profil; return id-nya (folder terlama dirotasi)."""
+        # Timestamp (mikrodetik) di depan: urutan nama = urutan waktu, untuk rotasi
+        profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{uuid.uuid4().hex[:8]}"
+        with self._lock:
+            os.makedirs(os.path.join(self.root, profile_id))
+            self._rotate()
+        return profile_id
+
+    def path(self, profile_id: str, name: Optional[str] = None) -> Optional[str]:
+        """Path folder/file profil, atau None bila id tidak valid atau tidak ada."""
+        if not _ID_RE.match(profile_id or ""):
+            return None
+        folder = os.path.join(self.root, profile_id)
+        if not os.path.isdir(folder):
+            return None
+        return folder if name is None else os.path.join(folder, name)
+
+    def ids(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(n for n in os.listdir(self.root) if _ID_RE.match(n))
+
+    def list(self) -> List[dict]:
+        """Ringkasan profil (terbaru dulu): id + isi timing.json."""
+        out = []
+        for profile_id in reversed(self.ids()):
+            entry = {"id": profile_id}
+            try:
+                with open(os.path.join(self.root, profile_id, TIMING_FILE), encoding="utf-8") as f:
+                    entry.update(json.load(f))
+            except (OSError, ValueError):
+                entry["incomplete"] = True
+            out.append(entry)
+        return out
+
+    def _rotate(self):
+        ids = self.ids()
+        for profile_id in ids[:max(0, len(ids) - self.max_keep)]:
+            shutil.rmtree(os.path.join(self.root, profile_id), ignore_errors=True)
+
+
+class RequestProfile:
+    """
+    Context manager: cProfile + (opsional) trace TensorFlow + breakdown stage
+    dari `metrics.capture()`. Hasil ditulis ke store saat keluar dari blok;
+    isi `meta` (mis. status response) boleh dilengkapi di dalam blok.
+    """
+
+    def __init__(self, store: ProfileStore, label: str, metrics=None, tf_trace: bool = False,
+                 meta: Optional[dict] = None):
+        self.store = store
+        self.label = label
+        self.metrics = metrics
+        self.tf_trace = tf_trace
+        self.meta = dict(meta or {})
+        self.profile_id = None
+        self._profiler = None
+        self._capture = None
+        self._stages = []
+        self._tf_active = False
+        self._start = 0.0
+
+    def __enter__(self):
+        self.profile_id = self.store.create()
+        if self.tf_trace and _TF_TRACE_LOCK.acquire(blocking=False):
+            try:
+                from .lazy import tf
+                tf.profiler.experimental.start(self.store.path(self.profile_id, TF_TRACE_DIR))
+                self._tf_active = True
+            except Exception as e:  # noqa: BLE001 - profiling tidak boleh menggagalkan request
+                _TF_TRACE_LOCK.release()
+                self.meta["tf_trace_error"] = str(e)
+        if self.metrics is not None:
+            self._capture = self.metrics.capture()
+            self._stages = self._capture.__enter__()
+        self._profiler = cProfile.Profile()
+        self._start = time.perf_counter()
+        self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profiler.disable()
+        total_s = time.perf_counter() - self._start
+        if self._capture is not None:
+            self._capture.__exit__(None, None, None)
+        if self._tf_active:
+            try:
+                from .lazy import tf
+                tf.profiler.experimental.stop()
+            finally:
+                _TF_TRACE_LOCK.release()
+        try:
+            self._write(total_s, exc)
+        except OSError as e:
+            print(f"[WARNING] Gagal menulis profil {self.profile_id}: {e}")
+        return False
+
+    def _write(self, total_s: float, exc):
+        folder = self.store.path(self.profile_id)
+        if folder is None:  # sudah dirotasi oleh request lain
+            return
+        self._profiler.dump_stats(os.path.join(folder, PROFILE_FILE))
+
+        buf = io.StringIO()
+        pstats.Stats(self._profiler, stream=buf).sort_stats("cumulative").print_stats(SUMMARY_TOP)
+        with open(os.path.join(folder, SUMMARY_FILE), "w", encoding="utf-8") as f:
+            f.write(buf.getvalue())
+
+        timing = {
+            "endpoint": self.label,
+            "started_at": time.time() - total_s,
+            "total_ms": total_s * 1000.0,
+            "stages": [{"stage": stage, "ms": seconds * 1000.0} for stage, seconds in self._stages],
+            "tf_trace": self._tf_active,
+            "error": repr(exc) if exc is not None else None,
+            **self.meta,
+        }
+        with open(os.path.join(folder, TIMING_FILE), "w", encoding="utf-8") as f:
+            json.dump(timing, f, indent=2)
@@ -0,0 +1,177 @@
+"""
+Quality gate upload ("Satpam Digital") yang murah untuk foto besar.
+
+`validate_image_full` adalah implementasi asli (semua cek di resolusi penuh:
+HSV, grayscale, Laplacian CV_64F, 4x inRange + countNonZero) dan disimpan
+sebagai referensi untuk parity test & benchmark. `quality_gate` memberi
+verdict dan pesan yang sama dengan biaya terbatas:
+
+- cek dijalankan berurutan dan berhenti di cek pertama yang gagal
+- brightness & warna dihitung dari sampel ber-stride (sisi terpanjang <= max_side)
+- keempat range warna (biru, pink, hijau, coklat) diklasifikasi dalam satu
+  histogram H x level(S) x level(V); hasilnya identik dengan jumlah
+  countNonZero(inRange(...)) pada gambar yang sama
+- skor blur = variansi Laplacian (CV_16S, tanpa float64 sebesar gambar) atas
+  seluruh frame resolusi penuh, sehingga threshold lama tetap berlaku
+"""
+import cv2
+import numpy as np
+
+from .preprocess import ImageContext
+
+MIN_SIDE = 200
+DARK_THRESHOLD = 30
+BRIGHT_THRESHOLD = 220
+BLUR_THRESHOLD = 50
+FOREIGN_MAX_RATIO = 0.05
+PLANT_MIN_RATIO = 0.20
+
+MSG_CORRUPT = "File gambar rusak atau tidak terbaca."
+MSG_TOO_DARK = "Citra terlalu GELAP. Harap ambil foto di tempat yang lebih terang."
+MSG_TOO_BRIGHT = "Citra terlalu TERANG (Overexposed). Detail daun hilang karena cahaya berlebih."
+MSG_BLURRY = "Citra terlalu BURAM/HANCUR. Pastikan kamera fokus ke daun saat memotret."
+MSG_FOREIGN = "Terdeteksi OBJEK ASING atau CORETAN (Warna tidak alami). Harap upload foto daun tomat asli."
+MSG_NO_LEAF = ("Objek DAUN TOMAT tidak ditemukan atau terlalu kecil. "
+               "Pastikan foto zoom ke arah daun, bukan background.")
+MSG_ERROR = "Gagal memvalidasi gambar. Format mungkin tidak didukung."
+
+# Level S/V: 0 = < 40, 1 = 40..49, 2 = >= 50 (batas bawah range hijau/coklat = 40, biru/pink = 50)
+_SV_LEVEL = np.zeros(256, dtype=np.uint16)
+_SV_LEVEL[40:] = 1
+_SV_LEVEL[50:] = 2
+
+
+def _low_resolution_message(w, h):
+    return f"Resolusi citra terlalu rendah ({w}x{h}). Minimal 200x200 px agar AI bekerja optimal."
+
+
+def validate_image_full(image):
+    """Implementasi referensi (versi asli validate_image, semua cek di resolusi penuh)."""
+    try:
+        ctx = image if isinstance(image, ImageContext) else ImageContext.from_path(image)
+        img = ctx.bgr
+        if img is None:
+            return False, MSG_CORRUPT
+
+        h, w, _ = img.shape
+        img_hsv = ctx.hsv
+        img_gray = ctx.gray
+
+        if h < MIN_SIDE or w < MIN_SIDE:
+            return False, _low_resolution_message(w, h)
+
+        avg_brightness = np.mean(img_gray)
+        if avg_brightness < DARK_THRESHOLD:
+            return False, MSG_TOO_DARK
+        if avg_brightness > BRIGHT_THRESHOLD:
+            return False, MSG_TOO_BRIGHT
+
+        blur_score = cv2.Laplacian(img_gray, cv2.CV_64F).var()
+        if blur_score < BLUR_THRESHOLD:
+            return False, MSG_BLURRY
+
+        mask_blue = cv2.inRange(img_hsv, np.array([85, 50, 50]), np.array([135, 255, 255]))
+        mask_pink = cv2.inRange(img_hsv, np.array([140, 50, 50]), np.array([170, 255, 255]))
+        foreign_pixels = cv2.countNonZero(mask_blue) + cv2.countNonZero(mask_pink)
+        total_pixels = h * w
+        if (foreign_pixels / total_pixels) > FOREIGN_MAX_RATIO:
+            return False, MSG_FOREIGN
+
+        mask_green = cv2.inRange(img_hsv, np.array([25, 40, 40]), np.array([95, 255, 255]))
+        mask_disease = cv2.inRange(img_hsv, np.array([10, 40, 40]), np.array([25, 255, 255]))
+        plant_pixels = cv2.countNonZero(mask_green) + cv2.countNonZero(mask_disease)
+        if plant_pixels / total_pixels < PLANT_MIN_RATIO:
+            return False, MSG_NO_LEAF
+
+        return True, "Valid"
+
+    except Exception as e:
+        print(f"[ValidationError] {e}")
+        return False, MSG_ERROR
+
+
+def downsample(img: np.ndarray, max_side: int) -> np.ndarray:
+    """
+    Sampel piksel dengan stride bulat sehingga sisi terpanjang <= max_side.
+
+    Tidak meng-interpolasi: nilai piksel asli tetap (rasio warna/brightness
+    adalah estimasi tak bias dari gambar penuh) dan biayanya ~1 ms untuk 12 MP,
+    jauh lebih murah dari cv2.resize INTER_AREA.
+    """
+    step = -(-max(img.shape[:2]) // max_side)
+    if step <= 1:
+        return img
+    return np.ascontiguousarray(img[::step, ::step])
+
+
+def blur_score(gray: np.ndarray) -> float:
+    """Variansi Laplacian; CV_16S cukup untuk input uint8 (|nilai| <= 1020)."""
+    lap = cv2.Laplacian(gray, cv2.CV_16S)
+    _, std = cv2.meanStdDev(lap)
+    return float(std[0, 0]) ** 2
+
+
+def color_histogram(hsv: np.ndarray) -> np.ndarray:
+    """Histogram (180, 3, 3): hue x level saturasi x level value, dalam satu pass bincount."""
+    codes = hsv[..., 0].astype(np.uint16) * 9 + _SV_LEVEL[hsv[..., 1]] * 3 + _SV_LEVEL[hsv[..., 2]]
+    return np.bincount(codes.ravel(), minlength=180 * 9)[:180 * 9].reshape(180, 3, 3)
+
+
+def color_ratios(hsv: np.ndarray) -> dict:
+    """Rasio piksel asing (biru + pink) dan tanaman (hijau + coklat), sama seperti inRange."""
+    hist = color_histogram(hsv)
+    total = float(hsv.shape[0] * hsv.shape[1])
+    blue = hist[85:136, 2, 2].sum()
+    pink = hist[140:171, 2, 2].sum()
+    green = hist[25:96, 1:, 1:].sum()
+    disease = hist[10:26, 1:, 1:].sum()
+    return {"foreign": (blue + pink) / total, "plant": (green + disease) / total}
+
+
+def quality_gate(image, max_side: int = 512, min_plant_ratio: float = PLANT_MIN_RATIO):
+    """
+    Pengganti validate_image: return (is_valid, message) dengan pesan yang sama.
+
+    `image` boleh path file, ImageContext, atau array BGR. `min_plant_ratio`
+    bisa diturunkan untuk foto satu tanaman utuh (mode tile, lihat src/tiling.py).
+    """
+    try:
+        ctx = None
+        if isinstance(image, np.ndarray):
+            img = image
+        else:
+            ctx = image if isinstance(image, ImageContext) else ImageContext.from_path(image)
+            img = ctx.bgr
+        if img is None:
+            return False, MSG_CORRUPT
+
+        # 1. Resolusi (gratis, dari shape)
+        h, w = img.shape[:2]
+        if h < MIN_SIDE or w < MIN_SIDE:
+            return False, _low_resolution_message(w, h)
+
+        # 2. Brightness dari sampel ber-stride
+        small = downsample(img, max_side)
+        avg_brightness = cv2.mean(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))[0]
+        if avg_brightness < DARK_THRESHOLD:
+            return False, MSG_TOO_DARK
+        if avg_brightness > BRIGHT_THRESHOLD:
+            return False, MSG_TOO_BRIGHT
+
+        # 3. Blur atas seluruh frame resolusi penuh (sama dengan cek asli; gray di-cache di ImageContext)
+        gray = ctx.gray if ctx is not None else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        if blur_score(gray) < BLUR_THRESHOLD:
+            return False, MSG_BLURRY
+
+        # 4 & 5. Objek asing + dominasi daun dari satu histogram warna
+        ratios = color_ratios(cv2.cvtColor(small, cv2.COLOR_BGR2HSV))
+        if ratios["foreign"] > FOREIGN_MAX_RATIO:
+            return False, MSG_FOREIGN
+        if ratios["plant"] < min_plant_ratio:
+            return False, MSG_NO_LEAF
+
+        return True, "Valid"
+
+    except Exception as e:
+        print(f"[ValidationError] {e}")
+        return False, MSG_ERROR
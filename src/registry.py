@@ -0,0 +1,211 @@
+"""
+Registry model berversi + handle model yang bisa di-swap tanpa downtime.
+
+Layout registry (satu folder per versi, nama bebas, diurutkan natural):
+
+    models/registry/
+        v1/model.keras      v1/label_map.json
+        v2/model.tflite     v2/label_map.json
+        v3/model.pb         v3/label_map.json
+        ACTIVE              # {"version": "v2", "history": ["v1"]}
+
+Bila satu folder berisi beberapa model, urutan prioritas mengikuti
+MODEL_EXTENSIONS: .keras lebih dulu karena Grad-CAM dan varian resolusi
+adaptif butuh layer Keras; .pb hasil `python -m src.export` hanya dipakai bila
+tidak ada .keras/.tflite (load lebih cepat, tanpa Grad-CAM; kapabilitas terlihat
+di `ModelHandle.info()`). Tanpa file ACTIVE, versi terbaru yang dipakai. File ACTIVE ditulis atomik
+(tmp + os.replace) sehingga semua worker (prefork) yang memantau registry
+melihat versi yang sama; `history` dipakai untuk rollback.
+
+`ModelHandle` membungkus satu versi yang sudah dimuat (model, label,
+Grad-CAM, batcher). Request memegang (acquire) handle selama diproses;
+handle lama yang sudah diganti baru ditutup setelah request terakhir yang
+memakainya selesai.
+"""
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+ACTIVE_FILE = "ACTIVE"
+LABEL_MAP_NAME = "label_map.json"
+# Urutan = prioritas bila satu folder versi berisi beberapa model
+MODEL_EXTENSIONS = (".keras", ".tflite", ".pb", ".h5")
+MAX_HISTORY = 20
+
+
+def _natural_key(name: str):
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+class ModelRegistry:
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def versions(self) -> List[str]:
+        """Versi yang lengkap (ada file model + label_map.json), terurut natural."""
+        if not os.path.isdir(self.root):
+            return []
+        found = []
+        for name in os.listdir(self.root):
+            folder = os.path.join(self.root, name)
+            if os.path.isdir(folder) and not name.startswith(".") and self._model_file(folder):
+                if os.path.exists(os.path.join(folder, LABEL_MAP_NAME)):
+                    found.append(name)
+        return sorted(found, key=_natural_key)
+
+    def resolve(self, version: str) -> Tuple[str, str]:
+        """(path model, path label map) untuk `version`."""
+        folder = os.path.join(self.root, version)
+        model_file = self._model_file(folder) if os.path.isdir(folder) else None
+        label_map = os.path.join(folder, LABEL_MAP_NAME)
+        if model_file is None or not os.path.exists(label_map) or os.path.basename(version) != version:
+            raise FileNotFoundError(f"Model version '{version}' not found in {self.root}")
+        return os.path.join(folder, model_file), label_map
+
+    def active(self) -> Optional[str]:
+        """Versi aktif menurut file ACTIVE, atau versi terbaru bila belum pernah di-set."""
+        version = self._read_state().get("version")
+        if version and version in self.versions():
+            return version
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def previous(self) -> str:
+        """Target rollback: versi aktif sebelumnya."""
+        history = self._read_state().get("history") or []
+        if not history:
+            raise ValueError("No previous model version to roll back to")
+        return history[-1]
+
+    def activate(self, version: str, rollback: bool = False):
+        """Tandai `version` sebagai aktif (atomik). `rollback=True` mengambil versi dari history."""
+        self.resolve(version)
+        with self._lock:
+            state = self._read_state()
+            current = state.get("version") or self.active()
+            history = list(state.get("history") or [])
+            if rollback:
+                if history and history[-1] == version:
+                    history.pop()
+            elif current and current != version:
+                history = (history + [current])[-MAX_HISTORY:]
+            self._write_state({"version": version, "history": history, "updated_at": time.time()})
+
+    def snapshot(self) -> dict:
+        state = self._read_state()
+        return {"root": self.root, "versions": self.versions(), "active": self.active(),
+                "history": state.get("history") or []}
+
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _model_file(folder: str) -> Optional[str]:
+        names = sorted(n for n in os.listdir(folder) if n.endswith(MODEL_EXTENSIONS))
+        for ext in MODEL_EXTENSIONS:
+            if "model" + ext in names:
+                return "model" + ext
+        for ext in MODEL_EXTENSIONS:
+            matches = [n for n in names if n.endswith(ext)]
+            if matches:
+                return matches[0]
+        return None
+
+    def _read_state(self) -> dict:
+        try:
+            with open(os.path.join(self.root, ACTIVE_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_state(self, state: dict):
+        path = os.path.join(self.root, ACTIVE_FILE)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, path)
+
+
+class ModelHandle:
+    """Satu versi model yang sudah dimuat, dengan reference counting untuk swap aman."""
+
+    def __init__(self, version: str, model, class_names, explainer=None, model_path: str = None,
+                 label_map_path: str = None, fingerprint: str = None, load_ms: dict = None):
+        self.version = version
+        self.model = model
+        self.class_names = class_names
+        self.explainer = explainer
+        self.model_path = model_path
+        self.label_map_path = label_map_path
+        self.fingerprint = fingerprint
+        self.load_ms = dict(load_ms or {})
+        self.loaded_at = time.time()
+        # Dibuat lazily oleh app (MicroBatcher per versi model)
+        self.batcher = None
+        self.explain_batcher = None
+        # Varian resolusi lebih kecil (src/multires.ResolutionVariant), diisi app bila resolusi adaptif aktif
+        self.variants = {}
+
+        self._lock = threading.Lock()
+        self._refs = 0
+        self._retired = False
+        self._closed = False
+        self._on_close: List[Callable[[], None]] = []
+
+    def acquire(self) -> bool:
+        """Pegang handle selama satu request; False bila handle sudah ditutup."""
+        with self._lock:
+            if self._closed:
+                return False
+            self._refs += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._refs -= 1
+            close = self._retired and self._refs <= 0 and not self._closed
+            if close:
+                self._closed = True
+        if close:
+            self._close()
+
+    def retire(self):
+        """Handle sudah diganti versi lain: tutup sekarang, atau setelah request terakhir selesai."""
+        with self._lock:
+            self._retired = True
+            close = self._refs <= 0 and not self._closed
+            if close:
+                self._closed = True
+        if close:
+            self._close()
+
+    def on_close(self, fn: Callable[[], None]):
+        self._on_close.append(fn)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def info(self) -> dict:
+        with self._lock:
+            refs = self._refs
+        return {"version": self.version, "model_path": self.model_path, "fingerprint": self.fingerprint,
+                "loaded_at": self.loaded_at, "load_ms": self.load_ms, "in_flight": refs,
+                **self.capabilities()}
+
+    def capabilities(self) -> dict:
+        """Fitur yang tersedia untuk versi ini (mis. artefak .pb/.tflite: tanpa Grad-CAM)."""
+        shape = getattr(self.model, "input_shape", None)
+        sizes = [[int(d) for d in shape[1:3]]] if isinstance(shape, tuple) else []
+        return {"gradcam": self.explainer is not None,
+                "resolutions": sizes + [list(size) for size in sorted(self.variants, reverse=True)]}
+
+    def _close(self):
+        for fn in self._on_close:
+            try:
+                fn()
+            except Exception as e:  # noqa: BLE001 - handle lama tetap harus dilepas
+                print(f"[WARNING] Gagal menutup model versi {self.version}: {e}")
+        self._on_close = []
@@ -0,0 +1,185 @@
+"""
+Entry point serving produksi: prefork multi-proses.
+
+Master memuat semua yang bisa dibagi lalu fork N worker yang berbagi satu
+listening socket. Halaman memori yang diwarisi dari master dipakai bersama
+(copy-on-write); `gc.freeze()` mencegah GC menulis ulang header objek milik
+master sehingga halaman tersebut tetap ter-share.
+
+- Backend .tflite: model dimuat DAN di-warmup di master; interpreter (termasuk
+  bobot yang sudah di-pack) dibagi copy-on-write ke semua worker.
+- Backend .keras: runtime TensorFlow tidak fork-safe (tf.function di child
+  hang bila runtime sudah aktif di master). Master hanya meng-import
+  TensorFlow + app (bagian RSS terbesar); tiap worker memuat dan me-warmup
+  model setelah fork, SEBELUM mulai menerima koneksi.
+
+Budget thread per worker diset lewat environment sebelum TensorFlow
+di-import (TF intra/inter-op, OpenMP, TFLite) dan cv2.setNumThreads.
+
+Contoh:
+    python -m src.serve --workers 4 --threads 1 --port 5000
+    MODEL_PATH=models/densenet121_best_int8.tflite python -m src.serve --workers 4
+"""
+import os
+import argparse
+import gc
+import signal
+import socket
+import sys
+import time
+
+# Worker yang mati sebelum waktu ini dianggap gagal start (tidak di-respawn)
+MIN_WORKER_LIFETIME_S = 10.0
+
+
+def thread_budget_env(threads: int) -> dict:
+    """Variabel environment yang membatasi thread TF/OpenMP/TFLite per proses."""
+    threads = str(max(1, int(threads)))
+    return {
+        "TF_NUM_INTRAOP_THREADS": threads,
+        "TF_NUM_INTEROP_THREADS": threads,
+        "OMP_NUM_THREADS": threads,
+        "TFLITE_NUM_THREADS": threads,
+    }
+
+
+def check_multiworker_config(workers: int, upload_store: str, gradcam_mode: str):
+    """
+    State yang hanya ada di memori satu proses tidak terlihat oleh worker lain
+    (request berikutnya bisa masuk ke worker berbeda): tolak konfigurasi tersebut.
+    """
+    if workers <= 1:
+        return
+    problems = []
+    if upload_store == "memory":
+        problems.append("UPLOAD_STORE=memory (upload/heatmap hanya ada di RAM worker yang menerimanya)")
+    if gradcam_mode == "async":
+        problems.append("GRADCAM_MODE=async (status job heatmap hanya ada di worker yang menerimanya)")
+    if problems:
+        raise ValueError(f"Tidak didukung dengan --workers {workers}: " + "; ".join(problems)
+                         + ". Pakai --workers 1 atau ubah konfigurasi.")
+
+
+def _run_worker(index, sock, host, port, cv_threads):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    import cv2
+    from werkzeug.serving import make_server
+    import app as webapp
+
+    cv2.setNumThreads(cv_threads)
+    # Keras: model dimuat di sini (setelah fork); TFLite: sudah siap dari master
+    webapp._get_model_and_labels()
+
+    server = make_server(host, port, webapp.app, threaded=True, fd=sock.fileno())
+    print(f"[SERVE] worker {index} (pid {os.getpid()}) siap", flush=True)
+    server.serve_forever()
+
+
+def _spawn(index, sock, host, port, cv_threads):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _run_worker(index, sock, host, port, cv_threads)
+        except BaseException as e:  # noqa: BLE001 - proses worker harus selalu _exit
+            print(f"[SERVE] worker {index} berhenti: {e}", flush=True)
+            code = 1
+        finally:
+            os._exit(code)
+    return pid, time.monotonic()
+
+
+def main(host: str = "0.0.0.0", port: int = 5000, workers: int = None, threads: int = 1,
+         cv_threads: int = None, backlog: int = 128):
+    workers = workers or os.cpu_count() or 1
+    cv_threads = threads if cv_threads is None else cv_threads
+
+    # Harus diset sebelum src.config / TensorFlow di-import
+    os.environ.update(thread_budget_env(threads))
+    os.environ["PRELOAD_MODEL"] = "0"  # master tidak boleh memulai thread preload
+
+    from src.config import GRADCAM_MODE, MODEL_PATH, UPLOAD_STORE
+    check_multiworker_config(workers, UPLOAD_STORE, GRADCAM_MODE)
+
+    import app as webapp
+    from src.lazy import tf
+
+    with webapp._STARTUP.phase("import_tensorflow"):
+        tf.load()
+    if MODEL_PATH.endswith(".tflite"):
+        webapp._get_model_and_labels()
+        print("[SERVE] Model TFLite dimuat di master (di-share copy-on-write)", flush=True)
+    else:
+        print("[SERVE] Model Keras dimuat per worker setelah fork "
+              "(runtime TensorFlow tidak fork-safe)", flush=True)
+
+    sock = socket.create_server((host, port), backlog=backlog)
+    sock.set_inheritable(True)
+
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+    for i in range(workers):
+        pid, started = _spawn(i, sock, host, port, cv_threads)
+        children[pid] = (i, started)
+    print(f"[SERVE] {workers} worker x {threads} thread di http://{host}:{port}/ (master pid {os.getpid()})",
+          flush=True)
+
+    stopping = False
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    exit_code = 0
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index, started = children.pop(pid, (None, None))
+        if index is None or stopping:
+            continue
+        if time.monotonic() - started < MIN_WORKER_LIFETIME_S:
+            print(f"[SERVE] worker {index} gagal start (status {status}); menghentikan server", flush=True)
+            exit_code = 1
+            shutdown(None, None)
+            continue
+        print(f"[SERVE] worker {index} mati (status {status}); respawn", flush=True)
+        new_pid, new_started = _spawn(index, sock, host, port, cv_threads)
+        children[new_pid] = (index, new_started)
+
+    sock.close()
+    return exit_code
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Prefork production server')
+    parser.add_argument('--host', type=str, default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=None, help='Default: jumlah CPU')
+    parser.add_argument('--threads', type=int, default=1, help='Thread TF/TFLite/OpenMP per worker')
+    parser.add_argument('--cv_threads', type=int, default=None, help='Thread OpenCV per worker (default = --threads)')
+    parser.add_argument('--backlog', type=int, default=128)
+
+    args = parser.parse_args()
+
+    sys.exit(main(
+        args.host,
+        args.port,
+        args.workers,
+        args.threads,
+        args.cv_threads,
+        args.backlog
+    ))
@@ -0,0 +1,96 @@
+"""
+Status startup/preload model untuk health check.
+
+Setiap fase (import TensorFlow, load model, warmup, ...) diukur durasinya.
+`/healthz` hanya menandakan proses hidup; `/readyz` baru 200 setelah model
+selesai dimuat dan di-warmup, sehingga load balancer tidak mengirim trafik
+ke worker yang masih dingin.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+IDLE = "idle"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class StartupState:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._created = time.monotonic()
+        self._status = IDLE
+        self._phases = {}
+        self._error = None
+        self._ready_after_s = None
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        return self._status == READY
+
+    @contextmanager
+    def phase(self, name: str):
+        """Catat durasi satu fase (ms), juga bila fase tersebut gagal."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            with self._lock:
+                self._phases[name] = elapsed_ms
+            print(f"[STARTUP] {name}: {elapsed_ms:.0f} ms")
+
+    def mark_loading(self):
+        with self._lock:
+            if self._status != READY:
+                self._status = LOADING
+
+    def mark_ready(self):
+        with self._lock:
+            self._status = READY
+            self._error = None
+            if self._ready_after_s is None:
+                self._ready_after_s = time.monotonic() - self._created
+
+    def mark_failed(self, exc: BaseException):
+        with self._lock:
+            self._status = FAILED
+            self._error = f"{type(exc).__name__}: {exc}"
+
+    def run_in_background(self, fn: Callable[[], object]) -> bool:
+        """Jalankan `fn` (preload) di thread daemon; False jika preload masih berjalan."""
+        with self._lock:
+            if self._status == READY or (self._thread is not None and self._thread.is_alive()):
+                return False
+
+            def target():
+                try:
+                    fn()
+                except Exception as e:  # noqa: BLE001 - error dilaporkan lewat /readyz
+                    self.mark_failed(e)
+                    print(f"[STARTUP] Preload gagal: {e}")
+
+            self._status = LOADING
+            self._thread = threading.Thread(target=target, name="preload", daemon=True)
+            self._thread.start()
+        return True
+
+    def wait(self, timeout: float = None) -> bool:
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.ready
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "status": self._status,
+                "ready": self._status == READY,
+                "phases_ms": dict(self._phases),
+                "ready_after_s": self._ready_after_s,
+                "uptime_s": time.monotonic() - self._created,
+                "error": self._error,
+            }
@@ -0,0 +1,192 @@
+"""
+Penyimpanan upload & heatmap dengan nama unik dan batas ukuran/umur.
+
+Setiap file diberi nama `<uuid>.<ext>` (heatmap: `heatmap_<uuid>.jpg`),
+sehingga dua user yang sama-sama mengunggah `IMG_0001.jpg` tidak saling
+menimpa. Sweeper di background menghapus file yang lebih tua dari `ttl_s`
+dan file terlama bila total ukuran melewati `max_bytes`.
+
+Mode `memory=True` menyimpan bytes di RAM saja (tanpa tulis ke disk di
+jalur request); file dilayani dari memori lewat route upload di app.
+Di mode disk hanya file dengan pola nama milik store yang dikelola; file
+lain di folder yang sama tidak pernah disentuh sweeper.
+
+Mode disk aman untuk banyak proses (src.serve --workers N) pada folder yang
+sama: `exists` juga mengecek file di disk (upload dari worker lain), dan
+sweeper memindai folder sehingga TTL & budget berlaku untuk seluruh isi
+folder, bukan hanya file milik proses ini. Mode memori hanya untuk 1 proses.
+"""
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+_NAME_RE = re.compile(r"^(heatmap_)?[0-9a-f]{32}\.[a-z0-9]{1,5}$")
+
+
+def is_store_name(name: str) -> bool:
+    return bool(_NAME_RE.match(name or ""))
+
+
+class UploadStore:
+    def __init__(self, root: Optional[str] = None, memory: bool = False,
+                 max_bytes: int = 512 * 1024 * 1024, ttl_s: float = 3600.0,
+                 sweep_interval_s: float = 60.0, start_sweeper: bool = True):
+        if not memory and not root:
+            raise ValueError("UploadStore in disk mode needs a root directory")
+        self.root = root
+        self.memory = bool(memory)
+        self.max_bytes = int(max_bytes)
+        self.ttl_s = float(ttl_s)
+        self.sweep_interval_s = float(sweep_interval_s)
+
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # name -> (ukuran, waktu dibuat); urutan = terlama dulu
+        self._blobs = {}  # mode memori: name -> bytes
+        self._bytes = 0
+        self._counters = {"saved": 0, "evicted_ttl": 0, "evicted_size": 0, "sweeps": 0}
+        self._wake = threading.Event()
+        self._closed = False
+
+        if not self.memory:
+            os.makedirs(self.root, exist_ok=True)
+            self._load_index()
+
+        self._sweeper = None
+        if start_sweeper:
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="upload-sweeper", daemon=True)
+            self._sweeper.start()
+
+    # ------------------------------------------------------------------
+    @staticmethod
+    def new_name(ext: str = "jpg", prefix: str = "") -> str:
+        return f"{prefix}{uuid.uuid4().hex}.{ext.lower().lstrip('.')}"
+
+    def save(self, data: bytes, ext: str = "jpg") -> str:
+        """Simpan bytes dengan nama baru yang unik; return nama file."""
+        name = self.new_name(ext)
+        self.put(name, data)
+        return name
+
+    def put(self, name: str, data: bytes):
+        """Simpan bytes dengan nama tertentu (mis. `heatmap_<uuid>.jpg` turunan dari upload)."""
+        if not is_store_name(name):
+            raise ValueError(f"Invalid upload name: {name}")
+        if not self.memory:
+            with open(os.path.join(self.root, name), "wb") as f:
+                f.write(data)
+        with self._lock:
+            old = self._index.pop(name, None)
+            if old is not None:
+                self._bytes -= old[0]
+            self._index[name] = (len(data), time.time())
+            self._bytes += len(data)
+            if self.memory:
+                self._blobs[name] = data
+            self._counters["saved"] += 1
+            over_budget = self._bytes > self.max_bytes
+        if over_budget:
+            self._wake.set()
+
+    def get(self, name: str) -> Optional[bytes]:
+        """Bytes file (mode memori), atau None jika tidak ada / sudah di-evict."""
+        with self._lock:
+            return self._blobs.get(name)
+
+    def exists(self, name: str) -> bool:
+        if not self.memory:
+            # Disk = sumber kebenaran: file bisa ditulis/dihapus worker lain yang berbagi folder
+            return is_store_name(name) and os.path.isfile(self.path(name))
+        with self._lock:
+            return name in self._index
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def sweep(self) -> int:
+        """Hapus file kedaluwarsa lalu file terlama sampai total <= max_bytes; return jumlah yang dihapus."""
+        if not self.memory:
+            self._rescan()
+        now = time.time()
+        removed = []
+        with self._lock:
+            for name, (size, created) in list(self._index.items()):
+                if now - created <= self.ttl_s:
+                    break
+                removed.append(name)
+                self._drop(name, "evicted_ttl")
+            while self._bytes > self.max_bytes and self._index:
+                name = next(iter(self._index))
+                removed.append(name)
+                self._drop(name, "evicted_size")
+            self._counters["sweeps"] += 1
+        if not self.memory:
+            for name in removed:
+                try:
+                    os.remove(self.path(name))
+                except OSError:
+                    pass
+        return len(removed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters, mode="memory" if self.memory else "disk", files=len(self._index),
+                        bytes=self._bytes, max_bytes=self.max_bytes, ttl_s=self.ttl_s)
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=5)
+
+    # ------------------------------------------------------------------
+    def _drop(self, name, counter):
+        size, _ = self._index.pop(name)
+        self._bytes -= size
+        self._blobs.pop(name, None)
+        self._counters[counter] += 1
+
+    def _scan(self):
+        """(mtime, name, size) semua file milik store di folder, terlama dulu."""
+        entries = []
+        for name in os.listdir(self.root):
+            if not is_store_name(name):
+                continue
+            try:
+                st = os.stat(self.path(name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, name, st.st_size))
+        return sorted(entries)
+
+    def _load_index(self):
+        for mtime, name, size in self._scan():
+            self._index[name] = (size, mtime)
+            self._bytes += size
+
+    def _rescan(self):
+        """Samakan index dengan isi folder (termasuk file dari worker lain) sebelum sweep."""
+        started = time.time()
+        entries = self._scan()
+        with self._lock:
+            index = OrderedDict((name, (size, mtime)) for mtime, name, size in entries)
+            # put() yang terjadi selama scan tetap dipertahankan
+            for name, (size, created) in self._index.items():
+                if name not in index and created >= started:
+                    index[name] = (size, created)
+            self._index = index
+            self._bytes = sum(size for size, _ in index.values())
+
+    def _sweep_loop(self):
+        while not self._closed:
+            self._wake.wait(self.sweep_interval_s)
+            self._wake.clear()
+            if self._closed:
+                break
+            try:
+                self.sweep()
+            except Exception as e:  # noqa: BLE001 - sweeper tidak boleh mati
+                print(f"[WARNING] Upload sweeper error: {e}")
@@ -0,0 +1,339 @@
+"""
+Knowledge distillation: latih model student ringan dari teacher DenseNet121
+(`densenet121_best.keras`) agar inference di CPU lebih murah.
+
+Student dilatih pada gabungan label asli dan output teacher yang dilunakkan
+(temperature T) di folder `image_dataset_from_directory` yang sama:
+
+    loss = alpha * CE(label, student) + (1 - alpha) * T^2 * KL(teacher_T || student_T)
+
+Struktur student sama dengan model produksi (input RGB 0-255 -> base nested
+dengan layer terakhir 'relu' -> GAP -> Dropout -> Dense softmax), sehingga
+langsung bisa dipakai `load_model_and_labels` dan Grad-CAM. Augmentasi
+dijalankan di luar model (teacher dan student melihat gambar yang sama).
+
+Backbone:
+- mobilenetv3small / mobilenetv3large: bobot dari file lokal lewat
+  `--backbone_weights` (offline), 'imagenet' (download), atau kosong (acak)
+- compact: CNN kecil (separable conv), selalu dari nol
+
+    python -m src.train_distill --train_dir data/train --val_dir data/val --backbone mobilenetv3small \\
+        --backbone_weights weights/weights_mobilenet_v3_small_224_1.0_float_no_top_v2.h5
+
+Di akhir, akurasi dan latensi CPU (ServingModel, batch 1) teacher dan student
+dibandingkan pada `--test_dir` (default: val_dir) dan disimpan ke
+`distill_<backbone>_report.json`.
+"""
+import os
+import argparse
+import json
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers, models
+from tensorflow.keras.preprocessing import image_dataset_from_directory
+from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau, CSVLogger
+
+from .config import DEFAULT_IMG_SIZE, BATCH_SIZE, LEARNING_RATE, SEED, MODEL_PATH, LABEL_MAP_PATH, MODELS_DIR
+from .inference import load_model_and_labels
+from .metrics import time_fn
+from .utils import set_seed, save_label_map, plot_training
+
+BACKBONES = ('mobilenetv3small', 'mobilenetv3large', 'compact')
+
+
+def build_augmentation():
+    """Augmentasi yang sama dengan build_model_improved, sebagai model terpisah."""
+    return models.Sequential([
+        layers.RandomFlip('horizontal_and_vertical'),
+        layers.RandomRotation(0.25),
+        layers.RandomZoom(0.2),
+        layers.RandomTranslation(0.1, 0.1),
+        layers.RandomBrightness(0.2),
+        layers.RandomContrast(0.4),
+    ], name='augmentation')
+
+
+def _compact_features(x):
+    """CNN kecil: stem conv + blok separable conv ber-stride (~50 ribu parameter)."""
+    x = layers.Rescaling(1.0 / 255)(x)
+    x = layers.Conv2D(24, 3, strides=2, padding='same', use_bias=False)(x)
+    x = layers.BatchNormalization()(x)
+    x = layers.ReLU()(x)
+    for filters in (32, 64, 128, 256):
+        x = layers.SeparableConv2D(filters, 3, strides=2, padding='same', use_bias=False)(x)
+        x = layers.BatchNormalization()(x)
+        x = layers.ReLU()(x)
+    return x
+
+
+def build_student(num_classes: int, img_size=DEFAULT_IMG_SIZE, backbone: str = 'mobilenetv3small',
+                  backbone_weights: str = None, dropout: float = 0.2):
+    """
+    Student: Input (RGB 0-255) -> base nested '<backbone>_base' -> GAP -> Dropout -> Dense.
+    Layer terakhir base bernama 'relu' (target Grad-CAM, seperti DenseNet121).
+    """
+    shape = (img_size[0], img_size[1], 3)
+    base_in = layers.Input(shape=shape)
+    if backbone == 'compact':
+        if backbone_weights:
+            raise ValueError("Backbone 'compact' tidak punya bobot pretrained")
+        x = _compact_features(base_in)
+    elif backbone in ('mobilenetv3small', 'mobilenetv3large'):
+        if backbone_weights and backbone_weights != 'imagenet' and not os.path.exists(backbone_weights):
+            raise FileNotFoundError(f"Backbone weights not found at {backbone_weights}")
+        app = (tf.keras.applications.MobileNetV3Small if backbone == 'mobilenetv3small'
+               else tf.keras.applications.MobileNetV3Large)
+        # include_preprocessing: rescaling 0-255 -> [-1, 1] ada di dalam model
+        x = app(input_shape=shape, include_top=False, weights=backbone_weights or None,
+                include_preprocessing=True)(base_in)
+    else:
+        raise ValueError(f"Unknown backbone: {backbone} (pilih {', '.join(BACKBONES)})")
+    x = layers.Activation('relu', name='relu')(x)
+    base_model = models.Model(base_in, x, name=f'{backbone}_base')
+
+    inputs = layers.Input(shape=shape)
+    x = base_model(inputs)
+    x = layers.GlobalAveragePooling2D()(x)
+    x = layers.Dropout(dropout)(x)
+    outputs = layers.Dense(num_classes, activation='softmax')(x)
+    return models.Model(inputs, outputs, name=f'student_{backbone}')
+
+
+def distillation_loss(y_true, student_probs, teacher_probs, temperature: float = 4.0, alpha: float = 0.3):
+    """
+    alpha * CE(label) + (1 - alpha) * T^2 * KL(teacher_T || student_T).
+    Kedua model berakhir di softmax: log-probabilitas dipakai sebagai logits.
+    """
+    eps = 1e-7
+    hard = tf.keras.losses.sparse_categorical_crossentropy(y_true, student_probs)
+    teacher_soft = tf.nn.softmax(tf.math.log(teacher_probs + eps) / temperature)
+    student_log_soft = tf.nn.log_softmax(tf.math.log(student_probs + eps) / temperature)
+    kl = tf.reduce_sum(teacher_soft * (tf.math.log(teacher_soft + eps) - student_log_soft), axis=-1)
+    return tf.reduce_mean(alpha * hard + (1.0 - alpha) * temperature ** 2 * kl)
+
+
+class Distiller(tf.keras.Model):
+    """Model pelatihan: teacher beku + student; hanya bobot student yang di-update."""
+
+    def __init__(self, student, teacher, augmentation=None, temperature: float = 4.0, alpha: float = 0.3):
+        super().__init__()
+        self.student = student
+        self.teacher = teacher
+        self.teacher.trainable = False
+        self.augmentation = augmentation
+        self.temperature = temperature
+        self.alpha = alpha
+        self.loss_tracker = tf.keras.metrics.Mean(name='loss')
+        self.acc_tracker = tf.keras.metrics.SparseCategoricalAccuracy(name='accuracy')
+        self.agreement_tracker = tf.keras.metrics.Mean(name='teacher_agreement')
+
+    @property
+    def metrics(self):
+        return [self.loss_tracker, self.acc_tracker, self.agreement_tracker]
+
+    def call(self, x, training=False):
+        return self.student(x, training=training)
+
+    def _update(self, loss, y, student_probs, teacher_probs):
+        self.loss_tracker.update_state(loss)
+        self.acc_tracker.update_state(y, student_probs)
+        agree = tf.cast(tf.equal(tf.argmax(student_probs, -1), tf.argmax(teacher_probs, -1)), tf.float32)
+        self.agreement_tracker.update_state(agree)
+        return {m.name: m.result() for m in self.metrics}
+
+    def train_step(self, data):
+        x, y = data
+        if self.augmentation is not None:
+            x = self.augmentation(x, training=True)
+        teacher_probs = self.teacher(x, training=False)
+        with tf.GradientTape() as tape:
+            student_probs = self.student(x, training=True)
+            loss = distillation_loss(y, student_probs, teacher_probs, self.temperature, self.alpha)
+        grads = tape.gradient(loss, self.student.trainable_variables)
+        self.optimizer.apply_gradients(zip(grads, self.student.trainable_variables))
+        return self._update(loss, y, student_probs, teacher_probs)
+
+    def test_step(self, data):
+        x, y = data
+        teacher_probs = self.teacher(x, training=False)
+        student_probs = self.student(x, training=False)
+        loss = distillation_loss(y, student_probs, teacher_probs, self.temperature, self.alpha)
+        return self._update(loss, y, student_probs, teacher_probs)
+
+
+class SaveBestStudent(tf.keras.callbacks.Callback):
+    """ModelCheckpoint untuk student saja (Distiller sendiri tidak untuk disimpan)."""
+
+    def __init__(self, student, path: str, monitor: str = 'val_accuracy'):
+        super().__init__()
+        self.student = student
+        self.path = path
+        self.monitor = monitor
+        self.best = -np.inf
+
+    def on_epoch_end(self, epoch, logs=None):
+        value = (logs or {}).get(self.monitor)
+        if value is not None and value > self.best:
+            print(f"\nEpoch {epoch + 1}: {self.monitor} improved {self.best:.4f} -> {value:.4f}, saving {self.path}")
+            self.best = value
+            self.student.save(self.path)
+
+
+def _accuracy(model, ds) -> float:
+    correct = total = 0
+    for images, labels in ds:
+        preds = model.predict(images.numpy(), verbose=0)
+        correct += int(np.sum(np.argmax(preds, axis=1) == labels.numpy()))
+        total += len(labels)
+    return correct / max(total, 1)
+
+
+def _latency_ms(model, img_size, repeats: int = 50) -> dict:
+    """Latensi forward pass batch 1 (model sudah di-warmup oleh load_model_and_labels)."""
+    x = np.random.RandomState(0).uniform(0, 255, (1, img_size[0], img_size[1], 3)).astype(np.float32)
+    return time_fn(lambda: model.predict(x, verbose=0), repeats, warmup=0)
+
+
+def _count_params(model):
+    """Jumlah parameter model Keras (juga ServingModel); None untuk backend .tflite / .pb."""
+    keras_model = getattr(model, "keras_model", model)
+    return int(keras_model.count_params()) if hasattr(keras_model, "count_params") else None
+
+
+def compare_models(entries, test_dir: str, label_map_path: str, img_size=DEFAULT_IMG_SIZE,
+                   batch_size: int = BATCH_SIZE, repeats: int = 50) -> dict:
+    """
+    Akurasi + latensi CPU per model lewat jalur serving (`load_model_and_labels(serving=True)`).
+    `entries`: list (nama, model_path).
+    """
+    ds = image_dataset_from_directory(test_dir, image_size=img_size, batch_size=batch_size,
+                                      label_mode='int', shuffle=False)
+    report = {}
+    for name, path in entries:
+        model, _ = load_model_and_labels(path, label_map_path, serving=True)
+        report[name] = {
+            "model_path": path,
+            "params": _count_params(model),
+            "size_mb": os.path.getsize(path) / (1024 * 1024),
+            "accuracy": _accuracy(model, ds),
+            "latency": _latency_ms(model, img_size, repeats),
+        }
+    return report
+
+
+def train_distill(train_dir, val_dir, teacher_path=MODEL_PATH, label_map_path=LABEL_MAP_PATH,
+                  output_dir=MODELS_DIR, backbone='mobilenetv3small', backbone_weights=None,
+                  img_size=DEFAULT_IMG_SIZE, batch_size=BATCH_SIZE, epochs=30, learning_rate=LEARNING_RATE,
+                  temperature=4.0, alpha=0.3, test_dir=None, augment=True):
+    """Latih student dari teacher; return dict laporan (juga ditulis ke distill_<backbone>_report.json)."""
+    set_seed(SEED)
+    os.makedirs(output_dir, exist_ok=True)
+
+    teacher, teacher_classes = load_model_and_labels(teacher_path, label_map_path)
+    if not isinstance(teacher, tf.keras.Model):
+        # Output teacher dihitung di dalam train_step (graph), jadi butuh model Keras
+        raise ValueError(f"Teacher harus model Keras (.keras/.h5), bukan {os.path.basename(teacher_path)}")
+
+    train_ds = image_dataset_from_directory(train_dir, seed=SEED, image_size=img_size,
+                                            batch_size=batch_size, label_mode='int')
+    val_ds = image_dataset_from_directory(val_dir, seed=SEED, image_size=img_size,
+                                          batch_size=batch_size, label_mode='int')
+    class_names = train_ds.class_names
+    if list(class_names) != list(teacher_classes):
+        raise ValueError(f"Kelas dataset {class_names} tidak sama dengan label map teacher {teacher_classes}")
+
+    AUTOTUNE = tf.data.AUTOTUNE
+    train_ds = train_ds.shuffle(1000).prefetch(AUTOTUNE)
+    val_ds = val_ds.prefetch(AUTOTUNE)
+
+    student = build_student(len(class_names), img_size, backbone, backbone_weights)
+    distiller = Distiller(student, teacher, build_augmentation() if augment else None, temperature, alpha)
+    distiller.compile(optimizer=tf.keras.optimizers.Adam(learning_rate))
+
+    student_path = os.path.join(output_dir, f'student_{backbone}.keras')
+    callbacks = [
+        SaveBestStudent(student, student_path),
+        EarlyStopping(monitor='val_accuracy', patience=8, mode='max', restore_best_weights=True, verbose=1),
+        ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=4, verbose=1, min_lr=1e-6),
+        CSVLogger(os.path.join(output_dir, f'distill_{backbone}_log.csv')),
+    ]
+
+    print(f"\n{'='*60}")
+    print(f"DISTILLATION: {os.path.basename(teacher_path)} -> {student.name} "
+          f"({student.count_params():,} vs {teacher.count_params():,} params, T={temperature}, alpha={alpha})")
+    print(f"{'='*60}\n")
+
+    history = distiller.fit(train_ds, validation_data=val_ds, epochs=epochs, callbacks=callbacks, verbose=1)
+    if not os.path.exists(student_path):
+        student.save(student_path)
+
+    # Student memakai label map yang sama dengan teacher
+    student_labels = os.path.join(output_dir, 'label_map.json')
+    if os.path.abspath(student_labels) != os.path.abspath(label_map_path):
+        save_label_map(class_names, student_labels)
+    plot_training(history, os.path.join(output_dir, f'distill_{backbone}'))
+
+    comparison = compare_models([("teacher", teacher_path), ("student", student_path)],
+                                test_dir or val_dir, student_labels, img_size, batch_size)
+    report = {
+        "backbone": backbone,
+        "backbone_weights": backbone_weights,
+        "temperature": temperature,
+        "alpha": alpha,
+        "epochs_run": len(history.history.get('loss', [])),
+        "label_map": student_labels,
+        **comparison,
+    }
+    report_path = os.path.join(output_dir, f'distill_{backbone}_report.json')
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'model':<10} {'params':>12} {'size MB':>9} {'accuracy':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for name in ("teacher", "student"):
+        r = report[name]
+        params = f"{r['params']:,}" if r['params'] is not None else "-"
+        print(f"{name:<10} {params:>12} {r['size_mb']:>9.1f} {r['accuracy']:>9.4f} "
+              f"{r['latency']['p50_ms']:>9.2f} {r['latency']['p95_ms']:>9.2f}")
+    print(f"\n✅ Student saved to {student_path} (report: {report_path})")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--train_dir', type=str, required=True)
+    parser.add_argument('--val_dir', type=str, required=True)
+    parser.add_argument('--test_dir', type=str, default=None, help='Untuk laporan akurasi (default: val_dir)')
+    parser.add_argument('--teacher_path', type=str, default=MODEL_PATH)
+    parser.add_argument('--label_map', type=str, default=LABEL_MAP_PATH)
+    parser.add_argument('--output_dir', type=str, default=MODELS_DIR)
+    parser.add_argument('--backbone', choices=BACKBONES, default='mobilenetv3small')
+    parser.add_argument('--backbone_weights', type=str, default=None,
+                        help="File bobot lokal (include_top=False), 'imagenet', atau kosong (acak)")
+    parser.add_argument('--img_size', type=int, nargs=2, default=DEFAULT_IMG_SIZE)
+    parser.add_argument('--batch_size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--learning_rate', type=float, default=LEARNING_RATE)
+    parser.add_argument('--temperature', type=float, default=4.0)
+    parser.add_argument('--alpha', type=float, default=0.3, help='Bobot loss label asli (sisanya: teacher)')
+    parser.add_argument('--no_augment', action='store_true')
+
+    args = parser.parse_args()
+
+    train_distill(
+        args.train_dir,
+        args.val_dir,
+        args.teacher_path,
+        args.label_map,
+        args.output_dir,
+        args.backbone,
+        args.backbone_weights,
+        tuple(args.img_size),
+        args.batch_size,
+        args.epochs,
+        args.learning_rate,
+        args.temperature,
+        args.alpha,
+        test_dir=args.test_dir,
+        augment=not args.no_augment,
+    )
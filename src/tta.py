@@ -0,0 +1,105 @@
+"""
+Test-time augmentation (TTA) dengan view dihedral (flip & rotasi 90 derajat).
+
+Semua view dari satu gambar dibentuk sebagai satu tensor (K, H, W, 3) lalu
+diprediksi dalam satu forward pass (langsung, atau lewat MicroBatcher yang
+menggabungkan K view ke batch yang sama); probabilitasnya dirata-rata.
+Flip & rotasi 90 derajat hanya menyusun ulang pixel (tanpa interpolasi),
+sama seperti augmentasi RandomFlip/RandomRotation saat training.
+"""
+import threading
+from concurrent.futures import Future, InvalidStateError
+
+import numpy as np
+
+# Urutan view: yang paling "murah" (flip) dulu; view 4..7 butuh gambar persegi
+TTA_TRANSFORMS = (
+    ("identity", lambda x: x),
+    ("flip_lr", lambda x: x[:, ::-1]),
+    ("flip_ud", lambda x: x[::-1]),
+    ("rot180", lambda x: x[::-1, ::-1]),
+    ("rot90", lambda x: np.rot90(x, 1)),
+    ("rot270", lambda x: np.rot90(x, 3)),
+    ("transpose", lambda x: x.transpose(1, 0, 2)),
+    ("transverse", lambda x: np.rot90(x, 2).transpose(1, 0, 2)),
+)
+MAX_VIEWS = len(TTA_TRANSFORMS)
+
+
+def clamp_views(num_views, shape=None) -> int:
+    """Jumlah view valid (1..8; maksimal 4 untuk gambar non-persegi)."""
+    limit = MAX_VIEWS if shape is None or shape[0] == shape[1] else 4
+    return max(1, min(int(num_views or 1), limit))
+
+
+def tta_views(img: np.ndarray, num_views: int = MAX_VIEWS) -> np.ndarray:
+    """Batch (K, H, W, C) berisi K view dihedral dari satu gambar (H, W, C)."""
+    k = clamp_views(num_views, img.shape)
+    return np.stack([fn(img) for _, fn in TTA_TRANSFORMS[:k]])
+
+
+def predict_tta(model, img: np.ndarray, num_views: int = MAX_VIEWS) -> np.ndarray:
+    """Satu forward pass untuk semua view; return rata-rata probabilitas."""
+    return model.predict(tta_views(img, num_views), verbose=0).mean(axis=0)
+
+
+def submit_tta(batcher, img: np.ndarray, num_views: int = MAX_VIEWS, explain_batcher=None) -> Future:
+    """
+    Versi MicroBatcher: K view di-submit berturut-turut sehingga masuk batch
+    yang sama. Future hasil berisi rata-rata probabilitas, atau
+    (probabilitas, heatmap) bila `explain_batcher` diberikan; heatmap
+    Grad-CAM hanya dihitung untuk view asli (view 0).
+    """
+    k = clamp_views(num_views, img.shape)
+    if k == 1:
+        return (explain_batcher or batcher).submit(img)
+
+    views = tta_views(img, k)
+    futures = []
+    if explain_batcher is not None:
+        futures.append(explain_batcher.submit(views[0]))
+        views = views[1:]
+    futures.extend(batcher.submit(v) for v in views)
+
+    # Future gabungan sengaja dibiarkan PENDING: cancel() oleh pemanggil (mis. deadline
+    # lewat) ikut membatalkan view yang belum masuk batch
+    result = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        try:
+            outputs = [f.result() for f in futures]
+            if explain_batcher is not None:
+                probs, heatmap = outputs[0]
+                value = (np.mean([probs] + outputs[1:], axis=0), heatmap)
+            else:
+                value = np.mean(outputs, axis=0)
+        except Exception as exc:  # noqa: BLE001 - diteruskan ke pemanggil
+            _settle(result, exc=exc)
+            return
+        _settle(result, value)
+
+    def cancelled(f):
+        if f.cancelled():
+            for view in futures:
+                view.cancel()
+
+    result.add_done_callback(cancelled)
+    for f in futures:
+        f.add_done_callback(done)
+    return result
+
+
+def _settle(future: Future, value=None, exc: BaseException = None):
+    try:
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(value)
+    except InvalidStateError:  # sudah di-cancel pemanggil
+        pass
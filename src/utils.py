@@ -6,6 +6,8 @@ import tensorflow as tf
 import matplotlib.pyplot as plt
 from typing import List
 
+from .config import ALLOWED_EXTENSIONS
+
 
 def set_seed(seed: int = 42):
     random.seed(seed)
@@ -25,6 +27,16 @@ def load_label_map(path: str) -> List[str]:
     return [mapping[str(i)] if isinstance(list(mapping.keys())[0], str) else mapping[i] for i in range(len(mapping))]
 
 
+def list_images(folder: str) -> List[str]:
+    """Semua gambar (png/jpg/jpeg) di dalam folder, rekursif dan terurut."""
+    paths = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if name.rsplit('.', 1)[-1].lower() in ALLOWED_EXTENSIONS:
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
 def plot_training(history, out_dir: str):
     os.makedirs(out_dir, exist_ok=True)
     # Accuracy
@@ -0,0 +1,72 @@
+"""Test untuk admission control (slot paralel, antrian terbatas, deadline)."""
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from src.admission import AdmissionController, Overloaded
+from src.batching import MicroBatcher, wait_result
+
+
+def test_queue_full_rejects_immediately():
+    admission = AdmissionController(max_concurrent=1, max_queue=0)
+    admission.acquire()
+    start = time.monotonic()
+    with pytest.raises(Overloaded) as info:
+        admission.acquire()
+    assert time.monotonic() - start < 0.5
+    assert info.value.status == 429 and info.value.reason == "queue_full"
+    assert info.value.retry_after >= 1
+
+
+def test_queued_request_gets_slot_or_times_out():
+    """Request yang antre mendapat slot saat dilepas; bila terlalu lama -> 503."""
+    admission = AdmissionController(max_concurrent=1, max_queue=4, max_wait_s=5.0)
+    admission.acquire()
+    threading.Timer(0.05, admission.release, args=(2.0,)).start()
+    assert admission.acquire() > 0.0
+    assert admission.stats()["service_s_ewma"] == pytest.approx(2.0)
+
+    with pytest.raises(Overloaded) as info:
+        admission.acquire(max_wait_s=0.05)
+    assert info.value.status == 503 and info.value.reason == "wait_timeout"
+    # Estimasi Retry-After: 1 slot x 2 detik per request
+    assert info.value.retry_after == 2
+
+    stats = admission.stats()
+    assert stats["in_flight"] == 1 and stats["queue_depth"] == 0
+    assert stats["rejected_wait_timeout"] == 1 and stats["max_queue_depth"] == 1
+
+
+def test_wait_result_cancels_expired_request():
+    """Deadline lewat sebelum masuk batch -> future di-cancel dan tidak dihitung."""
+    started = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def batch_fn(x):
+        seen.append(len(x))
+        started.set()
+        release.wait(5)
+        return x
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=1, max_wait_ms=1)
+    try:
+        first = batcher.submit([1.0])
+        started.wait(5)
+        late = batcher.submit([2.0])
+        with pytest.raises(TimeoutError):
+            wait_result(late, timeout=0.01)
+        assert late.cancelled()
+        release.set()
+        first.result(timeout=5)
+    finally:
+        batcher.close(timeout=5)
+    assert seen == [1]
+
+
+def test_wait_result_passes_through():
+    future = Future()
+    future.set_result(42)
+    assert wait_result(future, timeout=0.1) == 42
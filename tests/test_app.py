@@ -17,7 +17,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 def client():
     """Setup Flask test client."""
     # Import app di dalam fixture untuk menghindari side effects
-    from app import app as flask_app
+    from app import app as flask_app, _CACHE
+    _CACHE.clear()  # hasil dari test lain (mock berbeda) tidak boleh terbawa
     flask_app.config['TESTING'] = True
     flask_app.config['UPLOAD_FOLDER'] = tempfile.mkdtemp()
     
@@ -141,3 +142,433 @@ def test_allowed_file_extension():
     assert allowed_file('test.JPG') == True  # Case insensitive check
     assert allowed_file('test') == False
 
+
+
+@pytest.fixture
+def leaf_image_bytes():
+    """JPEG sintetis bertekstur hijau yang lolos validate_image."""
+    import cv2
+    rng = np.random.RandomState(0)
+    hsv = np.zeros((300, 300, 3), dtype=np.uint8)
+    hsv[..., 0] = rng.randint(35, 70, (300, 300))
+    hsv[..., 1] = rng.randint(120, 220, (300, 300))
+    hsv[..., 2] = rng.randint(60, 200, (300, 300))
+    ok, buf = cv2.imencode('.jpg', cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR))
+    return buf.tobytes()
+
+
+@pytest.fixture
+def api_batcher():
+    """MicroBatcher dengan model palsu: selalu memprediksi Class_C (0.7)."""
+    from src.batching import MicroBatcher
+    batcher = MicroBatcher(lambda x: np.tile([0.1, 0.2, 0.7], (len(x), 1)), max_batch_size=4, max_wait_ms=1)
+    yield batcher
+    batcher.close()
+
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.data.decode('utf-8').splitlines() if line]
+
+
+@patch('app._get_model_and_labels')
+def test_api_predict_multipart_streams_ndjson(mock_get_model, client, api_batcher, leaf_image_bytes):
+    """Endpoint API menerima banyak file dan mengembalikan satu baris NDJSON per gambar."""
+    import io
+    mock_get_model.return_value = (Mock(), ["Class_A", "Class_B", "Class_C"])
+
+    with patch('app._get_batcher', return_value=api_batcher):
+        data = {'files': [
+            (io.BytesIO(leaf_image_bytes), 'a.jpg'),
+            (io.BytesIO(leaf_image_bytes), 'b.jpg'),
+            (io.BytesIO(b'bukan gambar'), 'c.txt'),
+        ]}
+        response = client.post('/api/v1/predict', data=data, content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = sorted(_ndjson(response), key=lambda r: r['index'])
+    assert [r['filename'] for r in lines] == ['a.jpg', 'b.jpg', 'c.txt']
+    assert [r['status'] for r in lines] == ['ok', 'ok', 'rejected']
+    assert lines[0]['class'] == 'Class_C'
+    assert lines[0]['confidence'] == pytest.approx(0.7)
+    assert lines[0]['probabilities'] == pytest.approx({"Class_A": 0.1, "Class_B": 0.2, "Class_C": 0.7})
+
+
+@patch('app._get_model_and_labels')
+def test_api_predict_zip(mock_get_model, client, api_batcher, leaf_image_bytes):
+    """Gambar di dalam zip diproses satu per satu."""
+    import io
+    import zipfile
+    mock_get_model.return_value = (Mock(), ["Class_A", "Class_B", "Class_C"])
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as zf:
+        zf.writestr('plot1/leaf1.jpg', leaf_image_bytes)
+        zf.writestr('plot1/leaf2.jpg', leaf_image_bytes)
+    buf.seek(0)
+
+    with patch('app._get_batcher', return_value=api_batcher):
+        response = client.post('/api/v1/predict', data={'files': (buf, 'plot1.zip')},
+                               content_type='multipart/form-data')
+
+    lines = _ndjson(response)
+    assert sorted(r['filename'] for r in lines) == ['plot1/leaf1.jpg', 'plot1/leaf2.jpg']
+    assert all(r['status'] == 'ok' for r in lines)
+
+
+@patch('app._get_model_and_labels')
+def test_api_predict_tta(mock_get_model, client, leaf_image_bytes):
+    """?tta=N: N view dalam satu batch, probabilitas dirata-rata."""
+    import io
+    from src.batching import MicroBatcher
+    mock_get_model.return_value = (Mock(), ["Class_A", "Class_B", "Class_C"])
+    sizes = []
+
+    def fake_predict(x):
+        sizes.append(len(x))
+        # View asli -> Class_A, view lain -> Class_C
+        probs = np.tile([0.1, 0.2, 0.7], (len(x), 1))
+        probs[0] = [0.9, 0.05, 0.05] if len(x) == 4 else probs[0]
+        return probs
+
+    batcher = MicroBatcher(fake_predict, max_batch_size=8, max_wait_ms=50)
+    try:
+        with patch('app._get_batcher', return_value=batcher):
+            response = client.post('/api/v1/predict?tta=4', data={'files': (io.BytesIO(leaf_image_bytes), 'a.jpg')},
+                                   content_type='multipart/form-data')
+            [line] = _ndjson(response)
+            bad = client.post('/api/v1/predict?tta=abc', data={'files': (io.BytesIO(leaf_image_bytes), 'a.jpg')},
+                              content_type='multipart/form-data')
+    finally:
+        batcher.close()
+
+    assert sizes == [4]
+    assert line['probabilities']['Class_A'] == pytest.approx((0.9 + 3 * 0.1) / 4)
+    assert bad.status_code == 400
+
+
+def test_api_predict_no_files(client):
+    response = client.post('/api/v1/predict')
+    assert response.status_code == 400
+
+
+def test_heatmap_status_unknown_job(client):
+    response = client.get('/api/v1/heatmap/tidak-ada')
+    assert response.status_code == 404
+    assert response.get_json()['status'] == 'unknown'
+
+
+def test_healthz(client):
+    """Liveness selalu 200 tanpa menunggu model."""
+    response = client.get('/healthz')
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "ok"
+
+
+def test_readyz_reports_warm_state(client):
+    """Readiness 503 selama model belum siap, 200 setelah preload selesai."""
+    from src.registry import ModelHandle
+    from src.startup import StartupState
+
+    state = StartupState()
+    with patch('app._STARTUP', state), patch('app._start_preload') as start_preload:
+        response = client.get('/readyz')
+        assert response.status_code == 503
+        assert response.get_json()["ready"] is False
+        start_preload.assert_called_once()
+
+        state.mark_ready()
+        handle = ModelHandle("v1", Mock(input_shape=(None, 192, 192, 3)), ["A"], explainer=None)
+        with patch('app._HANDLE', handle):
+            response = client.get('/readyz')
+        assert response.status_code == 200
+        assert response.get_json()["status"] == "ready"
+        assert response.get_json()["capabilities"] == {"gradcam": False, "resolutions": [[192, 192]]}
+
+
+def test_uploaded_file_served_from_memory_store(client):
+    """Mode memori: upload dilayani langsung dari RAM lewat /uploads/<name>."""
+    from src.storage import UploadStore
+
+    store = UploadStore(memory=True, start_sweeper=False)
+    name = store.save(b"\xff\xd8fake-jpeg", "jpg")
+    with patch('app._get_upload_store', return_value=store):
+        response = client.get(f'/uploads/{name}')
+        assert response.status_code == 200
+        assert response.data == b"\xff\xd8fake-jpeg"
+        assert response.mimetype == "image/jpeg"
+        assert client.get('/uploads/' + 'b' * 32 + '.jpg').status_code == 404
+        assert client.get('/uploads/not-a-store-name.jpg').status_code == 404
+
+
+def test_metrics_endpoint(client):
+    """/metrics: teks Prometheus dengan counter outcome & latency per stage."""
+    client.post('/predict')  # tanpa file -> bad_request
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    text = response.data.decode()
+    assert 'tomatocare_requests_total{endpoint="predict",outcome="bad_request"}' in text
+    assert 'tomatocare_stage_seconds{stage="predict_total",quantile="0.99"}' in text
+    assert "tomatocare_model_load_seconds" in text
+
+
+def test_admin_model_reload_and_rollback(client, tmp_path):
+    """Reload versi baru di background lalu swap atomik; rollback ke versi sebelumnya."""
+    import app as flask_app
+    from src.registry import ModelHandle, ModelRegistry
+
+    for version in ("v1", "v2"):
+        (tmp_path / version).mkdir()
+        (tmp_path / version / "model.keras").write_bytes(b"model")
+        (tmp_path / version / "label_map.json").write_text('{"0": "A"}')
+    registry = ModelRegistry(str(tmp_path))
+    registry.activate("v1")
+
+    def fake_load(version=None, state=None):
+        version = version or registry.active()
+        return ModelHandle(version, Mock(), ["A"], fingerprint=version)
+
+    old = ModelHandle("v1", Mock(), ["A"], fingerprint="v1")
+    headers = {"X-Admin-Token": "rahasia"}
+    with patch('app._REGISTRY', registry), patch('app._load_handle', side_effect=fake_load), \
+            patch('app._HANDLE', old), patch('app.ADMIN_TOKEN', "rahasia"):
+        assert client.get('/admin/models').status_code == 401
+        assert client.post('/admin/models/reload', json={"version": "v9"}, headers=headers).status_code == 404
+
+        response = client.post('/admin/models/reload?wait=1', json={"version": "v2"}, headers=headers)
+        assert response.status_code == 200
+        assert response.get_json()["active"]["version"] == "v2"
+        assert flask_app._HANDLE.version == "v2"
+        assert old.closed
+        assert registry.active() == "v2"
+
+        response = client.post('/admin/models/rollback?wait=1', headers=headers)
+        assert response.status_code == 200
+        assert flask_app._HANDLE.version == "v1"
+        assert registry.snapshot()["history"] == ["v2"]
+
+
+def test_admin_disabled_without_token(client):
+    """Tanpa ADMIN_TOKEN endpoint admin tidak bisa dipakai."""
+    with patch('app.ADMIN_TOKEN', None):
+        assert client.post('/admin/models/reload').status_code == 403
+
+
+def test_api_predict_overloaded_returns_retry_after(client):
+    """Server jenuh (slot & antrian penuh) -> 429 langsung dengan Retry-After."""
+    from src.admission import AdmissionController
+
+    admission = AdmissionController(max_concurrent=1, max_queue=0, max_wait_s=0.1)
+    admission.acquire()  # slot satu-satunya sedang dipakai request lain
+    with patch('app._ADMISSION', admission):
+        response = client.post('/api/v1/predict')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert response.get_json()['reason'] == 'queue_full'
+    assert admission.stats()['rejected_queue_full'] == 1
+
+    # Slot dilepas setelah response selesai (tidak bocor)
+    admission.release()
+    with patch('app._ADMISSION', admission):
+        assert client.post('/api/v1/predict').status_code == 400
+    assert admission.in_flight() == 0
+
+
+def test_predict_profiled_with_admin_header(client, tmp_path):
+    """X-Profile hanya dihormati dengan token admin; profil bisa dilihat lewat /admin/profiles."""
+    from src.profiling import ProfileStore
+
+    store = ProfileStore(str(tmp_path))
+    with patch('app._PROFILES', store), patch('app.ADMIN_TOKEN', "rahasia"):
+        response = client.post('/predict', data={}, headers={"X-Profile": "1"})
+        assert "X-Profile-Id" not in response.headers
+        assert store.ids() == []
+
+        headers = {"X-Profile": "1", "X-Admin-Token": "rahasia"}
+        response = client.post('/predict', data={}, headers=headers)
+        profile_id = response.headers["X-Profile-Id"]
+        assert store.ids() == [profile_id]
+
+        listing = client.get('/admin/profiles', headers={"X-Admin-Token": "rahasia"}).get_json()
+        assert listing["profiles"][0]["id"] == profile_id
+        assert listing["profiles"][0]["status"] == response.status_code
+        summary = client.get(f'/admin/profiles/{profile_id}/summary.txt', headers={"X-Admin-Token": "rahasia"})
+        assert summary.status_code == 200 and b"cumulative" in summary.data
+        assert client.get(f'/admin/profiles/{profile_id}/x.py',
+                          headers={"X-Admin-Token": "rahasia"}).status_code == 404
+
+
+def test_non_admin_profile_header_still_sampled(client, tmp_path):
+    """X-Profile: 0 dari non-admin tidak bisa keluar dari sampling PROFILE_SAMPLE_RATE."""
+    from src.profiling import ProfileStore
+
+    store = ProfileStore(str(tmp_path))
+    with patch('app._PROFILES', store), patch('app.ADMIN_TOKEN', "rahasia"), \
+            patch('app.PROFILE_SAMPLE_RATE', 1.0):
+        response = client.post('/predict', data={}, headers={"X-Profile": "0"})
+        assert store.ids() == [response.headers["X-Profile-Id"]]
+
+
+@patch('app._get_model_and_labels')
+def test_api_predict_reduced_resolution(mock_get_model, client, leaf_image_bytes):
+    """Saat controller memilih resolusi lebih kecil, input model & hasil API memakai resolusi tersebut."""
+    import io
+    from src.batching import MicroBatcher
+    mock_get_model.return_value = (Mock(), ["Class_A", "Class_B", "Class_C"])
+    shapes = []
+
+    def fake_predict(x):
+        shapes.append(x.shape[1:3])
+        return np.tile([0.1, 0.2, 0.7], (len(x), 1))
+
+    batcher = MicroBatcher(fake_predict, max_batch_size=4, max_wait_ms=1)
+    try:
+        with patch('app._select_resolution', return_value=(128, 128)), \
+                patch('app._get_batcher', return_value=batcher) as get_batcher:
+            response = client.post('/api/v1/predict', data={'files': (io.BytesIO(leaf_image_bytes), 'a.jpg')},
+                                   content_type='multipart/form-data')
+            [line] = _ndjson(response)
+    finally:
+        batcher.close()
+
+    get_batcher.assert_called_with((128, 128))
+    assert shapes == [(128, 128)]
+    assert line['resolution'] == [128, 128]
+
+
+def test_async_heatmap_job_pins_handle_across_swap(leaf_image_bytes):
+    """Job heatmap async memegang handle request: swap model sebelum job jalan tidak menutup batcher-nya."""
+    import app as A
+    from src.batching import MicroBatcher
+    from src.preprocess import ImageContext
+    from src.registry import ModelHandle
+
+    handle = ModelHandle("v1", Mock(), ["Class_A", "Class_B", "Class_C"], explainer=Mock(), fingerprint="v1")
+    handle.explain_batcher = MicroBatcher(
+        lambda x: (np.tile([0.1, 0.2, 0.7], (len(x), 1)), np.ones((len(x), 4, 4), dtype=np.float32)),
+        max_batch_size=2, max_wait_ms=1,
+    )
+    handle.on_close(handle.explain_batcher.close)
+    submitted = []
+    queue = Mock(submit=lambda fn, cleanup=None: submitted.append((fn, cleanup)) or "job")
+
+    with patch('app._get_heatmap_jobs', return_value=queue):
+        with A.app.test_request_context('/predict', method='POST'):
+            assert handle.acquire()  # ref milik request (dilepas di teardown)
+            A.request.environ[A._HANDLE_KEY] = handle
+            A._submit_heatmap_job(ImageContext(leaf_image_bytes), "a.jpg")
+
+    handle.retire()  # swap ke versi lain sebelum worker menjalankan job
+    assert not handle.closed
+    [(fn, cleanup)] = submitted
+    with patch('app._write_heatmap', return_value="heatmap_a.jpg"):
+        try:
+            assert fn() == "heatmap_a.jpg"
+        finally:
+            cleanup()
+    assert handle.closed
+
+
+def test_predict_sets_input_resolution_header(client, leaf_image_bytes):
+    """/predict melaporkan resolusi input yang dipakai untuk prediksi lewat header X-Input-Resolution."""
+    import io
+    entry = {"valid": True, "message": "Valid", "probs": [0.1, 0.2, 0.7], "heatmap": None, "resolution": [128, 128]}
+    with patch('app._get_model_and_labels', return_value=(Mock(), ["Class_A", "Class_B", "Class_C"])), \
+            patch('app._analyze_upload', return_value=entry):
+        response = client.post('/predict', data={'file': (io.BytesIO(leaf_image_bytes), 'a.jpg')},
+                               content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    assert response.headers['X-Input-Resolution'] == '128x128'
+
+
+def test_select_resolution_falls_back_without_variant():
+    """Controller memilih resolusi rendah, tetapi model tanpa varian (mis. TFLite) tetap resolusi penuh."""
+    import app as A
+    from src.config import DEFAULT_IMG_SIZE
+    from src.multires import ResolutionController, ResolutionVariant
+
+    controller = ResolutionController([tuple(DEFAULT_IMG_SIZE), (128, 128)], queue_high=0, min_dwell_s=0)
+    with patch('app._RESOLUTION', controller), patch('app._ADMISSION', None):
+        with patch('app._get_handle', return_value=Mock(variants={})):
+            assert A._select_resolution() == tuple(DEFAULT_IMG_SIZE)
+        assert controller.current == (128, 128)
+        variants = {(128, 128): ResolutionVariant((128, 128), Mock())}
+        with patch('app._get_handle', return_value=Mock(variants=variants)):
+            assert A._select_resolution() == (128, 128)
+
+
+def test_async_heatmap_job_uses_request_resolution(leaf_image_bytes):
+    """Job heatmap async memakai varian resolusi request (batcher, input, cache key) dan dicatat controller."""
+    import app as A
+    from src.batching import MicroBatcher
+    from src.cache import make_key
+    from src.multires import ResolutionVariant
+    from src.preprocess import ImageContext
+    from src.registry import ModelHandle
+
+    shapes = []
+
+    def explain(x):
+        shapes.append(x.shape[1:3])
+        return np.tile([0.1, 0.2, 0.7], (len(x), 1)), np.ones((len(x), 4, 4), dtype=np.float32)
+
+    handle = ModelHandle("v1", Mock(), ["Class_A", "Class_B", "Class_C"], explainer=Mock(), fingerprint="v1")
+    variant = ResolutionVariant((128, 128), Mock(), explainer=Mock())
+    variant.explain_batcher = MicroBatcher(explain, max_batch_size=2, max_wait_ms=1)
+    handle.variants = {(128, 128): variant, (96, 96): ResolutionVariant((96, 96), Mock())}
+    submitted = []
+    queue = Mock(submit=lambda fn, cleanup=None: submitted.append((fn, cleanup)) or "job")
+    ctx = ImageContext(leaf_image_bytes)
+    controller = Mock()
+
+    try:
+        with patch('app._get_heatmap_jobs', return_value=queue), patch('app._RESOLUTION', controller), \
+                patch('app._write_heatmap', return_value="heatmap_a.jpg"):
+            with A.app.test_request_context('/predict', method='POST'):
+                assert handle.acquire()
+                A.request.environ[A._HANDLE_KEY] = handle
+                A._submit_heatmap_job(ctx, "a.jpg", (128, 128))
+                A._submit_heatmap_job(ctx, "b.jpg", (96, 96))  # varian tanpa Grad-CAM
+            fn, cleanup = submitted[0]
+            assert fn() == "heatmap_a.jpg"
+            cleanup()
+    finally:
+        variant.explain_batcher.close()
+
+    assert shapes == [(128, 128)]
+    controller.observe.assert_called_once()
+    assert A._CACHE.get(make_key(ctx.data, "v1", "heatmap", "res128x128")) is not None
+    assert submitted[1][0].args[-1] == tuple(A.DEFAULT_IMG_SIZE)
+    submitted[1][1]()
+
+
+@patch('app._get_model_and_labels')
+def test_api_and_predict_share_analysis_path(mock_get_model, client, leaf_image_bytes):
+    """Hasil API masuk cache dengan key & entry yang sama dengan jalur /predict (_analyze_upload)."""
+    import io
+    import app as A
+    from src.batching import MicroBatcher
+    from src.preprocess import ImageContext
+    mock_get_model.return_value = (Mock(), ["Class_A", "Class_B", "Class_C"])
+    calls = []
+
+    def fake_predict(x):
+        calls.append(len(x))
+        return np.tile([0.1, 0.2, 0.7], (len(x), 1))
+
+    batcher = MicroBatcher(fake_predict, max_batch_size=8, max_wait_ms=1)
+    try:
+        with patch('app._get_batcher', return_value=batcher):
+            response = client.post('/api/v1/predict?tta=2', data={'files': (io.BytesIO(leaf_image_bytes), 'a.jpg')},
+                                   content_type='multipart/form-data')
+            [line] = _ndjson(response)
+            with A.app.test_request_context('/predict', method='POST'):
+                entry = A._analyze_upload(ImageContext(leaf_image_bytes), with_heatmap=False, tta=2)
+    finally:
+        batcher.close()
+
+    assert calls == [2]  # /predict memakai hasil cache dari API, tanpa inference ulang
+    assert entry["probs"] == pytest.approx([0.1, 0.2, 0.7])
+    assert line["resolution"] == entry["resolution"]
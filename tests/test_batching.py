@@ -0,0 +1,100 @@
+"""Test untuk modul batching (MicroBatcher)."""
+import threading
+
+import numpy as np
+import pytest
+
+from src.batching import MicroBatcher, BatcherClosed
+
+
+def test_single_request_returns_row():
+    """Satu request tetap diproses setelah max_wait_ms habis."""
+    batcher = MicroBatcher(lambda x: x * 2, max_batch_size=4, max_wait_ms=1)
+    try:
+        result = batcher.predict(np.array([1.0, 2.0]), timeout=5)
+        np.testing.assert_allclose(result, [2.0, 4.0])
+    finally:
+        batcher.close()
+
+
+def test_concurrent_requests_are_batched():
+    """Request bersamaan digabung dan hasil dikembalikan ke caller yang benar."""
+    batch_sizes = []
+
+    def batch_fn(x):
+        batch_sizes.append(len(x))
+        return x + 100
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=200)
+    try:
+        futures = [batcher.submit(np.array([float(i)])) for i in range(8)]
+        results = [f.result(timeout=5) for f in futures]
+    finally:
+        batcher.close()
+
+    assert [float(r[0]) for r in results] == [100.0 + i for i in range(8)]
+    assert batch_sizes == [8]
+    stats = batcher.stats()
+    assert stats["requests"] == 8
+    assert stats["batches"] == 1
+    assert stats["max_batch_size_seen"] == 8
+
+
+def test_max_batch_size_is_respected():
+    """Batch tidak pernah melebihi max_batch_size."""
+    batch_sizes = []
+    lock = threading.Lock()
+
+    def batch_fn(x):
+        with lock:
+            batch_sizes.append(len(x))
+        return x
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=3, max_wait_ms=50)
+    try:
+        futures = [batcher.submit(np.zeros(2)) for _ in range(10)]
+        for f in futures:
+            f.result(timeout=5)
+    finally:
+        batcher.close()
+
+    assert max(batch_sizes) <= 3
+    assert sum(batch_sizes) == 10
+
+
+def test_tuple_outputs_are_split_per_request():
+    """Output berupa tuple dibagi per baris untuk setiap caller."""
+    batcher = MicroBatcher(lambda x: (x, x.sum(axis=1)), max_batch_size=2, max_wait_ms=50)
+    try:
+        f1 = batcher.submit(np.array([1.0, 1.0]))
+        f2 = batcher.submit(np.array([2.0, 3.0]))
+        a, total = f2.result(timeout=5)
+        f1.result(timeout=5)
+    finally:
+        batcher.close()
+
+    np.testing.assert_allclose(a, [2.0, 3.0])
+    assert float(total) == pytest.approx(5.0)
+
+
+def test_errors_propagate_to_every_caller():
+    """Exception dari batch_fn diteruskan ke semua future dalam batch."""
+    def batch_fn(x):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait_ms=50)
+    try:
+        futures = [batcher.submit(np.zeros(1)) for _ in range(2)]
+        for f in futures:
+            with pytest.raises(RuntimeError):
+                f.result(timeout=5)
+    finally:
+        batcher.close()
+    assert batcher.stats()["errors"] == 1
+
+
+def test_submit_after_close_raises():
+    batcher = MicroBatcher(lambda x: x)
+    batcher.close()
+    with pytest.raises(BatcherClosed):
+        batcher.submit(np.zeros(1))
@@ -0,0 +1,58 @@
+"""Test untuk logika pembanding hasil benchmark (load test & micro-benchmark suite)."""
+import json
+
+import pytest
+
+from benchmarks.loadtest import classify, compare as compare_load
+from benchmarks.suite import compare as compare_suite
+
+
+def _level(concurrency, rps, p95, by_kind=None):
+    return {"concurrency": concurrency, "total": {"throughput_rps": rps, "p95_ms": p95},
+            "by_kind": by_kind or {}}
+
+
+def test_loadtest_compare_flags_regressions_beyond_tolerance():
+    """Throughput turun / p95 naik melebihi toleransi = regresi; di dalam toleransi = bukan."""
+    baseline = {"levels": [_level(4, 10.0, 100.0, {"gradcam": {"throughput_rps": 5.0, "p95_ms": 200.0}})]}
+    current = {"levels": [
+        _level(4, 8.0, 110.0, {"gradcam": {"throughput_rps": 5.0, "p95_ms": 240.0}}),
+        _level(8, 1.0, 900.0),  # tidak ada di baseline: dilewati
+    ]}
+    rows = {(r["group"], r["metric"]): r for r in compare_load(current, baseline, tolerance=0.15)}
+
+    assert set(rows) == {("total", "throughput_rps"), ("total", "p95_ms"),
+                         ("gradcam", "throughput_rps"), ("gradcam", "p95_ms")}
+    assert rows[("total", "throughput_rps")]["regression"]  # -20%
+    assert rows[("total", "throughput_rps")]["change"] == pytest.approx(-0.2)
+    assert not rows[("total", "p95_ms")]["regression"]  # +10%
+    assert not rows[("gradcam", "throughput_rps")]["regression"]
+    assert rows[("gradcam", "p95_ms")]["regression"]  # +20%
+
+
+def test_loadtest_classify_outcomes():
+    ok = json.dumps({"status": "ok", "heatmap_url": None}).encode()
+    assert classify("predict", "api", 200, ok) == "ok"
+    assert classify("gradcam", "api", 200, ok) == "mismatch"  # heatmap diminta tapi tidak ada
+    assert classify("reject", "api", 200, json.dumps({"status": "rejected"}).encode()) == "ok"
+    assert classify("reject", "api", 200, ok) == "mismatch"
+    assert classify("predict", "api", 200, json.dumps({"status": "error"}).encode()) == "error"
+    assert classify("predict", "api", 200, b"") == "error"
+    assert classify("predict", "api", 429, b"") == "shed"
+    assert classify("predict", "web", 503, b"") == "shed"
+    assert classify("reject", "web", 302, b"") == "ok"
+    assert classify("predict", "web", 302, b"") == "error"
+
+
+def test_suite_compare_needs_relative_and_absolute_slowdown():
+    """Slowdown hanya bila p50 naik > threshold DAN > min_delta_ms; case baru diabaikan."""
+    baseline = {"cases": {"fast": {"p50_ms": 0.2}, "slow": {"p50_ms": 10.0}, "same": {"p50_ms": 5.0}}}
+    current = {"cases": {"fast": {"p50_ms": 0.4}, "slow": {"p50_ms": 12.0}, "same": {"p50_ms": 5.2},
+                         "new": {"p50_ms": 1.0}}}
+    rows = {r["case"]: r for r in compare_suite(baseline, current, threshold=0.15, min_delta_ms=0.5)}
+
+    assert set(rows) == {"fast", "slow", "same"}
+    assert not rows["fast"]["slowdown"]  # +100% tapi hanya 0.2 ms
+    assert rows["slow"]["slowdown"]  # +20%, +2 ms
+    assert not rows["same"]["slowdown"]  # +4%
+    assert rows["slow"]["change"] == pytest.approx(0.2)
@@ -0,0 +1,121 @@
+"""Test untuk modul cache (PredictionCache)."""
+import threading
+import time
+
+import pytest
+
+from src.cache import PredictionCache, make_key, model_fingerprint
+
+
+def _entry(label="A", heatmap=None):
+    return {"valid": True, "message": "Valid", "probs": [0.1, 0.9], "heatmap": heatmap, "label": label}
+
+
+def test_make_key_depends_on_bytes_and_fingerprint():
+    assert make_key(b"abc", "m1") == make_key(b"abc", "m1")
+    assert make_key(b"abc", "m1") != make_key(b"abd", "m1")
+    assert make_key(b"abc", "m1") != make_key(b"abc", "m2")
+    assert make_key(b"abc", "m1", "heatmap") != make_key(b"abc", "m1", "probs")
+
+
+def test_model_fingerprint_changes_with_file(tmp_path):
+    path = tmp_path / "model.keras"
+    assert model_fingerprint(str(path)) == "missing"
+    path.write_bytes(b"v1")
+    fp1 = model_fingerprint(str(path))
+    path.write_bytes(b"version-2")
+    assert model_fingerprint(str(path)) != fp1
+
+
+def test_lru_eviction_and_counters():
+    cache = PredictionCache(max_entries=2)
+    cache.put("a", _entry("a"))
+    cache.put("b", _entry("b"))
+    assert cache.get("a")["label"] == "a"  # "a" jadi paling baru
+    cache.put("c", _entry("c"))            # "b" tergusur
+
+    assert cache.get("b") is None
+    assert cache.get("c")["label"] == "c"
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+
+
+def test_get_or_compute_coalesces_concurrent_requests():
+    """Request identik bersamaan hanya menghitung sekali."""
+    cache = PredictionCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return _entry()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 5
+    assert cache.stats()["coalesced"] == 4
+    assert cache.get_or_compute("k", compute) is results[0]
+    assert len(calls) == 1
+
+
+def test_coalesced_waiter_respects_timeout():
+    """Request duplikat berhenti menunggu setelah timeout; perhitungan pemilik tetap selesai & di-cache."""
+    cache = PredictionCache()
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return _entry()
+
+    owner = threading.Thread(target=lambda: cache.get_or_compute("k", slow))
+    owner.start()
+    started.wait(5)
+    begin = time.monotonic()
+    with pytest.raises(TimeoutError):
+        cache.get_or_compute("k", slow, timeout=0.05)
+    assert time.monotonic() - begin < 1.0
+    release.set()
+    owner.join()
+
+    assert cache.stats()["coalesced_timeouts"] == 1
+    assert cache.get("k")["label"] == "A"
+
+
+def test_get_or_compute_does_not_cache_errors():
+    cache = PredictionCache()
+
+    def boom():
+        raise FileNotFoundError("model hilang")
+
+    with pytest.raises(FileNotFoundError):
+        cache.get_or_compute("k", boom)
+    assert cache.get_or_compute("k", _entry)["label"] == "A"
+
+
+def test_disk_tier_survives_restart_and_is_bounded(tmp_path):
+    cache = PredictionCache(max_entries=1, disk_dir=str(tmp_path), disk_max_bytes=10_000)
+    cache.put("a", _entry("a", heatmap=b"\xff" * 4000))
+    cache.put("b", _entry("b", heatmap=b"\xee" * 4000))
+
+    # Instance baru (mis. setelah restart) membaca dari disk
+    fresh = PredictionCache(max_entries=4, disk_dir=str(tmp_path), disk_max_bytes=10_000)
+    entry = fresh.get("a")
+    assert entry["label"] == "a"
+    assert entry["heatmap"] == b"\xff" * 4000
+    assert fresh.stats()["disk_hits"] == 1
+
+    # Melebihi batas ukuran -> entry paling lama di disk dihapus
+    fresh.put("c", _entry("c", heatmap=b"\xdd" * 4000))
+    assert fresh.stats()["disk_bytes"] <= 10_000
+    assert fresh.stats()["disk_evictions"] == 1
@@ -0,0 +1,87 @@
+"""Test untuk modul explain (Grad-CAM)."""
+import cv2
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from src.explain import (
+    JET_LUT, GradCamExplainer, encode_overlay, find_target_layer, make_gradcam_heatmap, render_gradcam,
+)
+
+
+@pytest.fixture(scope="module")
+def nested_model():
+    """Model kecil dengan struktur seperti DenseNet121 (base model nested + layer 'relu')."""
+    tf.keras.utils.set_random_seed(42)
+    layers = tf.keras.layers
+    base_in = layers.Input((32, 32, 3))
+    x = layers.Conv2D(4, 3, padding="same")(base_in)
+    x = layers.Activation("relu", name="relu")(x)
+    base = tf.keras.Model(base_in, x, name="base")
+
+    inputs = layers.Input((32, 32, 3))
+    y = layers.RandomFlip("horizontal")(inputs)
+    y = base(y, training=False)
+    y = layers.GlobalAveragePooling2D()(y)
+    y = layers.Dropout(0.3)(y)
+    outputs = layers.Dense(3, activation="softmax")(y)
+    return tf.keras.Model(inputs, outputs)
+
+
+def test_find_target_layer_nested(nested_model):
+    assert find_target_layer(nested_model) == "relu"
+
+
+def test_explainer_matches_model_and_reference_heatmap(nested_model):
+    """Satu pass explainer = model.predict + make_gradcam_heatmap per gambar."""
+    x = np.random.RandomState(0).rand(3, 32, 32, 3).astype(np.float32) * 255
+    explainer = GradCamExplainer(nested_model)
+
+    probs, heatmaps = explainer.explain_batch(x)
+
+    np.testing.assert_allclose(probs, nested_model.predict(x, verbose=0), atol=1e-5)
+    assert heatmaps.shape == (3, 32, 32)
+    for i in range(len(x)):
+        expected = make_gradcam_heatmap(x[i:i + 1], nested_model, "relu")
+        # Heatmap yang seluruhnya <= 0 menjadi 0 (bukan NaN) di explainer
+        np.testing.assert_allclose(heatmaps[i], np.nan_to_num(expected), atol=1e-5)
+
+
+def test_explainer_single_image(nested_model):
+    x = np.random.RandomState(1).rand(32, 32, 3).astype(np.float32) * 255
+    probs, heatmap = GradCamExplainer(nested_model).explain(x)
+    assert probs.shape == (3,)
+    assert heatmap.shape == (32, 32)
+    assert heatmap.min() >= 0.0
+    assert heatmap.max() <= 1.0
+
+
+def test_jet_lut_matches_matplotlib():
+    matplotlib = pytest.importorskip("matplotlib")
+    expected = np.uint8(255 * matplotlib.colormaps["jet"](np.arange(256))[:, :3])[:, ::-1]
+    np.testing.assert_array_equal(JET_LUT[:, 0], expected)
+
+
+def test_render_gradcam_matches_float_overlay():
+    """Overlay uint8 (LUT) ~ overlay float lama: img + 0.4 * jet[heatmap]."""
+    rng = np.random.RandomState(0)
+    img = rng.randint(0, 256, (60, 80, 3), dtype=np.uint8)
+    heatmap = rng.rand(60, 80).astype(np.float32)
+
+    expected = np.clip(JET_LUT[np.uint8(255 * heatmap), 0] * 0.4 + img, 0, 255).astype(np.uint8)
+    out = render_gradcam(img, heatmap)
+    assert out.shape == img.shape and out.dtype == np.uint8
+    assert np.abs(out.astype(int) - expected.astype(int)).max() <= 1
+
+
+def test_encode_overlay_display_resolution():
+    """Encode langsung ke bytes pada resolusi tampilan (faktor bulat, sisi terpanjang <= max_side)."""
+    img = np.full((3000, 4000, 3), 100, dtype=np.uint8)
+    heatmap = np.linspace(0, 1, 36, dtype=np.float32).reshape(6, 6)
+
+    data = encode_overlay(img, heatmap, max_side=1024, fmt="jpeg")
+    assert data[:2] == b"\xff\xd8"
+    assert cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR).shape == (750, 1000, 3)
+
+    webp = encode_overlay(img, heatmap, max_side=512, fmt="webp")
+    assert webp[:4] == b"RIFF" and webp[8:12] == b"WEBP"
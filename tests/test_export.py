@@ -0,0 +1,76 @@
+"""Test untuk export artefak inference-only (.pb)."""
+import json
+
+import numpy as np
+import pytest
+import tensorflow as tf
+from tensorflow.keras import layers
+
+from src.export import export
+from src.inference import FrozenGraphModel, load_model_and_labels
+
+SIZE = (32, 32)
+CLASSES = ["A", "B", "C"]
+
+
+@pytest.fixture
+def trained_model(tmp_path):
+    """Model kecil dengan struktur build_model_improved: augmentasi, base conv+BN, dropout."""
+    tf.keras.utils.set_random_seed(0)
+    base_in = layers.Input(shape=SIZE + (3,))
+    x = layers.Conv2D(8, 3, strides=2, padding='same', use_bias=False)(base_in)
+    x = layers.BatchNormalization()(x)
+    x = layers.Activation('relu', name='relu')(x)
+    base = tf.keras.Model(base_in, x, name='base')
+
+    inputs = layers.Input(shape=SIZE + (3,))
+    x = layers.RandomFlip('horizontal_and_vertical', name='flip')(inputs)
+    x = layers.RandomContrast(0.4, name='contrast')(x)
+    x = base(x, training=False)
+    x = layers.GlobalAveragePooling2D()(x)
+    x = layers.Dropout(0.3, name='dropout')(x)
+    outputs = layers.Dense(len(CLASSES), activation='softmax')(x)
+    model = tf.keras.Model(inputs, outputs)
+    # Statistik BN tidak trivial agar folding benar-benar diuji
+    bn = base.layers[2]
+    bn.set_weights([np.random.uniform(0.5, 2, 8), np.random.uniform(-1, 1, 8),
+                    np.random.uniform(-1, 1, 8), np.random.uniform(0.5, 2, 8)])
+
+    model_path = str(tmp_path / "model.keras")
+    model.save(model_path)
+    label_map = str(tmp_path / "label_map.json")
+    with open(label_map, "w") as f:
+        json.dump({str(i): name for i, name in enumerate(CLASSES)}, f)
+    return model, model_path, label_map
+
+
+def test_export_strips_training_layers_and_matches_original(trained_model, tmp_path):
+    model, model_path, label_map = trained_model
+    out = str(tmp_path / "model.pb")
+    report = export(model_path, label_map, out, img_size=SIZE)
+
+    assert set(report["removed_layers"]) == {"flip", "contrast", "dropout"}
+    assert report["verification"]["max_abs_diff"] < 1e-4
+
+    exported = FrozenGraphModel(out)
+    ops = {n.op for n in tf.compat.v1.GraphDef.FromString(open(out, "rb").read()).node}
+    assert not any(op.startswith(("Random", "StatelessRandom", "FusedBatchNorm", "Rsqrt")) for op in ops)
+    x = np.random.RandomState(1).uniform(0, 255, (4,) + SIZE + (3,)).astype(np.float32)
+    np.testing.assert_allclose(exported.predict(x), model.predict(x, verbose=0), atol=1e-5)
+
+
+def test_exported_model_loads_with_bundled_labels(trained_model, tmp_path):
+    """load_model_and_labels memuat .pb tanpa file label map; label map yang berbeda ditolak."""
+    _, model_path, label_map = trained_model
+    out = str(tmp_path / "model.pb")
+    export(model_path, label_map, out, img_size=SIZE)
+
+    model, class_names = load_model_and_labels(out, str(tmp_path / "missing.json"), serving=True)
+    assert class_names == CLASSES
+    assert model.input_shape == (None,) + SIZE + (3,)
+    assert model.predict(np.zeros((2,) + SIZE + (3,), dtype=np.float32)).shape == (2, len(CLASSES))
+
+    other = tmp_path / "other.json"
+    other.write_text(json.dumps({"0": "X", "1": "Y", "2": "Z"}))
+    with pytest.raises(ValueError):
+        load_model_and_labels(out, str(other))
@@ -71,3 +71,100 @@ def test_predict_image(mock_preprocess):
         if os.path.exists(img_path):
             os.unlink(img_path)
 
+
+
+@patch('src.inference.load_and_preprocess')
+def test_predict_image_with_batcher(mock_preprocess):
+    """Prediksi lewat MicroBatcher memberi hasil yang sama dengan jalur langsung."""
+    from src.batching import MicroBatcher
+    from src.inference import predict_batch
+
+    mock_preprocess.return_value = np.zeros((4, 4, 3), dtype=np.float32)
+    mock_model = Mock()
+    mock_model.predict.side_effect = lambda x, verbose=0: np.tile([0.2, 0.8], (len(x), 1))
+
+    batcher = MicroBatcher(lambda x: predict_batch(mock_model, x), max_batch_size=4, max_wait_ms=1)
+    try:
+        pred_idx, conf, probs = predict_image(mock_model, "dummy.jpg", batcher=batcher)
+    finally:
+        batcher.close()
+
+    assert pred_idx == "1"
+    assert conf == pytest.approx(0.8)
+    assert probs.shape == (2,)
+
+
+@pytest.fixture(scope="module")
+def tiny_tflite_model(tmp_path_factory):
+    """Model Keras kecil + hasil konversi TFLite float16-nya."""
+    from src.convert_tflite import convert
+
+    tf.keras.utils.set_random_seed(0)
+    layers = tf.keras.layers
+    inputs = layers.Input((32, 32, 3))
+    x = layers.Conv2D(4, 3, padding='same', activation='relu')(inputs)
+    x = layers.GlobalAveragePooling2D()(x)
+    outputs = layers.Dense(3, activation='softmax')(x)
+    model = tf.keras.Model(inputs, outputs)
+
+    path = tmp_path_factory.mktemp("tflite") / "tiny_fp16.tflite"
+    path.write_bytes(convert(model, 'fp16'))
+    return model, str(path)
+
+
+def test_tflite_model_matches_keras(tiny_tflite_model):
+    """Backend TFLite memberi probabilitas yang sama (toleransi fp16) untuk batch berapa pun."""
+    from src.inference import TFLiteModel
+
+    keras_model, path = tiny_tflite_model
+    tflite_model = TFLiteModel(path)
+    for batch in (1, 3):
+        x = np.random.RandomState(batch).rand(batch, 32, 32, 3).astype(np.float32)
+        np.testing.assert_allclose(tflite_model.predict(x), keras_model.predict(x, verbose=0), atol=1e-2)
+
+
+def test_convert_main_skips_int8_without_data_dir(tiny_tflite_model, tmp_path):
+    """Mode default (fp16 + int8) tanpa --data_dir: int8 dilewati, fp16 tetap ditulis."""
+    from src.convert_tflite import main, representative_dataset
+
+    keras_model, _ = tiny_tflite_model
+    model_path = str(tmp_path / "tiny.keras")
+    keras_model.save(model_path)
+    main(model_path, str(tmp_path / "out"), ['fp16', 'int8'])
+    assert sorted(os.listdir(tmp_path / "out")) == ["tiny_fp16.tflite"]
+
+    with pytest.raises(ValueError, match="--data_dir"):
+        main(model_path, str(tmp_path / "out"), ['int8'])
+    with pytest.raises(ValueError, match="--data_dir"):
+        representative_dataset(None)
+
+
+def test_load_model_and_labels_tflite_backend(tiny_tflite_model):
+    """File .tflite otomatis dimuat lewat backend TFLite."""
+    from src.inference import TFLiteModel
+
+    _, path = tiny_tflite_model
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as tmp:
+        json.dump({"0": "A", "1": "B", "2": "C"}, tmp)
+        label_path = tmp.name
+    try:
+        model, class_names = load_model_and_labels(path, label_path)
+        assert isinstance(model, TFLiteModel)
+        assert class_names == ["A", "B", "C"]
+        assert model.predict(np.zeros((2, 32, 32, 3), dtype=np.float32)).shape == (2, 3)
+    finally:
+        os.unlink(label_path)
+
+
+def test_serving_model_matches_keras(tiny_tflite_model):
+    """ServingModel (tf.function) = model.predict untuk berbagai ukuran batch."""
+    from src.inference import ServingModel
+
+    keras_model, _ = tiny_tflite_model
+    serving = ServingModel(keras_model)
+    timings = serving.warmup((1, 2))
+    assert set(timings) == {1, 2}
+
+    for batch in (1, 3):
+        x = np.random.RandomState(batch).rand(batch, 32, 32, 3).astype(np.float32)
+        np.testing.assert_allclose(serving.predict(x, verbose=0), keras_model.predict(x, verbose=0), atol=1e-5)
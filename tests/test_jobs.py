@@ -0,0 +1,94 @@
+"""Test untuk modul jobs (antrian heatmap asinkron)."""
+import threading
+import time
+
+from src.jobs import JobQueue
+
+
+def _wait_status(jobs, job_id, statuses=("done", "error", "dropped"), timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = jobs.status(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} tidak selesai: {jobs.status(job_id)}")
+
+
+def test_job_result_is_available_for_polling():
+    jobs = JobQueue(workers=1)
+    job_id = jobs.submit(lambda: "heatmap_a.jpg")
+    job = _wait_status(jobs, job_id)
+    assert job["status"] == "done"
+    assert job["result"] == "heatmap_a.jpg"
+    assert jobs.stats()["completed"] == 1
+
+
+def test_job_error_is_reported():
+    def boom():
+        raise RuntimeError("gagal")
+
+    jobs = JobQueue(workers=1)
+    job = _wait_status(jobs, jobs.submit(boom))
+    assert job["status"] == "error"
+    assert "gagal" in job["error"]
+
+
+def test_full_queue_drops_new_jobs():
+    """Saat antrian penuh, job baru langsung dibuang (prediksi tidak ikut tertahan)."""
+    release = threading.Event()
+    jobs = JobQueue(workers=1, max_queue=1)
+
+    running = jobs.submit(release.wait)
+    _wait_status(jobs, running, statuses=("running",))
+    queued = jobs.submit(lambda: "b")
+    dropped = jobs.submit(lambda: "c")
+
+    assert jobs.status(dropped)["status"] == "dropped"
+    release.set()
+    assert _wait_status(jobs, queued)["status"] == "done"
+    assert jobs.stats()["dropped_full"] == 1
+
+
+def test_stale_jobs_are_dropped():
+    """Job yang menunggu lebih lama dari max_wait_s tidak dikerjakan."""
+    release = threading.Event()
+    jobs = JobQueue(workers=1, max_queue=4, max_wait_s=0.05)
+
+    blocker = jobs.submit(release.wait)
+    _wait_status(jobs, blocker, statuses=("running",))
+    stale = jobs.submit(lambda: "late")
+    time.sleep(0.1)
+    release.set()
+
+    assert _wait_status(jobs, stale)["status"] == "dropped"
+    assert jobs.stats()["dropped_stale"] == 1
+
+
+def test_unknown_job_returns_none():
+    assert JobQueue(workers=1).status("tidak-ada") is None
+
+
+def test_cleanup_runs_for_done_error_and_dropped_jobs():
+    """cleanup (mis. melepas handle model) dipanggil tepat sekali di setiap status akhir."""
+    calls = []
+    release = threading.Event()
+    jobs = JobQueue(workers=1, max_queue=1)
+
+    def boom():
+        raise RuntimeError("gagal")
+
+    blocker = jobs.submit(release.wait, cleanup=lambda: calls.append("blocker"))
+    time.sleep(0.05)  # worker memegang job pertama, antrian kosong
+    failing = jobs.submit(boom, cleanup=lambda: calls.append("error"))
+    dropped = jobs.submit(lambda: None, cleanup=lambda: calls.append("dropped"))
+    assert jobs.status(dropped)["status"] == "dropped"
+    assert calls == ["dropped"]
+
+    release.set()
+    _wait_status(jobs, blocker)
+    _wait_status(jobs, failing)
+    deadline = time.monotonic() + 5.0
+    while len(calls) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(calls) == ["blocker", "dropped", "error"]
@@ -0,0 +1,81 @@
+"""Test untuk modul metrics (histogram stage + format Prometheus)."""
+import time
+
+import numpy as np
+import pytest
+
+from src.metrics import Histogram, Metrics
+
+
+def test_histogram_quantiles_close_to_exact():
+    """Quantile dari bucket sqrt(2) mendekati nilai eksak (error < lebar bucket)."""
+    values = np.random.RandomState(0).lognormal(mean=-4, sigma=1, size=5000)
+    hist = Histogram()
+    for v in values:
+        hist.observe(float(v))
+    for q in (0.5, 0.95, 0.99):
+        exact = np.quantile(values, q)
+        assert hist.quantile(q) == pytest.approx(exact, rel=0.3)
+    assert Histogram().quantile(0.5) is None
+
+
+def test_span_records_even_on_exception():
+    metrics = Metrics()
+    with metrics.span("validate"):
+        time.sleep(0.01)
+    with pytest.raises(ValueError):
+        with metrics.span("inference"):
+            raise ValueError("boom")
+    summary = metrics.stage_summary()
+    assert summary["validate"]["count"] == 1
+    assert summary["validate"]["p50_ms"] > 0
+    assert summary["inference"]["count"] == 1
+
+
+def test_render_prometheus_text():
+    metrics = Metrics(namespace="t")
+    metrics.observe("validate", 0.02)
+    outcomes = metrics.counter("requests_total", "Outcome per request.")
+    outcomes.inc(endpoint="predict", outcome="predicted")
+    outcomes.inc(endpoint="predict", outcome="predicted")
+    text = metrics.render([("model_load_seconds", "Load time.", [({}, 1.5)])])
+
+    assert "# TYPE t_stage_seconds summary" in text
+    assert 't_stage_seconds{stage="validate",quantile="0.95"}' in text
+    assert 't_stage_seconds_count{stage="validate"} 1' in text
+    assert 't_requests_total{endpoint="predict",outcome="predicted"} 2' in text
+    assert "t_model_load_seconds 1.5" in text
+
+
+def test_span_overhead_is_small():
+    """Biaya instrumentasi harus jauh di bawah latency stage (target: beberapa mikrodetik)."""
+    metrics = Metrics()
+    n = 20000
+    start = time.perf_counter()
+    for _ in range(n):
+        with metrics.span("noop"):
+            pass
+    per_span_us = (time.perf_counter() - start) / n * 1e6
+    assert per_span_us < 50
+
+
+def test_render_while_new_stages_are_created():
+    """Scrape bersamaan dengan stage/counter baru tidak boleh gagal (dict berubah saat iterasi)."""
+    import threading
+
+    metrics = Metrics()
+
+    def writer():
+        for i in range(3000):
+            metrics.observe(f"stage_{i}", 0.001)
+            metrics.counter(f"counter_{i}", "test").inc()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        while thread.is_alive():
+            metrics.render()
+            metrics.stage_summary()
+    finally:
+        thread.join()
+    assert len(metrics.stage_summary()) == 3000
@@ -0,0 +1,115 @@
+"""Test untuk resolusi input adaptif (src/multires.py)."""
+import json
+
+import numpy as np
+import pytest
+import tensorflow as tf
+from tensorflow.keras import layers
+
+from src.multires import ResolutionController, parse_resolutions, variant_path, with_input_size
+
+CLASSES = ["A", "B", "C"]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _model(size=(64, 64)):
+    """Struktur seperti model produksi: augmentasi -> base nested ('relu') -> GAP -> Dense."""
+    tf.keras.utils.set_random_seed(0)
+    base_in = layers.Input(shape=size + (3,))
+    x = layers.Conv2D(8, 3, strides=2, padding='same')(base_in)
+    x = layers.BatchNormalization()(x)
+    x = layers.Activation('relu', name='relu')(x)
+    base = tf.keras.Model(base_in, x, name='base')
+
+    inputs = layers.Input(shape=size + (3,))
+    x = layers.RandomFlip('horizontal')(inputs)
+    x = base(x, training=False)
+    x = layers.GlobalAveragePooling2D()(x)
+    outputs = layers.Dense(len(CLASSES), activation='softmax')(x)
+    return tf.keras.Model(inputs, outputs)
+
+
+def test_controller_steps_down_under_load_and_up_after_cooldown():
+    """Turun satu tingkat per min_dwell_s saat jenuh; naik hanya setelah cooldown dan beban rendah."""
+    clock = FakeClock()
+    ctl = ResolutionController([(192, 192), (160, 160), (128, 128)], queue_high=4, queue_low=0,
+                               latency_high_ms=1000, latency_low_ms=300, cooldown_s=10, min_dwell_s=2,
+                               clock=clock)
+    assert ctl.select(queue_depth=0) == (192, 192)
+
+    clock.now = 2.0
+    assert ctl.select(queue_depth=5) == (160, 160)
+    clock.now = 3.0  # masih dalam min_dwell_s
+    assert ctl.select(queue_depth=5) == (160, 160)
+    clock.now = 4.0
+    ctl.observe(1.5)  # latensi tinggi juga memicu turun
+    assert ctl.select(queue_depth=0) == (128, 128)
+    assert ctl.select(queue_depth=50) == (128, 128)  # sudah resolusi terendah
+
+    # Beban turun: naik hanya setelah cooldown_s sejak perpindahan terakhir
+    ctl.observe(0.1)
+    clock.now = 10.0
+    assert ctl.select(queue_depth=0) == (128, 128)
+    clock.now = 14.0
+    assert ctl.select(queue_depth=0) == (160, 160)
+    # Zona tengah (antara batas bawah dan atas): resolusi dipertahankan
+    ctl.observe(0.5)
+    clock.now = 30.0
+    assert ctl.select(queue_depth=2) == (160, 160)
+
+    stats = ctl.stats()
+    assert stats["current"] == [160, 160]
+    assert (stats["switches_down"], stats["switches_up"]) == (2, 1)
+
+
+def test_with_input_size_shares_weights():
+    """Model yang dibangun ulang identik pada resolusi asli dan jalan pada resolusi lebih kecil."""
+    model = _model((64, 64))
+    x = np.random.RandomState(0).uniform(0, 255, (2, 64, 64, 3)).astype(np.float32)
+
+    same = with_input_size(model, (64, 64))
+    np.testing.assert_allclose(same(x, training=False), model(x, training=False), atol=1e-6)
+
+    small = with_input_size(model, (32, 32))
+    assert small.input_shape == (None, 32, 32, 3)
+    assert small.get_layer('base').get_layer('relu') is not None
+    probs = small.predict(x[:, ::2, ::2], verbose=0)
+    assert probs.shape == (2, len(CLASSES))
+    np.testing.assert_allclose(probs.sum(axis=1), 1.0, atol=1e-5)
+
+
+def test_parse_resolutions_and_variant_path():
+    assert parse_resolutions("128, 160,160") == [(160, 160), (128, 128)]
+    assert parse_resolutions([96]) == [(96, 96)]
+    with pytest.raises(ValueError):
+        parse_resolutions("16")
+    assert variant_path("models/best.pb", (160, 160)) == "models/best_160.pb"
+    assert variant_path("models/best.pb", (160, 120)) == "models/best_160x120.pb"
+
+
+def test_export_writes_resolution_variants(tmp_path):
+    """export --resolutions: satu artefak .pb per resolusi, dengan label map dan input size sendiri."""
+    from src.export import export
+    from src.inference import load_model_and_labels
+
+    model_path = str(tmp_path / "model.keras")
+    _model((64, 64)).save(model_path)
+    label_map = str(tmp_path / "label_map.json")
+    with open(label_map, "w") as f:
+        json.dump({str(i): name for i, name in enumerate(CLASSES)}, f)
+
+    out = str(tmp_path / "model.pb")
+    report = export(model_path, label_map, out, img_size=(64, 64), resolutions=[32, 64])
+    assert list(report["variants"]) == ["32x32"]
+    assert report["variants"]["32x32"]["verification"]["max_abs_diff"] < 1e-4
+
+    variant, class_names = load_model_and_labels(variant_path(out, (32, 32)), label_map, serving=True)
+    assert class_names == CLASSES
+    assert variant.input_shape == (None, 32, 32, 3)
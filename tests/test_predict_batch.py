@@ -0,0 +1,93 @@
+"""Test untuk inference massal offline (predict_batch)."""
+import csv
+import json
+
+import cv2
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from src import predict_batch
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    """Model Keras kecil (32x32, 3 kelas) + label map."""
+    tf.keras.utils.set_random_seed(0)
+    layers = tf.keras.layers
+    inputs = layers.Input((32, 32, 3))
+    x = layers.Conv2D(4, 3, padding='same', activation='relu')(inputs)
+    x = layers.GlobalAveragePooling2D()(x)
+    outputs = layers.Dense(3, activation='softmax')(x)
+    model = tf.keras.Model(inputs, outputs)
+
+    folder = tmp_path_factory.mktemp("model")
+    model.save(folder / "tiny.keras")
+    (folder / "label_map.json").write_text(json.dumps({"0": "A", "1": "B", "2": "C"}))
+    return model, str(folder / "tiny.keras"), str(folder / "label_map.json")
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    rng = np.random.RandomState(0)
+    for i in range(5):
+        sub = tmp_path / "images" / f"cam{i % 2}"
+        sub.mkdir(parents=True, exist_ok=True)
+        cv2.imwrite(str(sub / f"img{i}.jpg"), rng.randint(0, 255, (40, 48, 3), dtype=np.uint8))
+    (tmp_path / "images" / "rusak.jpg").write_bytes(b"bukan gambar")
+    return str(tmp_path / "images")
+
+
+def _rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_predict_batch_matches_model(tiny_model, image_dir, tmp_path):
+    """Hasil CSV sama dengan model.predict; gambar rusak dicatat sebagai error."""
+    model, model_path, label_map = tiny_model
+    out = str(tmp_path / "out.csv")
+
+    report = predict_batch.main(image_dir, out, model_path, label_map, (32, 32), batch_size=4)
+
+    rows = _rows(out)
+    assert report["images_processed"] == 6 and report["images_error"] == 1
+    assert [r["status"] for r in rows].count("error") == 1
+    for r in rows:
+        if r["status"] != "ok":
+            continue
+        img = cv2.resize(cv2.imread(f"{image_dir}/{r['path']}"), (32, 32), interpolation=cv2.INTER_AREA)
+        x = cv2.cvtColor(img, cv2.COLOR_BGR2RGB).astype(np.float32)[None]
+        expected = model.predict(x, verbose=0)[0]
+        np.testing.assert_allclose([float(r[f"prob_{c}"]) for c in "ABC"], expected, atol=1e-5)
+        assert r["predicted_class"] == "ABC"[int(np.argmax(expected))]
+
+
+def test_predict_batch_resume(tiny_model, image_dir, tmp_path):
+    """Run ulang melewati path yang sudah ada dan membuang baris terakhir yang terpotong."""
+    _, model_path, label_map = tiny_model
+    out = str(tmp_path / "out.csv")
+    predict_batch.main(image_dir, out, model_path, label_map, (32, 32), batch_size=4)
+    full = _rows(out)
+
+    # Simulasi crash: sisakan header + 2 baris + separuh baris ketiga
+    with open(out, encoding='utf-8') as f:
+        lines = f.readlines()
+    with open(out, 'w', encoding='utf-8') as f:
+        f.writelines(lines[:3])
+        f.write(lines[3][:10])
+
+    report = predict_batch.main(image_dir, out, model_path, label_map, (32, 32), batch_size=4)
+
+    assert report["images_skipped"] == 2
+    assert report["images_processed"] == 4
+    resumed = _rows(out)
+    assert sorted(r["path"] for r in resumed) == sorted(r["path"] for r in full)
+
+
+def test_predict_batch_header_mismatch(tmp_path):
+    """CSV dari label map lain tidak boleh di-append."""
+    out = tmp_path / "out.csv"
+    out.write_text("path,status,predicted_class,confidence,prob_X\n")
+    with pytest.raises(ValueError):
+        predict_batch.read_done(str(out), predict_batch.csv_header(["A", "B"]))
@@ -4,7 +4,7 @@ import tempfile
 import numpy as np
 import cv2
 import pytest
-from src.preprocess import preprocess_image_bgr, load_and_preprocess
+from src.preprocess import preprocess_image_bgr, load_and_preprocess, ImageContext
 
 
 def test_preprocess_image_bgr_basic():
@@ -51,3 +51,39 @@ def test_load_and_preprocess_file_not_found():
     with pytest.raises(FileNotFoundError):
         load_and_preprocess("file_yang_tidak_ada.jpg")
 
+
+
+def test_image_context_decodes_once_and_caches():
+    """ImageContext decode bytes sekali dan cache representasi turunan."""
+    img_bgr = np.random.randint(0, 255, (120, 80, 3), dtype=np.uint8)
+    ok, buf = cv2.imencode('.png', img_bgr)
+    assert ok
+
+    ctx = ImageContext(buf.tobytes())
+    np.testing.assert_array_equal(ctx.bgr, img_bgr)
+    assert ctx.bgr is ctx.bgr
+    assert ctx.hsv is ctx.hsv
+    assert ctx.gray.shape == (120, 80)
+
+    x = ctx.model_input((64, 64))
+    assert x.shape == (64, 64, 3)
+    assert x.dtype == np.float32
+    assert ctx.model_input((64, 64)) is x
+    np.testing.assert_array_equal(x, preprocess_image_bgr(img_bgr, target_size=(64, 64)))
+
+
+def test_image_context_invalid_bytes():
+    """Bytes yang bukan gambar menghasilkan bgr None dan model_input error."""
+    ctx = ImageContext(b"bukan gambar")
+    assert ctx.bgr is None
+    with pytest.raises(ValueError):
+        ctx.model_input((64, 64))
+
+
+def test_image_context_from_bgr():
+    """Context dari pixel yang sudah di-decode tidak mencoba decode bytes."""
+    img_bgr = np.random.randint(0, 255, (50, 40, 3), dtype=np.uint8)
+    ctx = ImageContext.from_bgr(img_bgr)
+    assert ctx.bgr is img_bgr
+    assert ctx.hsv.shape == (50, 40, 3)
+    assert ctx.model_input((32, 32)).shape == (32, 32, 3)
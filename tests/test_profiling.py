@@ -0,0 +1,58 @@
+"""Test untuk modul profiling (profil per request + rotasi folder)."""
+import json
+import os
+import time
+
+import pytest
+
+from src.metrics import Metrics
+from src.profiling import PROFILE_FILE, SUMMARY_FILE, TIMING_FILE, ProfileStore, RequestProfile
+
+
+def _work(metrics):
+    with metrics.span("validate"):
+        sum(i * i for i in range(10000))
+    metrics.observe("inference", 0.005)
+
+
+def test_request_profile_writes_dump_summary_and_timing(tmp_path):
+    metrics = Metrics()
+    store = ProfileStore(str(tmp_path))
+    with RequestProfile(store, "predict", metrics=metrics, meta={"path": "/predict"}) as prof:
+        _work(metrics)
+        prof.meta["status"] = 200
+
+    folder = store.path(prof.profile_id)
+    assert sorted(os.listdir(folder)) == sorted([PROFILE_FILE, SUMMARY_FILE, TIMING_FILE])
+    assert "_work" in open(os.path.join(folder, SUMMARY_FILE)).read()
+    timing = json.load(open(os.path.join(folder, TIMING_FILE)))
+    assert [s["stage"] for s in timing["stages"]] == ["validate", "inference"]
+    assert timing["stages"][1]["ms"] == pytest.approx(5.0)
+    assert timing["status"] == 200 and timing["path"] == "/predict"
+    assert timing["total_ms"] >= timing["stages"][0]["ms"]
+    # Histogram global tetap terisi seperti biasa
+    assert metrics.stage_summary()["validate"]["count"] == 1
+
+
+def test_capture_only_records_inside_block():
+    """Observasi di luar blok capture tidak masuk breakdown request."""
+    metrics = Metrics()
+    metrics.observe("before", 0.1)
+    with metrics.capture() as stages:
+        metrics.observe("inside", 0.2)
+    metrics.observe("after", 0.3)
+    assert stages == [("inside", 0.2)]
+
+
+def test_store_keeps_only_latest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_keep=2)
+    ids = []
+    for _ in range(4):
+        with RequestProfile(store, "predict") as prof:
+            pass
+        ids.append(prof.profile_id)
+        time.sleep(0.01)
+    assert store.ids() == sorted(ids[-2:])
+    assert [p["id"] for p in store.list()] == sorted(ids[-2:], reverse=True)
+    assert store.path("../etc") is None
+    assert store.path(ids[0]) is None
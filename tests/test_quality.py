@@ -0,0 +1,79 @@
+"""Test untuk modul quality (quality gate vs validate_image asli)."""
+import cv2
+import numpy as np
+import pytest
+
+from src.preprocess import ImageContext
+from src import quality
+from src.quality import quality_gate, validate_image_full, color_histogram, blur_score
+
+
+def _leaf(h=600, w=800, hue=(35, 70), seed=0):
+    rng = np.random.RandomState(seed)
+    hsv = np.zeros((h, w, 3), dtype=np.uint8)
+    hsv[..., 0] = rng.randint(hue[0], hue[1], (h, w))
+    hsv[..., 1] = rng.randint(120, 220, (h, w))
+    hsv[..., 2] = rng.randint(60, 200, (h, w))
+    return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+
+
+def _encode(img):
+    ok, buf = cv2.imencode('.png', img)
+    return buf.tobytes()
+
+
+def _corpus():
+    rng = np.random.RandomState(1)
+    leaf = _leaf()
+    scribble = leaf.copy()
+    scribble[50:350, 50:450] = (255, 60, 0)  # biru
+    gray = rng.randint(80, 180, (600, 800), dtype=np.uint8)
+    # Blur tidak seragam: skor harus dihitung atas seluruh frame, bukan crop tengah
+    big = _leaf(1200, 1600, seed=5)
+    soft = cv2.GaussianBlur(big, (0, 0), 8)
+    soft_center = big.copy()
+    soft_center[200:1000, 300:1300] = soft[200:1000, 300:1300]
+    sharp_center = soft.copy()
+    sharp_center[570:630, 770:830] = big[570:630, 770:830]
+    return {
+        quality.MSG_CORRUPT: b"not an image",
+        "Resolusi": _encode(_leaf(150, 150)),
+        quality.MSG_TOO_DARK: _encode((leaf * 0.1).astype(np.uint8)),
+        quality.MSG_TOO_BRIGHT: _encode(rng.randint(235, 256, (600, 800, 3)).astype(np.uint8)),
+        quality.MSG_BLURRY: _encode(cv2.GaussianBlur(leaf, (0, 0), 8)),
+        quality.MSG_BLURRY + " (tengah tajam)": _encode(sharp_center),
+        quality.MSG_FOREIGN: _encode(scribble),
+        quality.MSG_NO_LEAF: _encode(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)),
+        "Valid": _encode(leaf),
+        "Valid (coklat)": _encode(_leaf(hue=(10, 25), seed=2)),
+        "Valid (tepi tajam)": _encode(soft_center),
+    }
+
+
+@pytest.mark.parametrize("expected,data", list(_corpus().items()))
+def test_quality_gate_matches_full_validation(expected, data):
+    """Verdict dan pesan quality_gate identik dengan validate_image asli."""
+    reference = validate_image_full(ImageContext(data))
+    result = quality_gate(ImageContext(data))
+    assert result == reference
+    assert result[1].startswith(expected.split(" (")[0])
+
+
+def test_color_histogram_matches_inrange():
+    """Satu histogram H x S x V = jumlah countNonZero(inRange) per range warna."""
+    hsv = np.random.RandomState(3).randint(0, 256, (120, 160, 3)).astype(np.uint8)
+    hsv[..., 0] %= 180
+    hist = color_histogram(hsv)
+
+    def count(lo, hi):
+        return cv2.countNonZero(cv2.inRange(hsv, np.array(lo), np.array(hi)))
+
+    assert hist[85:136, 2, 2].sum() == count([85, 50, 50], [135, 255, 255])
+    assert hist[140:171, 2, 2].sum() == count([140, 50, 50], [170, 255, 255])
+    assert hist[25:96, 1:, 1:].sum() == count([25, 40, 40], [95, 255, 255])
+    assert hist[10:26, 1:, 1:].sum() == count([10, 40, 40], [25, 255, 255])
+
+
+def test_blur_score_matches_float64_laplacian():
+    gray = np.random.RandomState(4).randint(0, 256, (100, 100)).astype(np.uint8)
+    assert blur_score(gray) == pytest.approx(cv2.Laplacian(gray, cv2.CV_64F).var())
@@ -0,0 +1,104 @@
+"""Test untuk registry model berversi dan ModelHandle (hot reload)."""
+import json
+
+import pytest
+
+from src.registry import ModelHandle, ModelRegistry
+
+
+def _add_version(root, version, model_name="model.keras"):
+    folder = root / version
+    folder.mkdir()
+    (folder / model_name).write_bytes(b"model")
+    (folder / "label_map.json").write_text(json.dumps({"0": "A"}))
+
+
+def test_registry_versions_and_latest(tmp_path):
+    """Versi lengkap diurutkan natural; tanpa ACTIVE yang terbaru aktif."""
+    for v in ("v2", "v10", "v1"):
+        _add_version(tmp_path, v)
+    (tmp_path / "v11").mkdir()  # belum lengkap (tanpa model/label map)
+    registry = ModelRegistry(str(tmp_path))
+
+    assert registry.versions() == ["v1", "v2", "v10"]
+    assert registry.active() == "v10"
+    model_path, label_map = registry.resolve("v2")
+    assert model_path.endswith("v2/model.keras") and label_map.endswith("v2/label_map.json")
+    with pytest.raises(FileNotFoundError):
+        registry.resolve("v11")
+    with pytest.raises(FileNotFoundError):
+        registry.resolve("../v1")
+
+
+def test_registry_prefers_keras_over_export(tmp_path):
+    """.keras menang atas .pb di folder yang sama (Grad-CAM); .pb dipakai bila sendirian, varian resolusi tidak."""
+    _add_version(tmp_path, "v1")
+    (tmp_path / "v1" / "model.pb").write_bytes(b"frozen")
+    _add_version(tmp_path, "v2", "densenet121_best.keras")
+    (tmp_path / "v2" / "densenet121_best.pb").write_bytes(b"frozen")
+    _add_version(tmp_path, "v3", "model.pb")
+    (tmp_path / "v3" / "model_160.pb").write_bytes(b"frozen")
+    _add_version(tmp_path, "v4", "densenet121_best.pb")
+    (tmp_path / "v4" / "densenet121_best_128.pb").write_bytes(b"frozen")
+    registry = ModelRegistry(str(tmp_path))
+
+    assert registry.resolve("v1")[0].endswith("v1/model.keras")
+    assert registry.resolve("v2")[0].endswith("v2/densenet121_best.keras")
+    assert registry.resolve("v3")[0].endswith("v3/model.pb")
+    assert registry.resolve("v4")[0].endswith("v4/densenet121_best.pb")
+
+
+def test_handle_reports_capabilities():
+    """info() memperlihatkan Grad-CAM dan resolusi yang tersedia (artefak .pb: tanpa Grad-CAM)."""
+    class FrozenStub:
+        input_shape = (None, 192, 192, 3)
+
+    handle = ModelHandle("v1", FrozenStub(), ["A"], explainer=None)
+    handle.variants = {(128, 128): object(), (160, 160): object()}
+    assert handle.info()["gradcam"] is False
+    assert handle.capabilities()["resolutions"] == [[192, 192], [160, 160], [128, 128]]
+
+
+def test_registry_activate_and_rollback(tmp_path):
+    """activate mencatat history; rollback kembali ke versi sebelumnya."""
+    for v in ("v1", "v2", "v3"):
+        _add_version(tmp_path, v, "model.tflite" if v == "v3" else "model.keras")
+    registry = ModelRegistry(str(tmp_path))
+    with pytest.raises(ValueError):
+        registry.previous()
+
+    registry.activate("v1")
+    registry.activate("v3")
+    assert registry.active() == "v3"
+    assert registry.resolve("v3")[0].endswith("model.tflite")
+    assert registry.previous() == "v1"
+
+    registry.activate("v1", rollback=True)
+    snap = registry.snapshot()
+    assert snap["active"] == "v1"
+    assert snap["history"] == ["v3"]
+    # Dibaca ulang dari file ACTIVE (mis. oleh worker lain)
+    assert ModelRegistry(str(tmp_path)).active() == "v1"
+
+
+def test_handle_closes_after_last_request():
+    """Handle yang di-retire baru ditutup setelah request terakhir melepasnya."""
+    closed = []
+    handle = ModelHandle("v1", model=object(), class_names=["A"])
+    handle.on_close(lambda: closed.append("v1"))
+
+    assert handle.acquire()
+    handle.retire()
+    assert not handle.closed and closed == []
+    handle.release()
+    assert handle.closed and closed == ["v1"]
+    # Handle yang sudah ditutup tidak bisa di-pin lagi
+    assert not handle.acquire()
+
+
+def test_handle_retire_without_requests_closes_immediately():
+    closed = []
+    handle = ModelHandle("v1", model=object(), class_names=["A"])
+    handle.on_close(lambda: closed.append(True))
+    handle.retire()
+    assert handle.closed and closed == [True]
@@ -0,0 +1,25 @@
+"""Test untuk modul serve (prefork)."""
+from src.serve import thread_budget_env
+
+
+def test_thread_budget_env():
+    """Budget thread per worker diteruskan ke TF, OpenMP, dan TFLite."""
+    env = thread_budget_env(2)
+    assert env["TF_NUM_INTRAOP_THREADS"] == "2"
+    assert env["TF_NUM_INTEROP_THREADS"] == "2"
+    assert env["OMP_NUM_THREADS"] == "2"
+    assert env["TFLITE_NUM_THREADS"] == "2"
+    assert thread_budget_env(0)["OMP_NUM_THREADS"] == "1"
+
+
+def test_multiworker_rejects_process_local_state():
+    """State per proses (upload di RAM, job heatmap async) ditolak bila worker > 1."""
+    import pytest
+    from src.serve import check_multiworker_config
+
+    check_multiworker_config(1, "memory", "async")
+    check_multiworker_config(4, "disk", "sync")
+    with pytest.raises(ValueError, match="UPLOAD_STORE=memory"):
+        check_multiworker_config(2, "memory", "sync")
+    with pytest.raises(ValueError, match="GRADCAM_MODE=async"):
+        check_multiworker_config(2, "disk", "async")
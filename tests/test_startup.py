@@ -0,0 +1,57 @@
+"""Test untuk modul startup (preload + readiness) dan lazy import."""
+import os
+import subprocess
+import sys
+
+from src.startup import StartupState
+
+
+def test_phase_records_duration():
+    state = StartupState()
+    with state.phase("load_model"):
+        pass
+    snap = state.snapshot()
+    assert "load_model" in snap["phases_ms"]
+    assert snap["status"] == "idle"
+    assert not snap["ready"]
+
+
+def test_background_preload_marks_ready():
+    state = StartupState()
+
+    def preload():
+        with state.phase("warmup"):
+            pass
+        state.mark_ready()
+
+    assert state.run_in_background(preload)
+    assert state.wait(timeout=5)
+    snap = state.snapshot()
+    assert snap["status"] == "ready"
+    assert snap["ready_after_s"] is not None
+    # Sudah siap: preload tidak dijalankan lagi
+    assert not state.run_in_background(preload)
+
+
+def test_background_preload_failure_is_reported():
+    state = StartupState()
+
+    def preload():
+        raise FileNotFoundError("Model not found")
+
+    state.run_in_background(preload)
+    assert not state.wait(timeout=5)
+    snap = state.snapshot()
+    assert snap["status"] == "failed"
+    assert "Model not found" in snap["error"]
+
+
+def test_import_app_does_not_import_tensorflow():
+    """Route non-ML tidak perlu menunggu import TensorFlow."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = "import sys, app; print('tensorflow' in sys.modules)"
+    env = dict(os.environ, PRELOAD_MODEL="0")
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, env=env,
+                         capture_output=True, text=True, timeout=120)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip().splitlines()[-1] == "False"
@@ -0,0 +1,92 @@
+"""Test untuk modul storage (UploadStore)."""
+import os
+import time
+
+import pytest
+
+from src.storage import UploadStore, is_store_name
+
+
+def test_save_uses_unique_names(tmp_path):
+    """Dua upload dengan isi/nama asal sama tidak saling menimpa."""
+    store = UploadStore(root=str(tmp_path), start_sweeper=False)
+    a = store.save(b"first", "jpg")
+    b = store.save(b"second", "jpg")
+    assert a != b
+    assert is_store_name(a) and a.endswith(".jpg")
+    assert (tmp_path / a).read_bytes() == b"first"
+    assert (tmp_path / b).read_bytes() == b"second"
+
+
+def test_sweep_evicts_expired_and_over_budget(tmp_path):
+    store = UploadStore(root=str(tmp_path), max_bytes=10, ttl_s=0.05, start_sweeper=False)
+    old = store.save(b"x" * 4)
+    time.sleep(0.1)
+    names = [store.save(b"y" * 4) for _ in range(3)]
+
+    removed = store.sweep()
+
+    # `old` kedaluwarsa (TTL), lalu file terlama dibuang sampai total <= 10 bytes
+    assert removed == 2
+    assert not store.exists(old) and not (tmp_path / old).exists()
+    assert not store.exists(names[0])
+    assert store.exists(names[1]) and store.exists(names[2])
+    stats = store.stats()
+    assert stats["evicted_ttl"] == 1
+    assert stats["evicted_size"] == 1
+    assert stats["bytes"] == 8
+
+
+def test_sweeper_ignores_foreign_files(tmp_path):
+    """File lama yang bukan milik store (mis. contoh di static/uploads) tidak dihapus."""
+    legacy = tmp_path / "IMG_0001.JPG"
+    legacy.write_bytes(b"legacy")
+    os.utime(legacy, (0, 0))
+    store = UploadStore(root=str(tmp_path), ttl_s=1, start_sweeper=False)
+    store.sweep()
+    assert legacy.exists()
+
+
+def test_memory_mode_keeps_bytes_off_disk():
+    store = UploadStore(memory=True, start_sweeper=False)
+    name = "heatmap_" + "a" * 32 + ".jpg"
+    store.put(name, b"heat")
+    assert store.get(name) == b"heat"
+    assert store.stats()["mode"] == "memory"
+    with pytest.raises(ValueError):
+        store.put("../evil.jpg", b"x")
+
+
+def test_background_sweeper_enforces_budget():
+    store = UploadStore(memory=True, max_bytes=4, sweep_interval_s=60)
+    try:
+        first = store.save(b"abcd")
+        store.save(b"efgh")  # melewati budget -> sweeper dibangunkan
+        deadline = time.time() + 5
+        while store.exists(first) and time.time() < deadline:
+            time.sleep(0.01)
+        assert not store.exists(first)
+    finally:
+        store.close()
+
+
+def test_two_stores_share_one_root(tmp_path):
+    """Dua worker (store terpisah, folder sama): file saling terlihat dan budget berlaku untuk seluruh folder."""
+    a = UploadStore(root=str(tmp_path), max_bytes=10, ttl_s=3600, start_sweeper=False)
+    b = UploadStore(root=str(tmp_path), max_bytes=10, ttl_s=3600, start_sweeper=False)
+
+    first = a.save(b"x" * 4)
+    assert a.exists(first) and b.exists(first)
+    assert not b.exists(UploadStore.new_name())
+
+    time.sleep(0.02)
+    second = b.save(b"y" * 4)
+    time.sleep(0.02)
+    third = a.save(b"z" * 4)
+
+    # Masing-masing store hanya 8 bytes di index-nya, tetapi folder berisi 12 bytes
+    assert b.sweep() == 1
+    assert sorted(os.listdir(tmp_path)) == sorted([second, third])
+    assert not a.exists(first)
+    assert a.sweep() == 0
+    assert a.stats()["bytes"] == 8
@@ -0,0 +1,78 @@
+"""Test untuk inference ber-tile (foto lapangan resolusi tinggi)."""
+import numpy as np
+
+from src.tiling import aggregate, foliage_ratios, plan_tiles, predict_tiled
+
+LEAF_BGR = (40, 160, 60)      # hijau daun
+BACKGROUND_BGR = (128, 128, 128)  # abu-abu (saturasi rendah -> bukan daun)
+LESION_BGR = (30, 80, 150)    # coklat (range penyakit)
+
+
+class LesionModel:
+    """Model palsu: 'Disease' bila tile berisi pixel coklat, selain itu 'Tomato___healthy'."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, x, verbose=0):
+        self.calls.append(len(x))
+        # Input RGB: coklat -> R > G
+        lesion = ((x[..., 0] > x[..., 1] + 20).mean(axis=(1, 2)) > 0.001).astype(np.float32)
+        p_disease = 0.05 + 0.9 * lesion
+        return np.stack([p_disease, 1.0 - p_disease], axis=1)
+
+
+def _field_photo(h=1200, w=1600):
+    """Separuh kiri daun, separuh kanan background, satu lesi kecil di kiri atas."""
+    img = np.empty((h, w, 3), dtype=np.uint8)
+    img[:] = BACKGROUND_BGR
+    img[:, : w // 2] = LEAF_BGR
+    img[100:130, 100:130] = LESION_BGR
+    return img
+
+
+def test_plan_tiles_covers_image():
+    """Tile overlap menutup seluruh gambar dan tile terakhir rata dengan tepi."""
+    tiles = plan_tiles(1000, 1500, tile_size=400, overlap=0.25)
+    covered = np.zeros((1000, 1500), dtype=bool)
+    for _, _, y, x in tiles:
+        assert y + 400 <= 1000 and x + 400 <= 1500
+        covered[y:y + 400, x:x + 400] = True
+    assert covered.all()
+    assert max(t[0] for t in tiles) == 2 and max(t[1] for t in tiles) == 4
+    # Gambar lebih kecil dari tile -> tile persegi selebar sisi terpendek
+    assert plan_tiles(200, 200, tile_size=768) == [(0, 0, 0, 0)]
+    assert plan_tiles(300, 200, tile_size=768) == [(0, 0, 0, 0), (1, 0, 100, 0)]
+
+
+def test_foliage_ratios_skip_background():
+    img = _field_photo()
+    tiles = plan_tiles(*img.shape[:2], tile_size=400, overlap=0.0)
+    ratios = foliage_ratios(img, tiles, 400)
+    by_col = {c: r for (_, c, _, _), r in zip(tiles, ratios)}
+    assert by_col[0] > 0.95 and by_col[3] < 0.05
+
+
+def test_predict_tiled_finds_small_lesion():
+    """Lesi kecil di satu tile menentukan verdict; tile background dilewati; satu batch."""
+    model = LesionModel()
+    result = predict_tiled(model, _field_photo(), target_size=(64, 64),
+                           class_names=["Disease", "Tomato___healthy"], tile_size=400, overlap=0.0)
+
+    assert result["tiles_total"] == 12
+    assert result["tiles_skipped"] == 6 and result["tiles_classified"] == 6
+    assert model.calls == [6]
+    assert int(np.argmax(result["probs"])) == 0
+    assert result["class_map"].shape == (3, 4)
+    assert result["class_map"][0, 0] == 0          # tile dengan lesi
+    assert result["class_map"][1, 1] == 1          # daun sehat
+    assert (result["class_map"][:, 2:] == -1).all()  # background dilewati
+    assert result["saved_ms_est"] >= 0.0
+
+
+def test_aggregate_max_for_disease_min_for_healthy():
+    probs = np.array([[0.1, 0.9], [0.8, 0.2], [0.05, 0.95]])
+    agg = aggregate(probs, healthy_index=1)
+    assert int(np.argmax(agg)) == 0
+    np.testing.assert_allclose(agg, np.array([0.8, 0.2]) / 1.0)
+    np.testing.assert_allclose(aggregate(probs), probs.mean(axis=0))
@@ -0,0 +1,105 @@
+"""Test untuk knowledge distillation (student ringan dari teacher)."""
+import json
+import os
+
+import cv2
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from src.explain import GradCamExplainer
+from src.inference import load_model_and_labels
+from src.train_distill import build_student, compare_models, distillation_loss, train_distill
+
+CLASSES = ["A", "B", "C"]
+SIZE = (32, 32)
+
+
+def _make_dataset(root, n_per_class=4):
+    rng = np.random.RandomState(0)
+    for idx, name in enumerate(CLASSES):
+        os.makedirs(os.path.join(root, name))
+        for i in range(n_per_class):
+            img = rng.randint(0, 60, (SIZE[1], SIZE[0], 3), dtype=np.uint8)
+            img[..., idx] += 180  # tiap kelas dominan di satu kanal warna
+            cv2.imwrite(os.path.join(root, name, f"{i}.png"), img)
+
+
+def _make_teacher(tmp_path):
+    inputs = tf.keras.layers.Input(shape=SIZE + (3,))
+    x = tf.keras.layers.GlobalAveragePooling2D()(tf.keras.layers.Rescaling(1.0 / 255)(inputs))
+    outputs = tf.keras.layers.Dense(len(CLASSES), activation='softmax')(x)
+    teacher = tf.keras.Model(inputs, outputs)
+    teacher_path = str(tmp_path / "teacher.keras")
+    teacher.save(teacher_path)
+    label_map = str(tmp_path / "label_map.json")
+    with open(label_map, "w") as f:
+        json.dump({str(i): name for i, name in enumerate(CLASSES)}, f)
+    return teacher_path, label_map
+
+
+def test_distillation_loss_matches_teacher_only_when_equal():
+    """Student = teacher -> bagian KL nol; alpha=1 -> murni cross-entropy label."""
+    teacher = tf.constant([[0.7, 0.2, 0.1], [0.1, 0.1, 0.8]])
+    y = tf.constant([0, 2])
+    assert float(distillation_loss(y, teacher, teacher, alpha=0.0)) == pytest.approx(0.0, abs=1e-5)
+    other = tf.constant([[0.2, 0.7, 0.1], [0.3, 0.3, 0.4]])
+    assert float(distillation_loss(y, other, teacher, alpha=0.0)) > 0.1
+    ce = tf.keras.losses.sparse_categorical_crossentropy(y, other)
+    assert float(distillation_loss(y, other, teacher, alpha=1.0)) == pytest.approx(float(tf.reduce_mean(ce)))
+
+
+def test_student_loads_local_backbone_weights(tmp_path):
+    """Bobot backbone dari file lokal (offline) benar-benar dipakai student."""
+    backbone = tf.keras.applications.MobileNetV3Small(input_shape=SIZE + (3,), include_top=False, weights=None)
+    weights_path = str(tmp_path / "mnv3_small_notop.weights.h5")
+    backbone.save_weights(weights_path)
+
+    student = build_student(len(CLASSES), SIZE, 'mobilenetv3small', backbone_weights=weights_path)
+    loaded = student.get_layer('mobilenetv3small_base').layers[1]
+    np.testing.assert_allclose(loaded.get_weights()[0], backbone.get_weights()[0])
+    with pytest.raises(FileNotFoundError):
+        build_student(len(CLASSES), SIZE, 'mobilenetv3small', backbone_weights=str(tmp_path / "missing.h5"))
+
+
+def test_train_distill_student_plugs_into_serving(tmp_path):
+    """Student hasil distilasi bisa dimuat load_model_and_labels + Grad-CAM; laporan berisi teacher & student."""
+    data_dir = str(tmp_path / "data")
+    _make_dataset(data_dir)
+    teacher_path, label_map = _make_teacher(tmp_path)
+    out_dir = str(tmp_path / "out")
+
+    report = train_distill(data_dir, data_dir, teacher_path, label_map, out_dir, backbone='compact',
+                           img_size=SIZE, batch_size=4, epochs=1, augment=False)
+
+    assert set(report) >= {"teacher", "student"}
+    assert report["student"]["params"] < 200_000
+    assert 0.0 <= report["student"]["accuracy"] <= 1.0
+    assert report["student"]["latency"]["p50_ms"] > 0
+    assert os.path.exists(os.path.join(out_dir, "distill_compact_report.json"))
+
+    model, class_names = load_model_and_labels(report["student"]["model_path"], report["label_map"])
+    assert class_names == CLASSES
+    probs, heatmap = GradCamExplainer(model).explain(np.full(SIZE + (3,), 128, dtype=np.float32))
+    assert probs.shape == (len(CLASSES),) and heatmap.ndim == 2
+
+
+def test_compare_models_handles_non_keras_backends(tmp_path):
+    """Artefak .pb ikut dibandingkan (params tidak diketahui); teacher non-Keras ditolak di awal."""
+    from src.export import export
+
+    data_dir = str(tmp_path / "data")
+    _make_dataset(data_dir)
+    teacher_path, label_map = _make_teacher(tmp_path)
+    pb_path = str(tmp_path / "teacher.pb")
+    export(teacher_path, label_map, pb_path, img_size=SIZE)
+
+    report = compare_models([("keras", teacher_path), ("pb", pb_path)], data_dir, label_map, SIZE,
+                            batch_size=4, repeats=3)
+    assert report["keras"]["params"] > 0
+    assert report["pb"]["params"] is None
+    assert report["pb"]["accuracy"] == pytest.approx(report["keras"]["accuracy"])
+
+    with pytest.raises(ValueError, match="Keras"):
+        train_distill(data_dir, data_dir, pb_path, label_map, str(tmp_path / "out"), backbone='compact',
+                      img_size=SIZE, batch_size=4, epochs=1)
@@ -0,0 +1,86 @@
+"""Test untuk test-time augmentation (view dihedral)."""
+import numpy as np
+import pytest
+
+from src.batching import MicroBatcher
+from src.tta import MAX_VIEWS, clamp_views, predict_tta, submit_tta, tta_views
+
+
+class SumModel:
+    """Model palsu: 'probabilitas' = jumlah pixel per kanal, dicatat ukuran batchnya."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, x, verbose=0):
+        self.batch_sizes.append(len(x))
+        return x.reshape(len(x), -1, 3)[:, :4].reshape(len(x), -1)
+
+
+def test_tta_views_dihedral():
+    """8 view unik untuk gambar persegi; view 0 = gambar asli."""
+    img = np.arange(4 * 4 * 3, dtype=np.float32).reshape(4, 4, 3)
+    views = tta_views(img, MAX_VIEWS)
+    assert views.shape == (8, 4, 4, 3)
+    np.testing.assert_array_equal(views[0], img)
+    assert len({v.tobytes() for v in views}) == 8
+    np.testing.assert_array_equal(views[4], np.rot90(img))
+
+
+def test_clamp_views():
+    """Jumlah view dibatasi 1..8, dan 4 untuk gambar non-persegi."""
+    assert clamp_views(0) == 1
+    assert clamp_views(20) == 8
+    assert clamp_views(8, (4, 6)) == 4
+    assert tta_views(np.zeros((4, 6, 3)), 8).shape == (4, 4, 6, 3)
+
+
+def test_predict_tta_single_forward_pass():
+    """Semua view diprediksi dalam satu panggilan dan hasilnya dirata-rata."""
+    model = SumModel()
+    img = np.random.RandomState(0).rand(4, 4, 3).astype(np.float32)
+    probs = predict_tta(model, img, 4)
+    assert model.batch_sizes == [4]
+    expected = np.mean([SumModel().predict(v[None])[0] for v in tta_views(img, 4)], axis=0)
+    np.testing.assert_allclose(probs, expected, rtol=1e-6)
+
+
+def test_submit_tta_batches_views():
+    """Lewat MicroBatcher, K view masuk batch yang sama."""
+    model = SumModel()
+    batcher = MicroBatcher(model.predict, max_batch_size=8, max_wait_ms=50)
+    img = np.random.RandomState(1).rand(4, 4, 3).astype(np.float32)
+    try:
+        probs = submit_tta(batcher, img, 8).result(timeout=5)
+    finally:
+        batcher.close()
+    assert model.batch_sizes == [8]
+    np.testing.assert_allclose(probs, predict_tta(SumModel(), img, 8), rtol=1e-6)
+
+
+def test_submit_tta_with_explain_batcher():
+    """Heatmap dari view asli; probabilitas dirata-rata dengan view lain."""
+    model = SumModel()
+    batcher = MicroBatcher(model.predict, max_batch_size=8, max_wait_ms=20)
+    explain = MicroBatcher(lambda x: (model.predict(x), x[..., 0]), max_batch_size=8, max_wait_ms=1)
+    img = np.random.RandomState(2).rand(4, 4, 3).astype(np.float32)
+    try:
+        probs, heatmap = submit_tta(batcher, img, 4, explain_batcher=explain).result(timeout=5)
+    finally:
+        batcher.close()
+        explain.close()
+    np.testing.assert_array_equal(heatmap, img[..., 0])
+    np.testing.assert_allclose(probs, predict_tta(SumModel(), img, 4), rtol=1e-6)
+
+
+def test_submit_tta_propagates_error():
+    """Error di salah satu view diteruskan ke future hasil."""
+    def fail(x):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(fail, max_batch_size=8, max_wait_ms=1)
+    try:
+        with pytest.raises(RuntimeError):
+            submit_tta(batcher, np.zeros((4, 4, 3), np.float32), 2).result(timeout=5)
+    finally:
+        batcher.close()